@@ -0,0 +1,140 @@
+"""
+Fast JSON decoding shared by the chat tools (extract_chat, rename-chat, chatbench).
+
+Chat exports are decoded from raw bytes with the fastest backend that is
+installed, falling back to the standard library:
+
+- orjson (https://github.com/ijl/orjson)
+- msgspec (https://jcristharif.com/msgspec/)
+- json (always available)
+
+The backend can be forced with the CHAT_JSON_BACKEND environment variable
+(e.g. CHAT_JSON_BACKEND=json). Documents the fast backends reject but the
+standard library accepts (NaN, Infinity, lone surrogates) are decoded again with
+json, and every decoding error is raised as a ValueError. The one remaining
+difference is that orjson decodes integers beyond 64 bits as floats.
+
+Example:
+    >>> import chat_json
+    >>> chat_json.loads(b'{"title": "caf\\u00e9"}')
+    {'title': 'café'}
+    >>> chat_json.BACKEND in chat_json.BACKENDS
+    True
+"""
+
+import json
+import os
+from typing import Callable, Dict, Optional
+
+# Backends in order of preference
+BACKENDS = ("orjson", "msgspec", "json")
+BACKEND_ENV_VAR = "CHAT_JSON_BACKEND"
+
+Decoder = Callable[[bytes], object]
+
+
+def _import_decoder(name: str) -> Optional[Decoder]:
+    """
+    Return the bytes decoder of a backend, or None if it is not installed.
+
+    Args:
+        name: Backend name (one of BACKENDS)
+
+    Returns:
+        Function decoding JSON bytes, raising the backend's own errors
+    """
+    if name == "json":
+        return json.loads
+    try:
+        if name == "orjson":
+            import orjson  # pylint: disable=import-outside-toplevel
+
+            return orjson.loads
+        if name == "msgspec":
+            import msgspec  # pylint: disable=import-outside-toplevel
+
+            return msgspec.json.Decoder().decode
+    except ImportError:
+        return None
+    raise ValueError(f"Unknown JSON backend: {name} (choose from {', '.join(BACKENDS)})")
+
+
+def available_backends() -> Dict[str, Decoder]:
+    """
+    Return the installed backends, in order of preference.
+
+    Returns:
+        Dict mapping backend names to their raw bytes decoders
+    """
+    decoders = {}
+    for name in BACKENDS:
+        decoder = _import_decoder(name)
+        if decoder is not None:
+            decoders[name] = decoder
+    return decoders
+
+
+def select_backend(preferred: Optional[str] = None) -> str:
+    """
+    Choose the backend to decode with.
+
+    Args:
+        preferred: Backend to use if installed; the fastest installed one otherwise
+
+    Returns:
+        Name of the selected backend
+    """
+    if preferred:
+        if _import_decoder(preferred) is not None:
+            return preferred
+        print(f"Warning: JSON backend {preferred} is not installed; using the default.")
+    return next(iter(available_backends()))
+
+
+def make_loads(name: str) -> Callable[[bytes], object]:
+    """
+    Build a loads() function for a backend with json.loads() semantics.
+
+    Args:
+        name: Backend name (one of BACKENDS)
+
+    Returns:
+        Function decoding JSON bytes or str, raising ValueError on invalid JSON
+    """
+    decoder = _import_decoder(name)
+    if decoder is None:
+        raise ValueError(f"JSON backend {name} is not installed")
+    if name == "json":
+        return json.loads
+
+    def loads(data) -> object:
+        try:
+            return decoder(data)
+        except Exception:  # pylint: disable=broad-except
+            # Either invalid JSON, reported with json's message, or input that
+            # only the standard library accepts
+            return json.loads(data)
+
+    return loads
+
+
+BACKEND = select_backend(os.environ.get(BACKEND_ENV_VAR))
+loads = make_loads(BACKEND)
+
+
+def load_file(file_path: str) -> object:
+    """
+    Read and decode a JSON file as raw bytes, without decoding it to text first.
+
+    Args:
+        file_path: Path to the JSON file
+
+    Returns:
+        The decoded JSON value
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If it does not contain valid JSON
+    """
+    with open(file_path, "rb") as f:
+        return loads(f.read())
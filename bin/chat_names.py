@@ -0,0 +1,170 @@
+"""
+Unique output filename allocation shared by the chat tools (extract_chat, rename-chat).
+
+Outputs are named BASE.EXT, then BASE-01.EXT, BASE-02.EXT, ... on collisions,
+with no upper limit. Instead of probing the filesystem for every candidate, a
+FilenameAllocator lists each output directory once and keeps the names it has
+seen or handed out in memory, so allocating thousands of names costs one
+directory read rather than thousands of stat calls (which matters most on
+network filesystems).
+
+Names are claimed on disk without ever overwriting a file: files are created
+with O_EXCL, and existing files are moved into place with a hard link, which
+also fails rather than replacing an existing name. Another process that created
+the same name after the directory was listed therefore only makes the allocator
+move on to the next candidate. A lock makes each allocator safe to share
+between threads.
+
+Example:
+    >>> allocator = FilenameAllocator()
+    >>> allocator.reserve('out', 'chat', 'md')
+    'out/chat.md'
+    >>> allocator.reserve('out', 'chat', 'md')
+    'out/chat-01.md'
+"""
+
+import itertools
+import os
+import threading
+from typing import Dict, Iterator, Optional, Set
+
+
+def candidate_names(base_name: str, extension: str) -> Iterator[str]:
+    """
+    Yield the filenames tried for an output, in order.
+
+    Args:
+        base_name: Name without collision suffix or extension
+        extension: File extension, without the dot
+
+    Yields:
+        BASE.EXT, then BASE-01.EXT, BASE-02.EXT, ... without limit
+    """
+    yield f"{base_name}.{extension}"
+    for counter in itertools.count(1):
+        yield f"{base_name}-{counter:02d}.{extension}"
+
+
+class FilenameAllocator:
+    """
+    Hand out unique filenames, reading each directory only once.
+
+    Attributes:
+        taken: Names known to be in use, per absolute directory path. Filled from
+            a single listing the first time a directory is used and extended with
+            every name reserved since.
+    """
+
+    def __init__(self) -> None:
+        self.taken: Dict[str, Set[str]] = {}
+        self.lock = threading.Lock()
+
+    def _names(self, dir_path: str) -> Set[str]:
+        """Return the set of taken names for a directory (the lock must be held)."""
+        key = os.path.abspath(dir_path)
+        names = self.taken.get(key)
+        if names is None:
+            os.makedirs(dir_path, exist_ok=True)
+            names = set(os.listdir(dir_path))
+            self.taken[key] = names
+        return names
+
+    def reserve(self, dir_path: str, base_name: str, extension: str) -> str:
+        """
+        Reserve the first free name for an output without touching the disk.
+
+        Args:
+            dir_path: Output directory (created if missing)
+            base_name: Name without collision suffix or extension
+            extension: File extension, without the dot
+
+        Returns:
+            Path of the reserved name
+        """
+        with self.lock:
+            names = self._names(dir_path)
+            name = next(n for n in candidate_names(base_name, extension) if n not in names)
+            names.add(name)
+        return os.path.join(dir_path, name)
+
+    def release(self, path: str) -> None:
+        """
+        Return a name to the pool, e.g. after its file was removed or a reserved
+        name was not used.
+
+        Args:
+            path: Path previously reserved or listed
+        """
+        with self.lock:
+            names = self.taken.get(os.path.abspath(os.path.dirname(path)))
+            if names is not None:
+                names.discard(os.path.basename(path))
+
+    def create(
+        self,
+        dir_path: str,
+        base_name: str,
+        extension: str,
+        source_path: Optional[str] = None,
+    ) -> str:
+        """
+        Allocate a unique name and claim it on disk without overwriting anything.
+
+        Args:
+            dir_path: Output directory (created if missing)
+            base_name: Name without collision suffix or extension
+            extension: File extension, without the dot
+            source_path: Existing file to move to the new name. If omitted, an
+                empty file is created.
+
+        Returns:
+            Path of the claimed file
+
+        Raises:
+            OSError: If the file cannot be created or moved
+        """
+        while True:
+            path = self.reserve(dir_path, base_name, extension)
+            try:
+                claim_path(path, source_path)
+                return path
+            except FileExistsError:
+                # Created by someone else since the directory was listed; the
+                # name stays reserved and the next candidate is tried.
+                continue
+
+
+def claim_path(path: str, source_path: Optional[str] = None) -> None:
+    """
+    Create path, or move source_path to it, failing if path already exists.
+
+    A hard link claims the name and publishes the complete file in one step.
+    On filesystems without hard links an empty file is created with O_EXCL and
+    then replaced by the source.
+
+    Args:
+        path: Destination path
+        source_path: Optional existing file to move to path
+
+    Raises:
+        FileExistsError: If path already exists
+        OSError: If the file cannot be created or moved
+    """
+    if source_path is not None:
+        try:
+            os.link(source_path, path)
+        except FileExistsError:
+            raise
+        except OSError:
+            pass  # No hard links here; fall back to an O_EXCL placeholder
+        else:
+            os.unlink(source_path)
+            return
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    os.close(fd)
+    if source_path is not None:
+        try:
+            os.replace(source_path, path)
+        except OSError:
+            os.unlink(path)
+            raise
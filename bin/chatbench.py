@@ -0,0 +1,432 @@
+#!/usr/bin/env python
+"""
+Synthetic chat export generator and benchmark harness for extract_chat.
+
+Real chat exports are private, so this script generates reproducible synthetic
+exports in the same shape (a JSON array of conversations, each with a 'mapping'
+of nodes linked by 'parent' and 'children') and times the extract_chat pipeline
+on them.
+
+Generator parameters:
+- Number of conversations
+- Depth (messages on the current branch of each conversation)
+- Branching (alternative replies per regenerated turn) and regeneration rate
+- Message length, code-block density and tool-message mix
+- Share of non-ASCII messages
+- Random seed, so every corpus can be regenerated exactly
+
+Benchmark phases, timed separately for each output format:
+- load: read and decode the export (streamed, one conversation at a time)
+- decode: decode the whole export in one call with each installed JSON backend
+  (orjson, msgspec, json; see chat_json.py)
+- traverse: build the message sequence of every conversation
+- clean: run clean_text over every text part
+- render: render every conversation into document fragments
+- write: write the rendered documents to disk
+- end-to-end: a complete extract_chat run (optionally with --jobs)
+
+Each phase reports its best time over the repeats and the peak RSS of the
+process after the phase.
+
+Usage:
+    python chatbench.py generate corpus.json --conversations 500 --depth 40
+    python chatbench.py run corpus.json --repeat 3 --json results.json
+    python chatbench.py run --conversations 200 --formats markdown
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+import chat_json
+import extract_chat
+
+WORDS = (
+    "the of and to in is that for it with as was on be by this are from or at "
+    "an have not which but can all their more one will has if about there when "
+    "function value error request server cache index query file thread process "
+    "memory latency buffer stream parser token branch commit deploy config"
+).split()
+NON_ASCII_WORDS = ["café", "naïve", "façade", "résumé", "Zürich", "日本語", "данные", "—", "“quoted”"]
+CODE_LANGUAGES = ["python", "bash", "javascript", "sql"]
+TOOL_CONTENT_TYPES = ["tether_browsing_display", "tether_quote", "code", "parts"]
+
+
+# -----------------------------------------------------------------------------
+# Corpus Generation
+# -----------------------------------------------------------------------------
+class CorpusGenerator:
+    """
+    Deterministic generator of synthetic conversations.
+
+    Each conversation has a root node without a message, followed by a current
+    branch of 'depth' alternating user/assistant messages ending at
+    'current_node'. A regenerated assistant turn gets 'branching - 1' abandoned
+    sibling replies. Tool messages are inserted after assistant turns.
+
+    Example:
+        >>> generator = CorpusGenerator(seed=1, depth=4)
+        >>> conversation = generator.conversation(0)
+        >>> conversation['current_node'] in conversation['mapping']
+        True
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        depth: int = 20,
+        branching: int = 2,
+        regenerate_rate: float = 0.1,
+        message_words: int = 120,
+        code_density: float = 0.3,
+        tool_rate: float = 0.2,
+        non_ascii_rate: float = 0.1,
+    ) -> None:
+        self.random = random.Random(seed)
+        self.depth = depth
+        self.branching = max(1, branching)
+        self.regenerate_rate = regenerate_rate
+        self.message_words = message_words
+        self.code_density = code_density
+        self.tool_rate = tool_rate
+        self.non_ascii_rate = non_ascii_rate
+        self.start_time = 1700000000.0
+
+    def words(self, count: int) -> str:
+        """Return 'count' random words, with occasional non-ASCII words."""
+        rng = self.random
+        vocabulary = WORDS + NON_ASCII_WORDS if rng.random() < self.non_ascii_rate else WORDS
+        return " ".join(rng.choice(vocabulary) for _ in range(count))
+
+    def text(self) -> str:
+        """Return a message body of about message_words words."""
+        rng = self.random
+        count = max(1, int(rng.expovariate(1 / self.message_words)))
+        paragraphs = [self.words(min(count, 60)) + "." for _ in range(max(1, count // 60))]
+        if rng.random() < self.code_density:
+            language = rng.choice(CODE_LANGUAGES)
+            code = "\n".join(f"    {self.words(6)}" for _ in range(rng.randint(3, 20)))
+            fence = "````" if rng.random() < 0.2 else "```"
+            paragraphs.insert(rng.randint(0, len(paragraphs)), f"{fence}{language}\n{code}\n{fence}")
+        return "\n\n".join(paragraphs)
+
+    def tool_content(self) -> Dict:
+        """Return the content of a random tool message."""
+        rng = self.random
+        content_type = rng.choice(TOOL_CONTENT_TYPES)
+        if content_type == "tether_browsing_display":
+            return {"content_type": content_type, "result": "\n\n".join(self.words(20) for _ in range(10))}
+        if content_type == "tether_quote":
+            return {
+                "content_type": content_type,
+                "title": self.words(4),
+                "url": f"https://example.com/{rng.randint(1, 10**6)}",
+                "text": self.words(80),
+            }
+        if content_type == "code":
+            return {"content_type": content_type, "language": "python", "text": self.words(30)}
+        listing = "\n".join(f"{self.words(2)}.txt" for _ in range(rng.randint(2, 12)))
+        return {"content_type": "text", "parts": [listing]}
+
+    def conversation(self, index: int) -> Dict:
+        """
+        Generate one conversation.
+
+        Args:
+            index: Conversation number, used for its id and title
+
+        Returns:
+            Conversation in export format
+        """
+        rng = self.random
+        mapping: Dict[str, Dict] = {}
+        counter = iter(range(1, 1 << 30))
+        timestamp = self.start_time + index * 3600
+
+        def add_node(parent: Optional[str], role: Optional[str], content: Optional[Dict]) -> str:
+            node_id = f"c{index}-n{next(counter)}"
+            node: Dict = {"id": node_id, "parent": parent, "children": []}
+            if role:
+                node["message"] = {
+                    "id": node_id,
+                    "author": {"role": role},
+                    "create_time": timestamp,
+                    "content": content,
+                    "metadata": {},
+                }
+            mapping[node_id] = node
+            if parent:
+                mapping[parent]["children"].append(node_id)
+            return node_id
+
+        current = add_node(None, None, None)
+        for turn in range(self.depth):
+            timestamp += rng.randint(5, 300)
+            role = "user" if turn % 2 == 0 else "assistant"
+            if role == "assistant" and rng.random() < self.regenerate_rate:
+                for _ in range(self.branching - 1):
+                    add_node(current, role, {"content_type": "text", "parts": [self.text()]})
+            current = add_node(current, role, {"content_type": "text", "parts": [self.text()]})
+            if role == "assistant" and rng.random() < self.tool_rate:
+                current = add_node(current, "tool", self.tool_content())
+
+        return {
+            "id": f"conversation-{index}",
+            "conversation_id": f"conversation-{index}",
+            "title": f"Synthetic {index} {self.words(3)}",
+            "create_time": self.start_time + index * 3600,
+            "update_time": timestamp,
+            "current_node": current,
+            "mapping": mapping,
+        }
+
+    def conversations(self, count: int) -> Iterator[Dict]:
+        """Yield 'count' conversations."""
+        for index in range(count):
+            yield self.conversation(index)
+
+
+def write_corpus(path: str, generator: CorpusGenerator, count: int) -> int:
+    """
+    Write a synthetic export (a JSON array) one conversation at a time.
+
+    Args:
+        path: Output JSON file
+        generator: Configured CorpusGenerator
+        count: Number of conversations
+
+    Returns:
+        Size of the written file in bytes
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for index, conversation in enumerate(generator.conversations(count)):
+            if index:
+                f.write(",\n")
+            json.dump(conversation, f, ensure_ascii=False)
+        f.write("]\n")
+    return os.path.getsize(path)
+
+
+# -----------------------------------------------------------------------------
+# Benchmark Harness
+# -----------------------------------------------------------------------------
+def peak_rss_mb() -> float:
+    """Return the peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def best_time(func: Callable[[], object], repeat: int) -> float:
+    """Return the fastest of 'repeat' timed calls to func."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def text_parts(conversations: List[Dict]) -> Iterator[str]:
+    """Yield every string text part of every message."""
+    for data in conversations:
+        for node in data.get("mapping", {}).values():
+            content = (node.get("message") or {}).get("content") or {}
+            for part in content.get("parts") or []:
+                if isinstance(part, str):
+                    yield part
+
+
+def run_benchmark(
+    corpus_path: str,
+    formats: List[str],
+    repeat: int = 1,
+    jobs: int = 1,
+) -> List[Dict]:
+    """
+    Time each phase of the extract_chat pipeline on a corpus.
+
+    Args:
+        corpus_path: Export JSON file
+        formats: Output formats to benchmark ('markdown', 'html')
+        repeat: Times each phase is run; the fastest run is reported
+        jobs: Worker processes for the end-to-end and index phases
+
+    Returns:
+        List of result dicts with 'phase', 'format' ('-' for format-independent
+        phases, the JSON backend for 'decode'), 'seconds' and 'peak_rss_mb'
+    """
+    results: List[Dict] = []
+
+    def record(phase: str, out_fmt: str, seconds: float) -> None:
+        results.append({
+            "phase": phase,
+            "format": out_fmt,
+            "seconds": round(seconds, 6),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        })
+
+    conversations: List[Dict] = []
+
+    def load() -> None:
+        conversations[:] = [data for _, data in extract_chat.iter_conversations(corpus_path)]
+
+    record("load", "-", best_time(load, repeat))
+    with open(corpus_path, "rb") as f:
+        corpus_bytes = f.read()
+    for backend, decoder in chat_json.available_backends().items():
+        record("decode", backend, best_time(lambda decoder=decoder: decoder(corpus_bytes), repeat))
+    del corpus_bytes
+    record("traverse", "-", best_time(
+        lambda: [extract_chat.build_message_sequence(data["mapping"]) for data in conversations],
+        repeat,
+    ))
+    record("clean", "-", best_time(
+        lambda: [extract_chat.clean_text(part) for part in text_parts(conversations)],
+        repeat,
+    ))
+
+    work_dir = tempfile.mkdtemp(prefix="chatbench-")
+    try:
+        for out_fmt in formats:
+            documents: List[List[str]] = []
+
+            def render() -> None:
+                documents[:] = [
+                    list(extract_chat.iter_conversation(data, out_fmt))
+                    for data in conversations
+                ]
+
+            def write() -> None:
+                out_dir = os.path.join(work_dir, f"write-{out_fmt}")
+                shutil.rmtree(out_dir, ignore_errors=True)
+                for index, fragments in enumerate(documents):
+                    temp_path = extract_chat.write_temp_output(out_dir, fragments)
+                    os.replace(temp_path, os.path.join(out_dir, f"{index}.out"))
+
+            def end_to_end() -> None:
+                out_dir = os.path.join(work_dir, f"extract-{out_fmt}")
+                shutil.rmtree(out_dir, ignore_errors=True)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    extract_chat.process_file_patterns([corpus_path], out_dir, out_fmt, jobs)
+
+            def end_to_end_index() -> None:
+                out_dir = os.path.join(work_dir, f"index-{out_fmt}")
+                index_path = f"{out_dir}.sqlite"
+                shutil.rmtree(out_dir, ignore_errors=True)
+                if os.path.exists(index_path):
+                    os.remove(index_path)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    extract_chat.process_file_patterns(
+                        [corpus_path], out_dir, out_fmt, jobs, index_path=index_path
+                    )
+
+            record("render", out_fmt, best_time(render, repeat))
+            record("write", out_fmt, best_time(write, repeat))
+            documents.clear()
+            record("end-to-end", out_fmt, best_time(end_to_end, repeat))
+            record("index", out_fmt, best_time(end_to_end_index, repeat))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def print_results(results: List[Dict]) -> None:
+    """Print benchmark results as an aligned table."""
+    print(f"{'phase':<12} {'format':<9} {'seconds':>10} {'peak RSS MB':>12}")
+    for result in results:
+        print(
+            f"{result['phase']:<12} {result['format']:<9} "
+            f"{result['seconds']:>10.3f} {result['peak_rss_mb']:>12.1f}"
+        )
+
+
+# -----------------------------------------------------------------------------
+# Command Line
+# -----------------------------------------------------------------------------
+def add_generator_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the corpus generator options to a parser."""
+    parser.add_argument("-n", "--conversations", type=int, default=200, help="Number of conversations")
+    parser.add_argument("--depth", type=int, default=20, help="Messages on each conversation's current branch")
+    parser.add_argument("--branching", type=int, default=2, help="Alternative replies per regenerated turn")
+    parser.add_argument("--regenerate-rate", type=float, default=0.1, help="Share of assistant turns that were regenerated")
+    parser.add_argument("--message-words", type=int, default=120, help="Mean words per message")
+    parser.add_argument("--code-density", type=float, default=0.3, help="Share of messages with a code block")
+    parser.add_argument("--tool-rate", type=float, default=0.2, help="Share of assistant turns followed by a tool message")
+    parser.add_argument("--non-ascii-rate", type=float, default=0.1, help="Share of messages with non-ASCII text")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+
+def generator_from_args(args: argparse.Namespace) -> CorpusGenerator:
+    """Build a CorpusGenerator from parsed generator options."""
+    return CorpusGenerator(
+        seed=args.seed,
+        depth=args.depth,
+        branching=args.branching,
+        regenerate_rate=args.regenerate_rate,
+        message_words=args.message_words,
+        code_density=args.code_density,
+        tool_rate=args.tool_rate,
+        non_ascii_rate=args.non_ascii_rate,
+    )
+
+
+def main():
+    """
+    Main entry point for the script.
+
+    Subcommands:
+    - generate: write a synthetic export
+    - run: benchmark extract_chat on an export (generated on the fly if omitted)
+    """
+    parser = argparse.ArgumentParser(description="Synthetic chat corpus generator and extract_chat benchmark.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = subparsers.add_parser("generate", help="Write a synthetic conversations.json export")
+    generate_parser.add_argument("output", help="Output JSON file")
+    add_generator_arguments(generate_parser)
+
+    run_parser = subparsers.add_parser("run", help="Benchmark extract_chat")
+    run_parser.add_argument("corpus", nargs="?", help="Export to benchmark (default: generate one)")
+    add_generator_arguments(run_parser)
+    run_parser.add_argument(
+        "-f", "--formats", nargs="+", choices=extract_chat.OUTPUT_FORMATS,
+        default=["markdown", "html"], help="Output formats to benchmark"
+    )
+    run_parser.add_argument("-r", "--repeat", type=int, default=1, help="Runs per phase (best is reported)")
+    run_parser.add_argument("-j", "--jobs", type=int, default=1, help="Worker processes for the end-to-end and index phases")
+    run_parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        size = write_corpus(args.output, generator_from_args(args), args.conversations)
+        print(f"Wrote {args.conversations} conversations ({size / (1024 * 1024):.1f} MB) to {args.output}")
+        return
+
+    with tempfile.TemporaryDirectory(prefix="chatbench-") as tmp_dir:
+        corpus = args.corpus
+        if not corpus:
+            corpus = os.path.join(tmp_dir, "conversations.json")
+            size = write_corpus(corpus, generator_from_args(args), args.conversations)
+            print(f"Generated {args.conversations} conversations ({size / (1024 * 1024):.1f} MB), seed {args.seed}")
+        results = run_benchmark(corpus, args.formats, max(1, args.repeat), max(1, args.jobs))
+
+    print_results(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"corpus": args.corpus, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
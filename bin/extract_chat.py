@@ -1,40 +1,134 @@
 #!/usr/bin/env python
 """
-This script extracts conversation logs from JSON files and saves them as Markdown or HTML files.
+This script extracts conversation logs from JSON files and saves them as Markdown, HTML or JSON Lines files.
 
 The script processes JSON files containing chat conversations and converts them to either Markdown
 or HTML format while preserving the conversation structure, timestamps, and special message types.
 
 Key features:
-- Supports both Markdown and HTML output formats
+- Supports Markdown, HTML and normalized JSON Lines output formats, optionally gzip-compressed
 - Handles system, user, assistant and tool messages
 - Preserves message timestamps and ordering
 - Processes code blocks and embedded markdown
 - Generates unique filenames based on conversation metadata
 - Supports batch processing of multiple files
+- Streams monolithic conversations.json exports one conversation at a time
+- Renders conversations in parallel worker processes (--jobs)
+- Incremental re-runs that only re-render changed conversations (--state)
+- Optionally renders only the current branch of edited conversations (--branch)
+- Builds a SQLite FTS5 search index of all messages (--index, 'search' subcommand)
+- Packs all conversations into a single indexed zip archive (--archive)
+- Stores repeated large tool payloads once and links to them (--dedup-tool-output)
+- Watches a drop directory and extracts new or changed exports as they appear (--watch)
+- Filters conversations by date window and title before decoding them, and messages by role
+  (--since, --until, --title-regex, --roles)
+- Writes a CSV table of per-conversation statistics in the same pass (--stats)
 
 Example usage:
     python extract_chat.py input.json --format html --output-dir ./output/
     python extract_chat.py ./chats/*.json --format markdown
+    python extract_chat.py conversations.json --format html --jobs 8 -o ./output/
+    python extract_chat.py conversations.json -o ./output/ --index ./output/chats.sqlite
+    python extract_chat.py search ./output/chats.sqlite "error AND timeout"
+    python extract_chat.py --watch ~/Downloads/exports -o ./output/
+    python extract_chat.py conversations.json --format jsonl --gzip -o ./dataset/
 """
 
 import argparse
+import csv
+import ctypes
+import ctypes.util
 import glob
+import gzip
+import hashlib
 import html
+import io
+import itertools
 import json
 import os
+import queue
 import re
+import select
+import sqlite3
+import struct
+import sys
+import threading
+import time
 import unicodedata
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import BinaryIO, Collection, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import ftfy
 import mistune
 
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+import chat_json
+from chat_names import FilenameAllocator
+
 # Date/time formats
 FILENAME_DATE_FORMAT = "%Y-%m-%d-%H%M%S"
 DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 VALID_MESSAGE_ROLES = {"assistant", "system", "user"}
+OUTPUT_FORMATS = ("markdown", "html", "jsonl")
+OUTPUT_EXTENSIONS = {"markdown": "md", "html": "html", "jsonl": "jsonl"}
+# Compression level of --gzip outputs (zlib's default speed/size trade-off)
+GZIP_LEVEL = 6
+STATE_INDEX_VERSION = 1
+BRANCH_MODES = ("all", "current")
+# Conversations inserted into the search index per committed transaction
+INDEX_BATCH_SIZE = 500
+# Member of a packed archive listing its conversations
+ARCHIVE_INDEX_NAME = "index.json"
+# Tool payloads at least this long are stored once under BLOB_DIR with --dedup-tool-output
+BLOB_MIN_SIZE = 2048
+BLOB_DIR = "_blobs"
+BLOB_ID_LENGTH = 24
+
+# Streaming export parsing
+STREAM_CHUNK_SIZE = 1 << 20
+# Buffer size for streamed output files, and the prefix of their temporary names
+OUTPUT_BUFFER_SIZE = 1 << 16
+TEMP_OUTPUT_PREFIX = ".extract_chat-"
+# Items buffered between the read, render and write stages of the pipeline
+PIPELINE_QUEUE_SIZE = 16
+# --watch: seconds a file must be quiet before it is extracted, the polling
+# interval without inotify, and the state index kept in the output directory
+WATCH_DEBOUNCE = 2.0
+WATCH_POLL_INTERVAL = 1.0
+WATCH_RETRY_DELAY = 30.0  # Seconds before files of a failed extraction are retried
+WATCH_STATE_NAME = ".extract_chat_state.json"
+JSON_WHITESPACE = b" \t\r\n"
+# A complete JSON string, and a run of anything except brackets and unfinished
+# strings. Skipping whole strings keeps brackets inside them from being counted.
+JSON_STRING_PATTERN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+JSON_SKIP_PATTERN = re.compile(
+    rb'[^"\[\]{}]*(?:' + JSON_STRING_PATTERN.pattern + rb'[^"\[\]{}]*)*', re.DOTALL
+)
+JSON_SCALAR_PATTERN = re.compile(rb'[^\s,\]]+')
+# A number or literal inside an object
+JSON_MEMBER_SCALAR_PATTERN = re.compile(rb'[^\s,\]}]+')
+# Bytes of a single-conversation file read to evaluate --since/--until/--title-regex
+# before the rest of the file is read
+METADATA_PREFIX_SIZE = 1 << 16
+MESSAGE_ROLES = ("system", "user", "assistant", "tool")
+# Columns of the --stats table (per-role columns follow MESSAGE_ROLES)
+STATS_COLUMNS = (
+    ("conversation_id", "title", "create_time", "update_time", "duration", "messages")
+    + tuple(f"{role}_messages" for role in MESSAGE_ROLES)
+    + tuple(f"{role}_chars" for role in MESSAGE_ROLES)
+    + ("code_blocks", "output")
+)
+CODE_FENCE = "```"
+
+# Rendering
+HTML_MARKDOWN_PLUGINS = ("strikethrough", "footnotes", "table")
+# Lines starting with 4 or more backticks, optionally followed by a language
+CODE_FENCE_PATTERN = re.compile(r"^(`{4,})(\w*)", re.MULTILINE)
+NEWLINE_RUN_PATTERN = re.compile(r"\n{2,}")
+
 HTML_TEMPLATE_HEADER = """<!DOCTYPE html>
 <html>
 <head>
@@ -211,34 +305,26 @@ def sanitize_title(title: str) -> str:
     return s or "untitled"
 
 
-def generate_unique_filename(
-    input_file: str,
-    title: str,
-    create_time: Optional[float],
-    update_time: Optional[float],
-    extension: str = "json",
-    out_dir: Optional[str] = None
+def output_base_name(
+    title: str, create_time: Optional[float], update_time: Optional[float]
 ) -> str:
     """
-    Generate a unique filename for the output file.
+    Build the collision-free part of an output filename.
 
     Args:
-        input_file: Original input filename
-        title: Title for the output file
+        title: Conversation title
         create_time: Creation timestamp
-        update_time: Last update timestamp
-        extension: File extension (default: 'json')
-        out_dir: Optional output directory
+        update_time: Last update timestamp (create_time is used if missing)
 
     Returns:
-        Generated unique filename in format: YYYY-MM-DD-HHMMSS_YYYY-MM-DD-HHMMSS-TITLE.ext
+        Base name in format: YYYY-MM-DD-HHMMSS_YYYY-MM-DD-HHMMSS-TITLE
 
     Raises:
-        ValueError: If create_time is invalid or too many filename collisions occur
+        ValueError: If create_time is invalid
 
     Example:
-        >>> generate_unique_filename('input.json', 'Test', 1234567890, 1234567890)
-        '2009-02-13-233130_2009-02-13-233130-Test.json'
+        >>> output_base_name('Test', 1234567890, None)
+        '2009-02-13-233130_2009-02-13-233130-Test'
     """
     # Fix both timestamps
     ctime_fixed = fix_timestamp(create_time)
@@ -256,19 +342,30 @@ def generate_unique_filename(
     utime_str = datetime.fromtimestamp(utime_fixed).strftime(FILENAME_DATE_FORMAT)
     cleaned_title = sanitize_title(title)
 
-    dir_path = out_dir if out_dir else os.path.dirname(input_file)
-    os.makedirs(dir_path, exist_ok=True)
+    return f"{ctime_str}_{utime_str}-{cleaned_title}"
+
+
+def is_output_name_for(path: str, dir_path: str, base_name: str, extension: str) -> bool:
+    """
+    Check whether an existing output file was named for the given base name.
+
+    Args:
+        path: Existing output file path
+        dir_path: Directory the new output would be written to
+        base_name: Base name from output_base_name()
+        extension: Output file extension
 
-    base_name = f"{ctime_str}_{utime_str}-{cleaned_title}"
-    filename = os.path.join(dir_path, f"{base_name}.{extension}")
+    Returns:
+        True if path lives in dir_path and is base_name.ext or base_name-NN.ext
 
-    counter = 0
-    while os.path.exists(filename):
-        counter += 1
-        if counter > 99:
-            raise ValueError(f"Too many duplicates for {filename}")
-        filename = os.path.join(dir_path, f"{base_name}-{counter:02d}.{extension}")
-    return filename
+    Example:
+        >>> is_output_name_for('out/a-01.md', 'out', 'a', 'md')
+        True
+    """
+    if os.path.abspath(os.path.dirname(path)) != os.path.abspath(dir_path or "."):
+        return False
+    pattern = rf"{re.escape(base_name)}(?:-\d{{2,}})?\.{re.escape(extension)}"
+    return re.fullmatch(pattern, os.path.basename(path)) is not None
 
 
 def load_json_file(file_path: str) -> Optional[Dict]:
@@ -289,8 +386,7 @@ def load_json_file(file_path: str) -> Optional[Dict]:
         None
     """
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = chat_json.load_file(file_path)
         if isinstance(data, dict):
             return data
         print(f"Error: {file_path} did not contain a JSON object.")
@@ -299,6 +395,233 @@ def load_json_file(file_path: str) -> Optional[Dict]:
     return None
 
 
+def iter_json_array(
+    stream: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """
+    Yield the raw bytes of each element of a top-level JSON array.
+
+    The stream is read in chunks and only the element currently being scanned is
+    kept in memory, so peak memory is bounded by the largest single element rather
+    than by the size of the whole array.
+
+    Args:
+        stream: Binary stream positioned at (or before whitespace preceding) the '['
+        chunk_size: Number of bytes to read per refill
+
+    Yields:
+        Raw JSON bytes for one array element, suitable for chat_json.loads()
+
+    Raises:
+        ValueError: If the stream is not a JSON array or ends in the middle of one
+
+    Example:
+        >>> list(iter_json_array(io.BytesIO(b'[{"a": 1}, {"b": "]"}]')))
+        [b'{"a": 1}', b'{"b": "]"}']
+    """
+    buffer = bytearray()
+    pos = 0
+    eof = False
+
+    def refill() -> bool:
+        nonlocal eof
+        if eof:
+            return False
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer.extend(chunk)
+        return True
+
+    def skip_whitespace() -> bool:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in JSON_WHITESPACE:
+                pos += 1
+            if pos < len(buffer):
+                return True
+            if not refill():
+                return False
+
+    # Opening bracket, allowing for a UTF-8 byte order mark
+    refill()
+    if buffer.startswith(b"\xef\xbb\xbf"):
+        pos = 3
+    if not skip_whitespace() or buffer[pos:pos + 1] != b"[":
+        raise ValueError("input is not a JSON array")
+    pos += 1
+
+    while True:
+        # Drop everything already handed out; bytearray trims its head cheaply
+        del buffer[:pos]
+        pos = 0
+
+        if not skip_whitespace():
+            raise ValueError("unexpected end of input inside JSON array")
+        lead = buffer[pos:pos + 1]
+        if lead == b"]":
+            return
+        if lead == b",":
+            pos += 1
+            continue
+
+        start = pos
+        if lead in (b"{", b"["):
+            depth = 0
+            scan = pos
+            while True:
+                scan = JSON_SKIP_PATTERN.match(buffer, scan).end()
+                # Stopped at the end of the buffer or at an unfinished string
+                if scan >= len(buffer) or buffer[scan] == 0x22:
+                    if not refill():
+                        raise ValueError("unexpected end of input inside JSON value")
+                    continue
+                depth += 1 if buffer[scan] in b"{[" else -1
+                scan += 1
+                if depth == 0:
+                    break
+            pos = scan
+        else:
+            # Scalar element: a string, number or literal
+            pattern = JSON_STRING_PATTERN if lead == b'"' else JSON_SCALAR_PATTERN
+            while True:
+                match = pattern.match(buffer, start)
+                if match is not None and (match.end() < len(buffer) or eof or lead == b'"'):
+                    break
+                if not refill():
+                    raise ValueError("unexpected end of input inside JSON value")
+            pos = match.end()
+
+        yield bytes(buffer[start:pos])
+
+
+def report_error(errors: Optional[List[Tuple[str, str]]], source: str, message: str) -> None:
+    """
+    Print an extraction error and remember it for the end-of-run summary.
+
+    Args:
+        errors: List collecting (source, message) pairs, or None to only print
+        source: File or conversation label the error belongs to
+        message: Message to print
+    """
+    print(message)
+    if errors is not None:
+        errors.append((source, message))
+
+
+def iter_raw_conversations(
+    file_path: str,
+    errors: Optional[List[Tuple[str, str]]] = None,
+    selector: Optional["ConversationFilter"] = None,
+) -> Iterator[Tuple[str, bytes]]:
+    """
+    Yield the raw JSON bytes of each conversation stored in a file.
+
+    A file holding a single JSON object is yielded whole. A file holding a
+    top-level array, such as the official ``conversations.json`` export, is
+    stream-parsed and each element is yielded as soon as it is complete.
+
+    With a selector, conversations whose metadata does not match are dropped
+    before they are decoded. For a single-conversation file the metadata is
+    usually found in its first METADATA_PREFIX_SIZE bytes, so a non-matching
+    file is skipped without reading the rest of it.
+
+    Args:
+        file_path: Path to JSON file to read
+        errors: Optional list collecting (source, message) pairs for failures
+        selector: Optional filter on conversation metadata
+
+    Yields:
+        Tuples of (source label, raw JSON bytes). The label is the file path for
+        single-conversation files and ``path[index]`` for array elements.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            lead = f.read(64).lstrip(b"\xef\xbb\xbf" + JSON_WHITESPACE)[:1]
+            f.seek(0)
+            if lead != b"[":
+                if selector is None:
+                    yield file_path, f.read()
+                    return
+                raw = f.read(METADATA_PREFIX_SIZE)
+                if selector.check(raw, partial=True):
+                    raw += f.read()
+                    if selector.check(raw):
+                        yield file_path, raw
+                return
+
+            for index, raw_element in enumerate(iter_json_array(f)):
+                if selector is None or selector.check(raw_element):
+                    yield f"{file_path}[{index}]", raw_element
+    except (OSError, ValueError) as e:
+        report_error(errors, file_path, f"Error reading JSON from {file_path}: {e}")
+
+
+def parse_conversation(source_label: str, raw: bytes) -> Dict:
+    """
+    Parse the raw JSON bytes of one conversation.
+
+    Args:
+        source_label: Label used in error messages
+        raw: Raw JSON bytes
+
+    Returns:
+        Parsed conversation dict
+
+    Raises:
+        ValueError: If the bytes are not valid JSON or do not hold a JSON object
+    """
+    try:
+        data = chat_json.loads(raw)
+    except ValueError as e:
+        raise ValueError(f"Error reading JSON from {source_label}: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError(f"Error: {source_label} did not contain a JSON object.")
+    return data
+
+
+def decode_conversation(
+    source_label: str, raw: bytes, errors: Optional[List[Tuple[str, str]]] = None
+) -> Optional[Dict]:
+    """
+    Decode the raw JSON bytes of one conversation, reporting failures.
+
+    Args:
+        source_label: Label used in error messages
+        raw: Raw JSON bytes
+        errors: Optional list collecting (source, message) pairs for failures
+
+    Returns:
+        Parsed conversation dict, or None if it is not valid JSON or not an object
+    """
+    try:
+        return parse_conversation(source_label, raw)
+    except ValueError as e:
+        report_error(errors, source_label, str(e))
+        return None
+
+
+def iter_conversations(file_path: str) -> Iterator[Tuple[str, Dict]]:
+    """
+    Yield the conversations stored in a JSON file.
+
+    Args:
+        file_path: Path to JSON file to read
+
+    Yields:
+        Tuples of (source label, conversation data), see iter_raw_conversations()
+
+    Example:
+        >>> [label for label, _ in iter_conversations('conversations.json')]
+        ['conversations.json[0]', 'conversations.json[1]']
+    """
+    for source_label, raw in iter_raw_conversations(file_path):
+        data = decode_conversation(source_label, raw)
+        if data is not None:
+            yield source_label, data
+
+
 def is_tool_message(message_role: str) -> bool:
     """
     Check if a message role represents a tool message.
@@ -332,18 +655,72 @@ def normalize_newlines(input_text: str) -> str:
         >>> normalize_newlines('line1\\n\\n\\nline2')
         'line1\\nline2'
     """
-    return re.sub(r"\n{2,}", "\n", input_text)
+    return NEWLINE_RUN_PATTERN.sub("\n", input_text)
+
+
+# -----------------------------------------------------------------------------
+# Rendering Session
+# -----------------------------------------------------------------------------
+class RenderSession:
+    """
+    Reusable rendering state shared across messages and files.
+
+    Creating a mistune parser runs plugin setup and builds its rule tables, which
+    costs far more than rendering a typical message part. A session creates the
+    parsers once and is then reused for every message of every conversation
+    rendered by the process.
+
+    Attributes:
+        html_renderer: Markdown-to-HTML parser with the strikethrough, footnotes
+            and table plugins
+        markdown_parser: Plain parser used to detect embedded Markdown
+        blob_store: Tool payloads already rendered by this process
+
+    Example:
+        >>> session = RenderSession()
+        >>> session.render_html('Hello **world**')
+        '<p>Hello <strong>world</strong></p>\\n'
+    """
+
+    def __init__(self) -> None:
+        self.html_renderer = mistune.create_markdown(plugins=list(HTML_MARKDOWN_PLUGINS))
+        self.markdown_parser = mistune.create_markdown()
+        self.blob_store = BlobStore()
+
+    def render_html(self, text: str) -> str:
+        """Render Markdown text to HTML with the session's parser."""
+        return self.html_renderer(text)
+
+
+_render_session: Optional[RenderSession] = None
+
+
+def get_render_session() -> RenderSession:
+    """
+    Return the process-wide rendering session, creating it on first use.
+
+    Returns:
+        Shared RenderSession instance (one per process, so each pool worker
+        builds its parsers once)
+    """
+    global _render_session
+    if _render_session is None:
+        _render_session = RenderSession()
+    return _render_session
 
 
 # -----------------------------------------------------------------------------
 # Markdown Utilities
 # -----------------------------------------------------------------------------
-def detect_markdown(input_text: str) -> List[Tuple[int, int, str]]:
+def detect_markdown(
+    input_text: str, session: Optional[RenderSession] = None
+) -> List[Tuple[int, int, str]]:
     """
     Detect markdown segments within text using Mistune parser.
 
     Args:
         input_text: Input text to analyze for markdown
+        session: Rendering session providing the parser (defaults to the shared one)
 
     Returns:
         List of tuples containing:
@@ -359,7 +736,7 @@ def detect_markdown(input_text: str) -> List[Tuple[int, int, str]]:
     current_position = 0
 
     try:
-        markdown_parser = mistune.create_markdown()
+        markdown_parser = (session or get_render_session()).markdown_parser
         abstract_syntax_tree = markdown_parser.parse(input_text)
 
         def process_token(token):
@@ -389,13 +766,16 @@ def detect_markdown(input_text: str) -> List[Tuple[int, int, str]]:
         return []
 
 
-def format_text_block(text_content: str, output_format: str) -> List[str]:
+def format_text_block(
+    text_content: str, output_format: str, session: Optional[RenderSession] = None
+) -> List[str]:
     """
     Format a text block for output in HTML or Markdown.
 
     Args:
         text_content: Text content to format
         output_format: Output format ('html' or 'markdown')
+        session: Rendering session providing the parser (defaults to the shared one)
 
     Returns:
         List of formatted text lines
@@ -406,9 +786,7 @@ def format_text_block(text_content: str, output_format: str) -> List[str]:
     """
     formatted_lines = []
     if output_format == "html":
-        html_content = mistune.create_markdown(
-            plugins=["strikethrough", "footnotes", "table"], escape=True
-        )(text_content)
+        html_content = (session or get_render_session()).render_html(text_content)
         formatted_lines.append(html_content)
     else:
         formatted_lines.append(text_content)
@@ -563,13 +941,108 @@ def process_file_listing(listing_content: str, timestamp: str) -> List[str]:
     return formatted_lines
 
 
-def process_tool_content(content_data: Dict, timestamp: str) -> List[str]:
+class BlobStore:
+    """
+    Content-addressed store of large tool payloads, for cross-conversation dedup.
+
+    Browsing results, quotes and tool outputs are often repeated verbatim across
+    many conversations. With deduplication enabled, each payload of at least
+    BLOB_MIN_SIZE characters is identified by its SHA-256, normalized once per
+    process and written once to BLOB_DIR; conversations link to the stored copy
+    instead of repeating it.
+
+    Attributes:
+        known: Blob IDs this process has already normalized, per output directory
+        current: The 'known' set of the directory currently being written
+        new: Blobs first seen while rendering the current conversation, mapped
+            to their normalized text (handed to the writer with the result)
+    """
+
+    def __init__(self, min_size: int = BLOB_MIN_SIZE) -> None:
+        self.min_size = min_size
+        self.known: Dict[str, set] = {}
+        self.current: set = self.known.setdefault("", set())
+        self.new: Dict[str, str] = {}
+
+    def begin(self, dir_path: str) -> None:
+        """
+        Start rendering a conversation whose output goes to dir_path.
+
+        Args:
+            dir_path: Output directory the conversation's blobs are stored under
+        """
+        self.current = self.known.setdefault(dir_path, set())
+        self.new = {}
+
+    def reference(self, payload: str) -> Optional[str]:
+        """
+        Return the blob ID for a payload, or None if it is too small to share.
+
+        Args:
+            payload: Raw tool payload
+
+        Returns:
+            Blob ID (a SHA-256 prefix); a payload seen for the first time is
+            normalized and queued in 'new'
+        """
+        if len(payload) < self.min_size:
+            return None
+        blob_id = hashlib.sha256(
+            payload.encode("utf-8", "surrogatepass")
+        ).hexdigest()[:BLOB_ID_LENGTH]
+        if blob_id not in self.current:
+            self.current.add(blob_id)
+            self.new[blob_id] = normalize_newlines(payload)
+        return blob_id
+
+    def take_new(self) -> Dict[str, str]:
+        """Return and clear the blobs first seen since the last call."""
+        new, self.new = self.new, {}
+        return new
+
+    def discard_new(self) -> None:
+        """Forget blobs of a conversation that failed, so they are sent again later."""
+        self.current.difference_update(self.new)
+        self.new = {}
+
+
+def blob_path(blob_id: str) -> str:
+    """Return the path of a stored blob, relative to the output directory."""
+    return f"{BLOB_DIR}/{blob_id}.txt"
+
+
+def format_blob_reference(blob_id: str, label: str, output_format: str) -> str:
+    """
+    Format a link to a stored blob.
+
+    Args:
+        blob_id: Blob ID from BlobStore.reference()
+        label: Link text
+        output_format: Output format ('html' or 'markdown')
+
+    Returns:
+        Markdown or HTML link line
+    """
+    if output_format == "html":
+        return f'<a href="{blob_path(blob_id)}">{html.escape(label)}</a>\n'
+    return f"[{label}]({blob_path(blob_id)})\n"
+
+
+def process_tool_content(
+    content_data: Dict,
+    timestamp: str,
+    output_format: str = "markdown",
+    blobs: Optional[BlobStore] = None,
+) -> List[str]:
     """
     Process specialized tool message content.
 
     Args:
         content_data: Tool message content dictionary
         timestamp: Message timestamp string
+        output_format: Output format ('html' or 'markdown'), used for blob links
+        blobs: Optional blob store; large payloads are then linked to a shared
+            copy instead of being rendered inline
 
     Returns:
         List of formatted content lines
@@ -585,8 +1058,14 @@ def process_tool_content(content_data: Dict, timestamp: str) -> List[str]:
     if content_type == "tether_browsing_display":
         search_result = content_data.get("result", "")
         if search_result:
+            blob_id = blobs.reference(search_result) if blobs else None
             formatted_lines.append("<details>\n<summary>Search Results</summary>\n\n")
-            formatted_lines.append(f"{normalize_newlines(search_result)}\n")
+            if blob_id:
+                formatted_lines.append(
+                    format_blob_reference(blob_id, "Shared search results", output_format)
+                )
+            else:
+                formatted_lines.append(f"{normalize_newlines(search_result)}\n")
             formatted_lines.append("</details>\n\n")
         return formatted_lines
 
@@ -607,7 +1086,10 @@ def process_tool_content(content_data: Dict, timestamp: str) -> List[str]:
 
         if quote_url:
             formatted_lines.append(f"Source: {quote_url}\n\n")
-        if quote_text:
+        blob_id = blobs.reference(quote_text) if blobs and quote_text else None
+        if blob_id:
+            formatted_lines.append(format_blob_reference(blob_id, "Shared quote", output_format))
+        elif quote_text:
             formatted_lines.append(f"{normalize_newlines(quote_text)}\n")
 
         formatted_lines.append("</details>\n\n")
@@ -617,6 +1099,12 @@ def process_tool_content(content_data: Dict, timestamp: str) -> List[str]:
     for content_part in content_data.get("parts", []):
         if not isinstance(content_part, str) or not content_part.strip():
             continue
+        blob_id = blobs.reference(content_part) if blobs else None
+        if blob_id:
+            formatted_lines.append("<details>\n<summary>Tool Output</summary>\n\n")
+            formatted_lines.append(format_blob_reference(blob_id, "Shared tool output", output_format))
+            formatted_lines.append("</details>\n\n")
+            continue
         formatted_lines.extend(
             process_file_listing(normalize_newlines(content_part), timestamp)
         )
@@ -627,12 +1115,18 @@ def process_tool_content(content_data: Dict, timestamp: str) -> List[str]:
 # -----------------------------------------------------------------------------
 # Main Conversation Processing
 # -----------------------------------------------------------------------------
-def build_message_sequence(message_mapping: Dict[str, Dict]) -> List[str]:
+def build_message_sequence(
+    message_mapping: Dict[str, Dict], current_node: Optional[str] = None
+) -> List[str]:
     """
     Create ordered list of message IDs using stack-based traversal.
 
     Args:
         message_mapping: Dictionary of message data keyed by message ID
+        current_node: Optional ID of the conversation's active leaf. When given
+            (and present in the mapping), only the branch from the root to this
+            node is returned, found by following 'parent' pointers; otherwise
+            every branch of the tree is returned.
 
     Returns:
         List of message IDs in conversation order
@@ -640,7 +1134,15 @@ def build_message_sequence(message_mapping: Dict[str, Dict]) -> List[str]:
     Example:
         >>> build_message_sequence({'msg1': {'children': ['msg2']}, 'msg2': {}})
         ['msg1', 'msg2']
+        >>> build_message_sequence(
+        ...     {'a': {'children': ['b', 'c']}, 'b': {'parent': 'a'}, 'c': {'parent': 'a'}},
+        ...     current_node='c',
+        ... )
+        ['a', 'c']
     """
+    if current_node in message_mapping:
+        return build_branch_sequence(message_mapping, current_node)
+
     message_sequence: List[str] = []
     visited_messages = set()
 
@@ -667,37 +1169,76 @@ def build_message_sequence(message_mapping: Dict[str, Dict]) -> List[str]:
     return message_sequence
 
 
+def build_branch_sequence(message_mapping: Dict[str, Dict], leaf_id: str) -> List[str]:
+    """
+    Create the ordered list of message IDs from the root to one leaf.
+
+    Only the 'parent' pointers on the path are followed, so the cost is the depth
+    of the leaf rather than the size of the whole (possibly heavily branched) tree.
+
+    Args:
+        message_mapping: Dictionary of message data keyed by message ID
+        leaf_id: ID of the last message of the branch
+
+    Returns:
+        List of message IDs in conversation order
+    """
+    branch: List[str] = []
+    visited_messages = set()
+    message_id: Optional[str] = leaf_id
+    while message_id in message_mapping and message_id not in visited_messages:
+        visited_messages.add(message_id)
+        branch.append(message_id)
+        message_id = message_mapping[message_id].get("parent")
+    branch.reverse()
+    return branch
+
+
+class ControlCharTable(dict):
+    """
+    str.translate() table that deletes every Unicode 'C*' code point (control,
+    format, surrogate, private-use and unassigned) except tab, newline and
+    carriage return.
+
+    Entries are filled on first lookup, so the table only ever holds the code
+    points actually seen instead of all 1.1M of them.
+    """
+
+    def __missing__(self, codepoint: int) -> Optional[int]:
+        ch = chr(codepoint)
+        value = None if unicodedata.category(ch)[0] == 'C' and ch not in '\n\r\t' else codepoint
+        self[codepoint] = value
+        return value
+
+
+CONTROL_CHAR_TABLE = ControlCharTable()
+
+
 def clean_text(text: str) -> str:
     """
-    Clean text by normalizing using NFC and removing problematic sequences
-    that optionally start with '0x', followed by 'EE88' and between 2 to 6 hexadecimal digits.
+    Clean text by fixing mojibake with ftfy, normalizing to NFC and removing
+    control, format, private-use and unassigned code points (newlines, carriage
+    returns and tabs are kept).
+
+    Pure ASCII text without '&', '\\r' or ESC has nothing for ftfy or NFC to
+    change, so it only goes through the deletion table.
 
     Args:
         text: The input text to clean.
 
     Returns:
-        The cleaned text with problematic sequences removed.
+        The cleaned text.
     """
+    if text.isascii() and '&' not in text and '\r' not in text and '\x1b' not in text:
+        return text.translate(CONTROL_CHAR_TABLE)
+
     # Let ftfy handle known weirdness
     text = ftfy.fix_text(text)
 
     # Normalize to NFC
     text = unicodedata.normalize('NFC', text)
 
-    # Optionally remove control chars, private-use chars, etc.
-    cleaned = []
-    for ch in text:
-        cat = unicodedata.category(ch)
-        # Keep standard controls like newlines, tabs, and otherwise discard control chars
-        # Keep everything else unless it's a private-use area or other undesired code point
-        if cat.startswith('C'):
-            # Keep linefeed, carriage return, and tab if you want them
-            if ch not in ('\n', '\r', '\t'):
-                continue
-        # You could add further checks if you don't want private-use areas, etc.
-        cleaned.append(ch)
-
-    return ''.join(cleaned)
+    return text.translate(CONTROL_CHAR_TABLE)
 
 
 def normalize_code_fences(text: str) -> str:
@@ -714,24 +1255,24 @@ def normalize_code_fences(text: str) -> str:
     Returns:
         Text with normalized code block fences
     """
-    # Pattern to match code block fences with more than three backticks
-    # The regex looks for lines starting with 4 or more backticks,
-    # optionally followed by a language identifier
-    pattern = r'^(`{4,})(\w*)'
-    
     # Replace with exactly three backticks plus the language identifier
-    normalized_text = re.sub(pattern, r'```\2', text, flags=re.MULTILINE)
-    
-    return normalized_text
+    return CODE_FENCE_PATTERN.sub(r'```\2', text)
 
 
-def handle_regular_message(message_content: Dict, output_format: str) -> List[str]:
+def handle_regular_message(
+    message_content: Dict,
+    output_format: str,
+    session: Optional[RenderSession] = None,
+    cleaned: Optional[List[str]] = None,
+) -> List[str]:
     """
     Process standard message content (code or text).
 
     Args:
         message_content: Message content dictionary
         output_format: Output format ('html' or 'markdown')
+        session: Rendering session providing the parser (defaults to the shared one)
+        cleaned: Optional list that receives each text segment after clean_text()
 
     Returns:
         List of formatted content lines
@@ -765,7 +1306,9 @@ def handle_regular_message(message_content: Dict, output_format: str) -> List[st
 
             # Clean the text segment
             text_segment = clean_text(text_segment)
-            
+            if cleaned is not None:
+                cleaned.append(text_segment)
+
             # Normalize code block fences to prevent rendering issues
             text_segment = normalize_code_fences(text_segment)
 
@@ -773,22 +1316,22 @@ def handle_regular_message(message_content: Dict, output_format: str) -> List[st
                 formatted_lines.append(text_segment + "\n\n")
             else:
                 # For HTML, let Mistune handle the conversion
-                markdown_parser = mistune.create_markdown(
-                    plugins=['strikethrough', 'footnotes', 'table']
-                )
-                html_content = markdown_parser(text_segment)
+                html_content = (session or get_render_session()).render_html(text_segment)
                 formatted_lines.append(html_content + "\n")
 
     return formatted_lines
 
 
-def process_text_with_markdown(text_segment: str, output_format: str) -> List[str]:
+def process_text_with_markdown(
+    text_segment: str, output_format: str, session: Optional[RenderSession] = None
+) -> List[str]:
     """
     Process text content with embedded markdown.
 
     Args:
         text_segment: Text content to process
         output_format: Output format ('html' or 'markdown')
+        session: Rendering session providing the parsers (defaults to the shared one)
 
     Returns:
         List of formatted lines with markdown properly handled
@@ -805,10 +1348,10 @@ def process_text_with_markdown(text_segment: str, output_format: str) -> List[st
     text_segment = normalize_code_fences(text_segment)
 
     try:
-        markdown_segments = detect_markdown(text_segment)
+        markdown_segments = detect_markdown(text_segment, session)
         if not markdown_segments:
             # No embedded markdown found, just format normally
-            formatted_lines.extend(format_text_block(text_segment, output_format))
+            formatted_lines.extend(format_text_block(text_segment, output_format, session))
             return formatted_lines
 
         # Build a raw string that has the embedded segments fenced
@@ -832,46 +1375,78 @@ def process_text_with_markdown(text_segment: str, output_format: str) -> List[st
     except Exception as error:
         print(f"Warning: Error processing markdown: {error}")
         # On error, just output as standard text block
-        formatted_lines.extend(format_text_block(text_segment, output_format))
+        formatted_lines.extend(format_text_block(text_segment, output_format, session))
 
     return formatted_lines
 
 
-def process_messages(message_mapping: Dict[str, Dict], output_format: str) -> List[str]:
+def process_messages(
+    message_mapping: Dict[str, Dict],
+    output_format: str,
+    session: Optional[RenderSession] = None,
+    current_node: Optional[str] = None,
+    roles: Optional[Collection[str]] = None,
+) -> List[str]:
     """
     Process all messages in conversation order.
 
     Args:
         message_mapping: Dictionary of message data keyed by message ID
         output_format: Output format ('html' or 'markdown')
+        session: Rendering session reused for every message (defaults to the shared one)
+        current_node: Optional active leaf; only its branch is rendered when given
+        roles: Optional author roles to render; other messages are left out
 
     Returns:
         List of formatted lines for complete conversation
+    """
+    return list(
+        iter_messages(message_mapping, output_format, session, current_node, roles=roles)
+    )
 
-    This function:
-    1. Builds the message sequence
-    2. Processes each message in order
-    3. Handles role transitions and tool message blocks
-    4. Formats content according to message type and output format
+
+def iter_message_contents(
+    message_mapping: Dict[str, Dict],
+    current_node: Optional[str] = None,
+    roles: Optional[Collection[str]] = None,
+    stats: Optional["ConversationStats"] = None,
+) -> Iterator[Tuple[str, Dict, str, Dict, bool]]:
     """
-    message_sequence = build_message_sequence(message_mapping)
-    formatted_lines: List[str] = []
-    previous_message_role: Optional[str] = None
+    Yield the messages of a conversation to output, in conversation order.
 
-    for message_id in message_sequence:
+    This is the single message walk behind every output format: messages
+    without a role, outside `roles` or empty system messages are skipped, and
+    user context messages (custom instructions) are rewritten into a system
+    message holding the 'About User' and 'About Assistant' texts.
+
+    Args:
+        message_mapping: Dictionary of message data keyed by message ID
+        current_node: Optional active leaf; only its branch is visited when given
+        roles: Optional author roles to include; other messages are left out
+        stats: Optional statistics accumulator, updated with every message
+            (before the user context rewrite)
+
+    Yields:
+        (message_id, message_data, role, content, from_user_context), where role
+        and content are those to output and from_user_context tells whether they
+        were rewritten from the message's user context data
+    """
+    for message_id in build_message_sequence(message_mapping, current_node):
         mapping_data = message_mapping.get(message_id, {})
         message_data = mapping_data.get("message", mapping_data)
         if not message_data:
             continue
 
         message_role = message_data.get("author", {}).get("role", "")
-        message_content = message_data.get("content", {})
-        message_metadata = message_data.get("metadata", {})
+        message_content = message_data.get("content") or {}
+        message_metadata = message_data.get("metadata") or {}
         is_user_system_message = message_metadata.get("is_user_system_message")
 
         # Skip empty messages or messages with no role
         if not message_role:
             continue
+        if roles is not None and message_role not in roles:
+            continue
 
         # Skip empty system messages
         if (
@@ -882,22 +1457,8 @@ def process_messages(message_mapping: Dict[str, Dict], output_format: str) -> Li
         ):
             continue
 
-        message_timestamp = format_timestamp(message_data.get("create_time", 0))
-
-        # If role changed, close the old block if it was tool => non-tool
-        if message_role != previous_message_role:
-            if (
-                previous_message_role
-                and is_tool_message(previous_message_role)
-                and not is_tool_message(message_role)
-            ):
-                formatted_lines.append("</details>\n\n")
-
-            if formatted_lines and formatted_lines[-1].strip():
-                formatted_lines.append("\n")
-            formatted_lines.extend(
-                generate_heading(message_role, message_timestamp, output_format)
-            )
+        if stats is not None:
+            stats.add(message_role, message_content, message_data.get("create_time"))
 
         # For system/user messages with context, use the context data as content
         user_context_message_data = message_metadata.get("user_context_message_data", {})
@@ -908,121 +1469,1640 @@ def process_messages(message_mapping: Dict[str, Dict], output_format: str) -> Li
         ):
             about_user = user_context_message_data.get("about_user_message", "")
             about_model = user_context_message_data.get("about_model_message", "")
-            message_role = "system"
-
-            message_content = {
-                    "content_type": "text",
-                    "parts": [
-                        f"### About User:\n{about_user}\n\n### About Assistant:\n{about_model}"
-                    ]
-                }
-            formatted_lines.extend(
-                generate_heading(message_role, message_timestamp, output_format)
-            )
+            content = {
+                "content_type": "text",
+                "parts": [
+                    f"### About User:\n{about_user}\n\n### About Assistant:\n{about_model}"
+                ],
+            }
+            yield message_id, message_data, "system", content, True
+        else:
+            yield message_id, message_data, message_role, message_content, False
+
+
+def iter_messages(
+    message_mapping: Dict[str, Dict],
+    output_format: str,
+    session: Optional[RenderSession] = None,
+    current_node: Optional[str] = None,
+    blobs: Optional[BlobStore] = None,
+    roles: Optional[Collection[str]] = None,
+    stats: Optional["ConversationStats"] = None,
+    index: Optional[List[Tuple[str, Optional[float], str]]] = None,
+) -> Iterator[str]:
+    """
+    Render all messages in conversation order, one fragment at a time.
+
+    Args:
+        message_mapping: Dictionary of message data keyed by message ID
+        output_format: Output format ('html' or 'markdown')
+        session: Rendering session reused for every message (defaults to the shared one)
+        current_node: Optional active leaf; only its branch is rendered when given
+        blobs: Optional blob store for deduplicating large tool payloads
+        roles: Optional author roles to render; other messages are left out
+        stats: Optional statistics accumulator, updated with every rendered message
+        index: Optional list that receives a (role, create_time, text) tuple for
+            every rendered message with text, for the search index
+
+    Yields:
+        Formatted fragments of the conversation body
+
+    This function:
+    1. Builds the message sequence
+    2. Processes each message in order
+    3. Handles role transitions and tool message blocks
+    4. Formats content according to message type and output format
+    """
+    session = session or get_render_session()
+    last_fragment = ""
+    previous_message_role: Optional[str] = None
+
+    messages = iter_message_contents(message_mapping, current_node, roles, stats)
+    for _, message_data, message_role, message_content, from_user_context in messages:
+        author_role = message_data["author"]["role"]
+        message_timestamp = format_timestamp(message_data.get("create_time", 0))
+
+        # If role changed, close the old block if it was tool => non-tool
+        if author_role != previous_message_role:
+            if (
+                previous_message_role
+                and is_tool_message(previous_message_role)
+                and not is_tool_message(author_role)
+            ):
+                last_fragment = "</details>\n\n"
+                yield last_fragment
+
+            if last_fragment.strip():
+                last_fragment = "\n"
+                yield last_fragment
+            fragments = generate_heading(author_role, message_timestamp, output_format)
+            yield from fragments
+            last_fragment = fragments[-1] if fragments else last_fragment
+
+        # User context is shown under its own system heading
+        if from_user_context:
+            fragments = generate_heading(message_role, message_timestamp, output_format)
+            yield from fragments
+            last_fragment = fragments[-1] if fragments else last_fragment
 
         # Handle message content based on type
+        cleaned: List[str] = []
         if is_tool_message(message_role):
             # tool messages remain open until we switch roles
-            formatted_lines.extend(
-                process_tool_content(message_content, message_timestamp)
+            fragments = process_tool_content(
+                message_content, message_timestamp, output_format, blobs
             )
         else:
-            formatted_lines.extend(
-                handle_regular_message(message_content, output_format)
-            )
+            fragments = handle_regular_message(message_content, output_format, session, cleaned)
+        if index is not None:
+            # Reuse the segments cleaned for rendering; code, quotes and tool
+            # output are not cleaned there, so they are cleaned here once
+            text = "\n\n".join(cleaned) if cleaned else message_plain_text(message_content)
+            if text:
+                index.append((message_role, message_data.get("create_time"), text))
+        yield from fragments
+        last_fragment = fragments[-1] if fragments else last_fragment
 
         previous_message_role = message_role
 
     # Close final tool message if needed
     if previous_message_role and is_tool_message(previous_message_role):
-        formatted_lines.append("</details>\n\n")
+        yield "</details>\n\n"
 
-    return formatted_lines
+
+# -----------------------------------------------------------------------------
+# Conversation Filters
+# -----------------------------------------------------------------------------
+def skip_json_value(raw: bytes, pos: int) -> Optional[int]:
+    """
+    Find the end of the JSON value starting at pos, without decoding it.
+
+    Args:
+        raw: JSON bytes
+        pos: Offset of the first byte of the value
+
+    Returns:
+        Offset just past the value, or None if raw ends inside it
+    """
+    lead = raw[pos:pos + 1]
+    if lead in (b"{", b"["):
+        depth = 0
+        scan = pos
+        while True:
+            scan = JSON_SKIP_PATTERN.match(raw, scan).end()
+            # Stopped at the end of the input or at an unfinished string
+            if scan >= len(raw) or raw[scan] == 0x22:
+                return None
+            depth += 1 if raw[scan] in b"{[" else -1
+            scan += 1
+            if depth == 0:
+                return scan
+    pattern = JSON_STRING_PATTERN if lead == b'"' else JSON_MEMBER_SCALAR_PATTERN
+    match = pattern.match(raw, pos)
+    if match is None or match.end() >= len(raw):
+        return None
+    return match.end()
 
 
-def extract_one_file(input_path: str, out_dir: Optional[str], out_fmt: str) -> None:
+def scan_top_level(raw: bytes, keys: Collection[str]) -> Tuple[Dict, bool]:
     """
-    Extract a single JSON file into a Markdown or HTML file.
+    Decode selected top-level members of a JSON object without decoding the rest.
+
+    Members are visited in document order and stop being scanned as soon as all
+    requested keys were found. Nested values of other members (such as a
+    conversation's 'mapping') are skipped over without being decoded, so the cost
+    is small compared to decoding the whole object, and zero for whatever follows
+    the last requested key.
 
     Args:
-        input_path: Path to the JSON file
-        out_dir: Optional output directory
-        out_fmt: Output format ('markdown' or 'html')
+        raw: JSON bytes of an object, possibly only a prefix of it
+        keys: Top-level member names to decode
 
-    This function:
-    1. Loads the JSON file
-    2. Extracts metadata (title, timestamps)
-    3. Generates unique output filename
-    4. Processes all messages
-    5. Writes formatted output file
-    """
-    data = load_json_file(input_path)
-    if not data:
-        return
+    Returns:
+        Tuple of (dict of the members found, whether the result is conclusive:
+        True if every key was found or the whole object was scanned)
 
-    msg_map = data.get("mapping", {})
-    if not msg_map:
-        return
+    Example:
+        >>> scan_top_level(b'{"title": "A", "mapping": {}, "create_time": 1', ['title'])
+        ({'title': 'A'}, True)
+    """
+    found: Dict = {}
+    wanted = set(keys)
+    pos = len(raw) - len(raw.lstrip(b"\xef\xbb\xbf" + JSON_WHITESPACE))
+    if raw[pos:pos + 1] != b"{":
+        return found, False
+    pos += 1
+    while wanted:
+        while raw[pos:pos + 1] in (b" ", b"\t", b"\r", b"\n", b","):
+            pos += 1
+        if raw[pos:pos + 1] == b"}":
+            return found, True
+        key_match = JSON_STRING_PATTERN.match(raw, pos)
+        if key_match is None:
+            return found, False
+        key = json.loads(key_match.group())
+        pos = key_match.end()
+        while raw[pos:pos + 1] in (b" ", b"\t", b"\r", b"\n", b":"):
+            pos += 1
+        end = skip_json_value(raw, pos)
+        if end is None:
+            return found, False
+        if key in wanted:
+            try:
+                found[key] = json.loads(raw[pos:end])
+            except ValueError:
+                return found, False
+            wanted.discard(key)
+        pos = end
+    return found, True
+
+
+def parse_date_option(value: str, end_of_day: bool = False) -> float:
+    """
+    Parse a --since/--until value into a Unix timestamp (local time).
 
-    title = data.get("title", "Untitled")
-    ctime = data.get("create_time")
-    utime = data.get("update_time")
+    Args:
+        value: ISO date ('2024-05-01') or date and time ('2024-05-01T14:30')
+        end_of_day: For a date without a time, return the end of that day
+            instead of its start
 
-    # Use the same logic for generating the name, but with md/html extension
-    extension = "html" if out_fmt == "html" else "md"
+    Returns:
+        Unix timestamp
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not an ISO date
+    """
     try:
-        out_path = generate_unique_filename(
-            input_path, title, ctime, utime, extension=extension, out_dir=out_dir
-        )
+        moment = datetime.fromisoformat(value)
     except ValueError as e:
-        print(f"Cannot generate filename for {input_path}: {e}")
-        return
+        raise argparse.ArgumentTypeError(
+            f"invalid date '{value}' (use YYYY-MM-DD or YYYY-MM-DDTHH:MM[:SS])"
+        ) from e
+    timestamp = moment.timestamp()
+    if end_of_day and len(value) == 10:
+        timestamp += 24 * 60 * 60 - 1e-6
+    return timestamp
 
-    print(f"Processing: {input_path}")
-    print(f"Writing to: {out_path}")
 
-    ctime_str = format_timestamp(ctime)
-    utime_str = format_timestamp(utime)
+def parse_roles_option(value: str) -> Tuple[str, ...]:
+    """
+    Parse a comma-separated --roles value.
 
-    lines: List[str] = []
+    Args:
+        value: Roles such as 'user,assistant'
 
-    # Header
-    if out_fmt == "html":
-        lines.append(HTML_TEMPLATE_HEADER.format(
-            title=html.escape(title),
-            start_time=html.escape(ctime_str or "Unknown"),
-            end_time=html.escape(utime_str or "Unknown"),
-        ))
-    else:
-        lines.append(f"# {title}\nStarting: {ctime_str}\nEnding: {utime_str}\n\n")
+    Returns:
+        Tuple of roles
 
-    # Body
-    lines.extend(process_messages(msg_map, out_fmt))
+    Raises:
+        argparse.ArgumentTypeError: If a role is unknown
+    """
+    roles = tuple(role.strip() for role in value.split(",") if role.strip())
+    unknown = [role for role in roles if role not in MESSAGE_ROLES]
+    if not roles or unknown:
+        raise argparse.ArgumentTypeError(
+            f"invalid roles '{value}' (choose from {', '.join(MESSAGE_ROLES)})"
+        )
+    return roles
 
-    # Footer
-    if out_fmt == "html":
-        lines.append(HTML_TEMPLATE_FOOTER)
 
-    os.makedirs(os.path.dirname(out_path), exist_ok=True)
-    try:
-        with open(out_path, "w", encoding="utf-8") as f:
-            f.writelines(lines)
-    except Exception as err:
-        print(f"Error writing {out_path}: {err}")
+class ConversationFilter:
+    """
+    Select conversations by their top-level metadata, before they are decoded.
+
+    A conversation matches when its lifetime (create_time to update_time)
+    overlaps the since/until window and its title matches the regular
+    expression. Conversations without timestamps never match a date window.
+
+    Attributes:
+        since: Optional earliest update_time, as a Unix timestamp
+        until: Optional latest create_time, as a Unix timestamp
+        title_pattern: Optional compiled title regular expression (re.search)
+        keys: Top-level members needed to evaluate the filter
+        rejected: Number of conversations rejected so far
+    """
+
+    def __init__(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        title_regex: Optional[str] = None,
+    ) -> None:
+        self.since = since
+        self.until = until
+        self.title_pattern = re.compile(title_regex) if title_regex else None
+        self.keys: List[str] = []
+        if since is not None or until is not None:
+            self.keys += ["create_time", "update_time"]
+        if self.title_pattern is not None:
+            self.keys.append("title")
+        self.rejected = 0
+
+    def matches(self, metadata: Dict) -> bool:
+        """
+        Check a conversation's metadata against the filter.
+
+        Args:
+            metadata: Dict with the conversation's title and timestamps
+
+        Returns:
+            True if the conversation is selected
+        """
+        if self.title_pattern is not None:
+            title = metadata.get("title")
+            if not self.title_pattern.search(title if isinstance(title, str) else ""):
+                return False
+        if self.since is None and self.until is None:
+            return True
+        try:
+            create_time = fix_timestamp(metadata.get("create_time"))
+            update_time = fix_timestamp(metadata.get("update_time"))
+        except (TypeError, ValueError):
+            return False
+        if create_time is None and update_time is None:
+            return False
+        first = create_time if create_time is not None else update_time
+        last = update_time if update_time is not None else create_time
+        if self.since is not None and last < self.since:
+            return False
+        if self.until is not None and first > self.until:
+            return False
+        return True
+
+    def check(self, raw: bytes, partial: bool = False) -> bool:
+        """
+        Check the raw JSON bytes of a conversation, counting rejections.
+
+        Args:
+            raw: JSON bytes of the conversation, or a prefix of them
+            partial: raw may be a prefix; if it is too short to decide, the
+                conversation is kept (and not counted) so it can be checked again
+                once completely read
+
+        Returns:
+            True if the conversation is (or, for a partial read, may be) selected
+        """
+        metadata, conclusive = scan_top_level(raw, self.keys)
+        if not conclusive:
+            # A prefix too short to decide, or not a well-formed object (left
+            # for decoding to report)
+            return True
+        if self.matches(metadata):
+            return True
+        self.rejected += 1
+        return False
 
 
-def process_file_patterns(patterns: List[str], out_dir: Optional[str], out_fmt: str) -> None:
+# -----------------------------------------------------------------------------
+# Incremental State Index
+# -----------------------------------------------------------------------------
+def content_hash(raw: bytes) -> str:
     """
-    Process multiple file patterns and extract conversations from matching files.
+    Hash the raw JSON bytes of a conversation.
 
     Args:
-        patterns: List of file/directory patterns to process
-        out_dir: Optional output directory for extracted files
-        out_fmt: Output format ('markdown' or 'html')
+        raw: Raw JSON bytes
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    return hashlib.sha256(raw).hexdigest()
+
+
+class StateIndex:
+    """
+    Persistent record of previous extractions, used to skip unchanged input.
+
+    Conversations are keyed by conversation id, or by input path when they have
+    none, and record per output variant (format, branch mode and output
+    directory) the update_time, the SHA-256 of the raw conversation JSON and the output path.
+    Input files are recorded by size, mtime and the hashes of the conversations
+    they held, so an unchanged file is skipped without being read at all.
+
+    Output paths are stored relative to the index file, so an archive directory
+    can be moved together with its index.
+
+    Example:
+        >>> state = StateIndex.load('out/.extract_chat_state.json')
+        >>> state.is_current(content_hash(raw), 'markdown')
+        True
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.base_dir = os.path.dirname(os.path.abspath(path))
+        self.conversations: Dict[str, Dict] = {}
+        self.files: Dict[str, Dict] = {}
+        self._hash_keys: Dict[str, str] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "StateIndex":
+        """
+        Load an index file, starting empty if it does not exist or is unreadable.
+
+        Args:
+            path: Path of the JSON index file
+
+        Returns:
+            Loaded StateIndex
+        """
+        state = cls(path)
+        if not os.path.exists(path):
+            return state
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or data.get("version") != STATE_INDEX_VERSION:
+                raise ValueError("unsupported state index format")
+        except (OSError, ValueError) as e:
+            print(f"Warning: ignoring state index {path}: {e}")
+            return state
+
+        state.conversations = data.get("conversations", {})
+        state.files = data.get("files", {})
+        for key, entry in state.conversations.items():
+            for output in entry.get("outputs", {}).values():
+                state._hash_keys[output["hash"]] = key
+        return state
+
+    def save(self) -> None:
+        """Write the index atomically next to its final location."""
+        os.makedirs(self.base_dir, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": STATE_INDEX_VERSION,
+                    "conversations": self.conversations,
+                    "files": self.files,
+                },
+                f,
+                indent=1,
+                sort_keys=True,
+            )
+        os.replace(tmp_path, self.path)
+
+    def _resolve(self, stored_path: str) -> str:
+        return os.path.normpath(os.path.join(self.base_dir, stored_path))
+
+    def relative_path(self, path: str) -> str:
+        """
+        Express a path relative to the index file, as paths are stored.
+
+        Args:
+            path: File or directory path
+
+        Returns:
+            Path relative to the directory holding the index
+        """
+        return os.path.relpath(os.path.abspath(path), self.base_dir)
+
+    def output_path(self, key: str, variant: str) -> Optional[str]:
+        """
+        Return the recorded output path of a conversation, if any.
+
+        Args:
+            key: Conversation key
+            variant: Output variant (see output_variant())
+
+        Returns:
+            Output path (resolved against the index location), or None
+        """
+        output = self.conversations.get(key, {}).get("outputs", {}).get(variant)
+        return self._resolve(output["path"]) if output else None
+
+    def is_current(self, raw_hash: str, variant: str) -> bool:
+        """
+        Check whether a conversation with this content was already extracted.
+
+        Args:
+            raw_hash: content_hash() of the raw conversation JSON
+            variant: Output variant (see output_variant())
+
+        Returns:
+            True if an output for this exact content and format still exists
+        """
+        key = self._hash_keys.get(raw_hash)
+        if key is None:
+            return False
+        output = self.conversations[key]["outputs"].get(variant)
+        return (
+            output is not None
+            and output["hash"] == raw_hash
+            and os.path.exists(self._resolve(output["path"]))
+        )
+
+    def file_unchanged(self, input_path: str, variant: str) -> bool:
+        """
+        Check whether an input file is unchanged and fully extracted.
+
+        Args:
+            input_path: Input JSON file
+            variant: Output variant (see output_variant())
+
+        Returns:
+            True if size and mtime match the last run and every conversation the
+            file held is current
+        """
+        record = self.files.get(os.path.abspath(input_path))
+        if not record:
+            return False
+        try:
+            stat = os.stat(input_path)
+        except OSError:
+            return False
+        return (
+            record["size"] == stat.st_size
+            and record["mtime_ns"] == stat.st_mtime_ns
+            and all(self.is_current(raw_hash, variant) for raw_hash in record["hashes"])
+        )
+
+    def record_file(self, input_path: str, stat: os.stat_result, hashes: List[str]) -> None:
+        """
+        Remember an input file and the conversations it held.
+
+        Args:
+            input_path: Input JSON file
+            stat: os.stat() result taken before the file was read
+            hashes: content_hash() of each conversation in the file
+        """
+        self.files[os.path.abspath(input_path)] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hashes": hashes,
+        }
+
+    def record_output(
+        self,
+        key: str,
+        variant: str,
+        raw_hash: str,
+        update_time: Optional[float],
+        out_path: str,
+        source_label: str,
+    ) -> None:
+        """
+        Remember the output written for a conversation.
+
+        Args:
+            key: Conversation key
+            variant: Output variant (see output_variant())
+            raw_hash: content_hash() of the raw conversation JSON
+            update_time: Conversation update_time
+            out_path: Path of the written output
+            source_label: Where the conversation was read from
+        """
+        entry = self.conversations.setdefault(key, {"outputs": {}})
+        entry["source"] = source_label
+        entry["outputs"][variant] = {
+            "hash": raw_hash,
+            "update_time": update_time,
+            "path": self.relative_path(out_path),
+        }
+        self._hash_keys[raw_hash] = key
+
+
+def conversation_key(result: Dict) -> str:
+    """
+    Build the state and search index key for a rendered conversation.
+
+    Args:
+        result: Result dict from render_conversation_job()
+
+    Returns:
+        The conversation id, or the absolute input path (with the array index for
+        export elements) when the conversation has no id
+    """
+    if result.get("conversation_id"):
+        return str(result["conversation_id"])
+    input_path = result["input_path"]
+    return os.path.abspath(input_path) + result["source"][len(input_path):]
+
+
+# -----------------------------------------------------------------------------
+# Search Index
+# -----------------------------------------------------------------------------
+SEARCH_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    conversation_id TEXT PRIMARY KEY,
+    title TEXT,
+    path TEXT,
+    update_time REAL,
+    first_message INTEGER,
+    last_message INTEGER
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages USING fts5(
+    text,
+    role UNINDEXED,
+    create_time UNINDEXED,
+    conversation_id UNINDEXED
+);
+"""
+
+SEARCH_QUERY = """
+SELECT c.path, c.title, m.role, m.create_time,
+       snippet(messages, 0, '[', ']', '...', 12)
+FROM messages m
+JOIN conversations c ON c.conversation_id = m.conversation_id
+WHERE messages MATCH ?
+ORDER BY m.rank
+LIMIT ?
+"""
+
+
+def message_plain_text(message_content: Dict) -> str:
+    """
+    Extract the searchable plain text of a message.
+
+    Args:
+        message_content: Message content dictionary
+
+    Returns:
+        Cleaned text of the message's string parts (or its 'text'/'result'
+        field for code, quote and browsing content), empty if there is none
+    """
+    parts = message_content.get("parts") or []
+    texts = [part for part in parts if isinstance(part, str) and part]
+    if not texts:
+        for field in ("text", "result"):
+            value = message_content.get(field)
+            if isinstance(value, str) and value:
+                texts = [value]
+                break
+    return clean_text("\n\n".join(texts)) if texts else ""
+
+
+def iter_plain_messages(
+    data: Dict,
+    branch: str = "all",
+    roles: Optional[Collection[str]] = None,
+    stats: Optional["ConversationStats"] = None,
+) -> Iterator[Tuple[str, str, Optional[float], str, str]]:
+    """
+    Yield the cleaned plain text of each message, in conversation order.
+
+    Messages are visited by iter_message_contents(), so user context messages
+    appear as system messages with the same text as in rendered output.
+
+    Args:
+        data: Parsed conversation data
+        branch: Branch mode ('all' or 'current'), as used for rendering
+        roles: Optional author roles to include, as used for rendering
+        stats: Optional statistics accumulator, updated with every message visited
+
+    Yields:
+        (message_id, role, create_time, content_type, text) for messages with
+        a role and text
+    """
+    current_node = data.get("current_node") if branch == "current" else None
+    messages = iter_message_contents(data.get("mapping") or {}, current_node, roles, stats)
+    for message_id, message_data, role, content, _ in messages:
+        text = message_plain_text(content)
+        if text:
+            content_type = content.get("content_type", "")
+            yield message_id, role, message_data.get("create_time"), content_type, text
+
+
+class SearchIndex:
+    """
+    SQLite FTS5 full-text index of extracted messages.
+
+    Conversations are written in batched transactions of INDEX_BATCH_SIZE
+    conversations. Each conversation's messages get a contiguous rowid range,
+    recorded in the conversations table, so re-indexing a conversation replaces
+    its previous messages with a rowid range delete instead of a full scan, and
+    the same index can be reused across incremental runs.
+
+    Example:
+        >>> index = SearchIndex('archive.sqlite')
+        >>> index.add_conversation('id', 'Title', 'out/chat.md', None, [('user', None, 'hello')])
+        >>> index.close()
+        >>> search_index('archive.sqlite', 'hello')[0][0]
+        'out/chat.md'
+    """
+
+    def __init__(self, path: str, batch_size: int = INDEX_BATCH_SIZE) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = 0
+        # Opened by the caller but written from the pipeline's writer thread; the
+        # connection is only ever used by one thread at a time.
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SEARCH_INDEX_SCHEMA)
+        (last_rowid,) = self.connection.execute("SELECT max(rowid) FROM messages").fetchone()
+        self.next_rowid = (last_rowid or 0) + 1
+
+    def add_conversation(
+        self,
+        key: str,
+        title: str,
+        path: str,
+        update_time: Optional[float],
+        messages: List[Tuple[str, Optional[float], str]],
+    ) -> None:
+        """
+        Index (or re-index) one conversation.
+
+        Args:
+            key: Conversation key (see conversation_key())
+            title: Conversation title
+            path: Output file the conversation was written to
+            update_time: Conversation update_time
+            messages: (role, create_time, text) tuples collected while rendering
+        """
+        cursor = self.connection.cursor()
+        previous = cursor.execute(
+            "SELECT first_message, last_message FROM conversations WHERE conversation_id = ?",
+            (key,),
+        ).fetchone()
+        if previous:
+            cursor.execute("DELETE FROM messages WHERE rowid BETWEEN ? AND ?", previous)
+
+        first_rowid = self.next_rowid
+        cursor.executemany(
+            "INSERT INTO messages (rowid, text, role, create_time, conversation_id)"
+            " VALUES (?, ?, ?, ?, ?)",
+            [
+                (first_rowid + offset, text, role, create_time, key)
+                for offset, (role, create_time, text) in enumerate(messages)
+            ],
+        )
+        self.next_rowid = first_rowid + len(messages)
+        cursor.execute(
+            "INSERT OR REPLACE INTO conversations VALUES (?, ?, ?, ?, ?, ?)",
+            (key, title, path, update_time, first_rowid, self.next_rowid - 1),
+        )
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.connection.commit()
+            self.pending = 0
+
+    def close(self) -> None:
+        """Commit the last batch and close the database."""
+        self.connection.commit()
+        self.connection.close()
+
+
+def search_index(index_path: str, query: str, limit: int = 20) -> List[Tuple]:
+    """
+    Run a full-text query against a search index.
+
+    Args:
+        index_path: SQLite index written with --index
+        query: FTS5 query (words, "phrases", prefix*, AND/OR/NOT)
+        limit: Maximum number of hits
+
+    Returns:
+        List of (path, title, role, create_time, snippet) tuples, best match first
+    """
+    connection = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True)
+    try:
+        return connection.execute(SEARCH_QUERY, (query, limit)).fetchall()
+    finally:
+        connection.close()
+
+
+def search_main(argv: List[str]) -> None:
+    """
+    Entry point of the 'search' subcommand.
+
+    Args:
+        argv: Arguments after 'search'
+    """
+    parser = argparse.ArgumentParser(
+        prog="extract-chat search",
+        description="Search messages indexed with extract-chat --index.",
+    )
+    parser.add_argument("index", help="SQLite index file")
+    parser.add_argument("query", nargs="+", help="FTS5 query")
+    parser.add_argument("-n", "--limit", type=int, default=20, help="Maximum number of hits")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.index):
+        parser.error(f"index not found: {args.index}")
+    try:
+        hits = search_index(args.index, " ".join(args.query), args.limit)
+    except sqlite3.Error as e:
+        print(f"Error searching {args.index}: {e}")
+        sys.exit(1)
+
+    for path, title, role, create_time, snippet in hits:
+        print(f"{path}\t{title}\t{role}\t{format_timestamp(create_time)}")
+        print(f"    {' '.join(snippet.split())}")
+    if not hits:
+        sys.exit(1)
+
+
+# -----------------------------------------------------------------------------
+# Conversation Statistics
+# -----------------------------------------------------------------------------
+class ConversationStats:
+    """
+    Size statistics of one conversation, accumulated while it is rendered.
+
+    Messages are counted in the same walk that renders them, from the raw
+    message parts, so collecting statistics adds a few len() and str.count()
+    calls per message instead of another pass over the export. Messages
+    without content (e.g. empty system prompts) are not counted.
+
+    Attributes:
+        messages: Number of messages with content, per author role
+        chars: Characters of message content, per author role
+        code_blocks: Code messages plus fenced code blocks in text messages
+        first_time: Earliest message timestamp (Unix seconds), if any
+        last_time: Latest message timestamp (Unix seconds), if any
+    """
+
+    def __init__(self) -> None:
+        self.messages: Dict[str, int] = {}
+        self.chars: Dict[str, int] = {}
+        self.code_blocks = 0
+        self.first_time: Optional[float] = None
+        self.last_time: Optional[float] = None
+
+    def add(self, role: str, content: Dict, create_time: Optional[float]) -> None:
+        """
+        Count one message.
+
+        Args:
+            role: Author role
+            content: Message content dictionary
+            create_time: Message create_time as found in the export
+        """
+        if content.get("content_type") == "code":
+            code = content.get("text")
+            size = len(code) if isinstance(code, str) else 0
+            code_blocks = 1 if size else 0
+        else:
+            texts = [part for part in content.get("parts") or () if isinstance(part, str)]
+            if not any(texts):
+                # Same fallback as message_plain_text() for quotes and browsing results
+                value = content.get("text") or content.get("result")
+                texts = [value] if isinstance(value, str) else []
+            size = sum(map(len, texts))
+            code_blocks = sum(text.count(CODE_FENCE) for text in texts) // 2
+        if not size:
+            return
+
+        self.messages[role] = self.messages.get(role, 0) + 1
+        self.chars[role] = self.chars.get(role, 0) + size
+        self.code_blocks += code_blocks
+        try:
+            timestamp = fix_timestamp(create_time)
+        except (TypeError, ValueError):
+            timestamp = None
+        if timestamp:
+            if self.first_time is None or timestamp < self.first_time:
+                self.first_time = timestamp
+            if self.last_time is None or timestamp > self.last_time:
+                self.last_time = timestamp
+
+    def summary(self) -> Dict:
+        """Return the statistics as a plain dict, for passing between processes."""
+        return {
+            "messages": self.messages,
+            "chars": self.chars,
+            "code_blocks": self.code_blocks,
+            "first_time": self.first_time,
+            "last_time": self.last_time,
+        }
+
+
+def stats_row(result: Dict, path: str) -> List:
+    """
+    Build the --stats table row of a written conversation.
+
+    Args:
+        result: Result dict from render_conversation_job(), with 'stats' filled in
+        path: Output file (or archive member) the conversation was written to
+
+    Returns:
+        Values in STATS_COLUMNS order; 'duration' is the time in seconds between
+        the first and last message, and 'messages' counts messages of every role
+    """
+    stats = result["stats"] or ConversationStats().summary()
+    messages, chars = stats["messages"], stats["chars"]
+    times = []
+    for key in ("create_time", "update_time"):
+        try:
+            times.append(fix_timestamp(result[key]))
+        except (TypeError, ValueError):
+            times.append(None)
+    duration = None
+    if stats["first_time"] is not None and stats["last_time"] is not None:
+        duration = round(stats["last_time"] - stats["first_time"], 3)
+    return (
+        [conversation_key(result), result["title"], *times, duration, sum(messages.values())]
+        + [messages.get(role, 0) for role in MESSAGE_ROLES]
+        + [chars.get(role, 0) for role in MESSAGE_ROLES]
+        + [stats["code_blocks"], path]
+    )
+
+
+class StatsWriter:
+    """
+    CSV table of per-conversation statistics, one row per conversation.
+
+    Rows are keyed by conversation (see conversation_key()). A conversation
+    written again, e.g. after it changed between --state runs or in a --watch
+    session, replaces its previous row instead of adding another one, and rows
+    of conversations not written in this run are kept. The table is rewritten
+    atomically on close.
+
+    Example:
+        >>> table = StatsWriter('stats.csv')
+        >>> table.add(result, 'out/chat.md')
+        >>> table.close()
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.rows: Dict[str, List] = {}
+        self.changed = False
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                reader = csv.reader(f)
+                header = next(reader, None)
+                if header is not None and tuple(header) != STATS_COLUMNS:
+                    raise ValueError("unexpected columns")
+                for row in reader:
+                    if row:
+                        self.rows[row[0]] = row
+        except (OSError, ValueError, csv.Error) as e:
+            print(f"Warning: ignoring stats table {path}: {e}")
+            self.rows.clear()
+
+    def add(self, result: Dict, path: str) -> None:
+        """
+        Add or replace the statistics of one conversation.
+
+        Args:
+            result: Result dict from render_conversation_job()
+            path: Output file (or archive member) the conversation was written to
+        """
+        row = stats_row(result, path)
+        self.rows[row[0]] = row
+        self.changed = True
+
+    def close(self) -> None:
+        """Write the table atomically if any row was added or replaced."""
+        if not self.changed:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(STATS_COLUMNS)
+            writer.writerows(self.rows.values())
+        os.replace(tmp_path, self.path)
+        self.changed = False
+
+
+# -----------------------------------------------------------------------------
+# Packed Archive
+# -----------------------------------------------------------------------------
+class ArchiveWriter:
+    """
+    Single-file zip archive of rendered conversations.
+
+    Conversations are compressed into the archive one at a time as they are
+    rendered, so no per-conversation files are left in the output directory. On
+    close an 'index.json' member is added that maps every conversation to its
+    member name, metadata and local header offset. Any conversation can then be
+    read directly through the zip central directory without unpacking the rest.
+
+    The archive is written under a temporary name and renamed into place on
+    close, so an existing archive is only replaced by a complete one.
+
+    Example:
+        >>> with zipfile.ZipFile('chats.zip') as archive:
+        ...     index = json.loads(archive.read('index.json'))
+        ...     text = archive.read(index['conversations'][0]['member'])
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.temp_path = f"{path}.tmp"
+        dir_path = os.path.dirname(path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        self.zip = zipfile.ZipFile(self.temp_path, "w", compression=zipfile.ZIP_DEFLATED)
+        self.entries: List[Dict] = []
+        self.names = {ARCHIVE_INDEX_NAME}
+
+    def allocate_name(self, base_name: str, extension: str) -> str:
+        """
+        Pick a member name that is not used in the archive yet.
+
+        Args:
+            base_name: Name from output_base_name()
+            extension: File extension
+
+        Returns:
+            'base.ext', or 'base-NN.ext' for repeated names
+        """
+        name = f"{base_name}.{extension}"
+        counter = 0
+        while name in self.names:
+            counter += 1
+            name = f"{base_name}-{counter:02d}.{extension}"
+        self.names.add(name)
+        return name
+
+    def add(
+        self,
+        result: Dict,
+        out_fmt: str,
+        errors: Optional[List[Tuple[str, str]]] = None,
+    ) -> Optional[str]:
+        """
+        Compress a rendered conversation into the archive.
+
+        Args:
+            result: Result dict from render_conversation_job()
+            out_fmt: Output format ('markdown' or 'html')
+            errors: Optional list collecting (source, message) pairs for failures
+
+        Returns:
+            Member name, or None if nothing was added
+        """
+        source_label = result["source"]
+        if result["error"]:
+            report_error(errors, source_label, result["error"])
+            return None
+        if result["temp_path"] is None:
+            return None
+
+        for blob_id, text in (result.get("blobs") or {}).items():
+            if blob_path(blob_id) not in self.names:
+                self.zip.writestr(blob_path(blob_id), text)
+                self.names.add(blob_path(blob_id))
+
+        extension = output_extension(out_fmt)
+        try:
+            base_name = output_base_name(
+                result["title"], result["create_time"], result["update_time"]
+            )
+            member = self.allocate_name(base_name, extension)
+            print(f"Processing: {source_label}")
+            print(f"Archiving: {member}")
+            self.zip.write(result["temp_path"], member)
+        except (OSError, ValueError) as e:
+            report_error(errors, source_label, f"Cannot archive {source_label}: {e}")
+            return None
+        finally:
+            discard_temp_output(result)
+
+        info = self.zip.getinfo(member)
+        self.entries.append({
+            "member": member,
+            "conversation_id": result.get("conversation_id"),
+            "title": result["title"],
+            "create_time": result["create_time"],
+            "update_time": result["update_time"],
+            "source": source_label,
+            "header_offset": info.header_offset,
+            "size": info.file_size,
+            "compressed_size": info.compress_size,
+        })
+        return member
+
+    def close(self) -> None:
+        """Write the index member and move the archive into place."""
+        self.zip.writestr(
+            ARCHIVE_INDEX_NAME,
+            json.dumps({"conversations": self.entries}, ensure_ascii=False, indent=1),
+        )
+        self.zip.close()
+        os.replace(self.temp_path, self.path)
+
+    def abort(self) -> None:
+        """Discard the incomplete archive, leaving any existing one in place."""
+        self.zip.close()
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+
+# -----------------------------------------------------------------------------
+# Extraction Driver
+# -----------------------------------------------------------------------------
+def render_conversation(
+    data: Dict,
+    out_fmt: str,
+    session: Optional[RenderSession] = None,
+    branch: str = "all",
+) -> Optional[List[str]]:
+    """
+    Render a conversation into a complete Markdown or HTML document.
+
+    Args:
+        data: Parsed conversation data
+        out_fmt: Output format ('markdown' or 'html')
+        session: Rendering session reused across conversations (defaults to the shared one)
+        branch: 'all' renders every branch of the message tree, 'current' only the
+            branch ending at the conversation's 'current_node'
+
+    Returns:
+        List of formatted lines (header, messages, footer), or None if the
+        conversation has no messages
+    """
+    if not data.get("mapping"):
+        return None
+    return list(iter_conversation(data, out_fmt, session, branch))
+
+
+def iter_conversation(
+    data: Dict,
+    out_fmt: str,
+    session: Optional[RenderSession] = None,
+    branch: str = "all",
+    blobs: Optional[BlobStore] = None,
+    roles: Optional[Collection[str]] = None,
+    stats: Optional["ConversationStats"] = None,
+    index: Optional[List[Tuple[str, Optional[float], str]]] = None,
+) -> Iterator[str]:
+    """
+    Render a conversation as a stream of document fragments.
+
+    Args:
+        data: Parsed conversation data (with a non-empty 'mapping')
+        out_fmt: Output format ('markdown' or 'html')
+        session: Rendering session reused across conversations (defaults to the shared one)
+        branch: 'all' renders every branch of the message tree, 'current' only the
+            branch ending at the conversation's 'current_node'
+        blobs: Optional blob store for deduplicating large tool payloads
+        roles: Optional author roles to render; other messages are left out
+        stats: Optional statistics accumulator, filled in while rendering
+        index: Optional list that receives the (role, create_time, text) tuples
+            to index, filled in while rendering
+
+    Yields:
+        Header, message and footer fragments, in document order; for 'jsonl',
+        one JSON line per message (see iter_jsonl_records())
+    """
+    if out_fmt == "jsonl":
+        yield from iter_jsonl_records(data, branch, roles, stats, index)
+        return
+
+    title = data.get("title", "Untitled")
+    ctime_str = format_timestamp(data.get("create_time"))
+    utime_str = format_timestamp(data.get("update_time"))
+
+    # Header
+    if out_fmt == "html":
+        yield HTML_TEMPLATE_HEADER.format(
+            title=html.escape(title),
+            start_time=html.escape(ctime_str or "Unknown"),
+            end_time=html.escape(utime_str or "Unknown"),
+        )
+    else:
+        yield f"# {title}\nStarting: {ctime_str}\nEnding: {utime_str}\n\n"
+
+    # Body
+    current_node = data.get("current_node") if branch == "current" else None
+    yield from iter_messages(
+        data.get("mapping", {}), out_fmt, session, current_node, blobs, roles, stats, index
+    )
+
+    # Footer
+    if out_fmt == "html":
+        yield HTML_TEMPLATE_FOOTER
+
+
+def iter_jsonl_records(
+    data: Dict,
+    branch: str = "all",
+    roles: Optional[Collection[str]] = None,
+    stats: Optional["ConversationStats"] = None,
+    index: Optional[List[Tuple[str, Optional[float], str]]] = None,
+) -> Iterator[str]:
+    """
+    Render a conversation as normalized JSON Lines, one record per message.
+
+    Messages come from the same walk as Markdown and HTML output
+    (iter_message_contents()) and their text is cleaned with clean_text(), so
+    downstream consumers get the same content without having to parse a
+    rendered document.
+
+    Args:
+        data: Parsed conversation data
+        branch: Branch mode ('all' or 'current')
+        roles: Optional author roles to include
+        stats: Optional statistics accumulator, filled in while rendering
+        index: Optional list that receives the (role, create_time, text) tuples
+            to index, filled in while rendering
+
+    Yields:
+        JSON lines with 'conversation_id', 'title', 'message_id', 'role',
+        'timestamp' (Unix seconds, or null), 'content_type' and 'text'
+
+    Example:
+        >>> next(iter_jsonl_records(data))
+        '{"conversation_id": "c1", "title": "Hi", "message_id": "m1", ...}\\n'
+    """
+    conversation_id = data.get("conversation_id") or data.get("id")
+    title = data.get("title", "Untitled")
+    messages = iter_plain_messages(data, branch, roles, stats)
+    for message_id, role, create_time, content_type, text in messages:
+        if index is not None:
+            index.append((role, create_time, text))
+        try:
+            timestamp = fix_timestamp(create_time)
+        except (TypeError, ValueError):
+            timestamp = None
+        yield json.dumps(
+            {
+                "conversation_id": conversation_id,
+                "title": title,
+                "message_id": message_id,
+                "role": role,
+                "timestamp": timestamp,
+                "content_type": content_type,
+                "text": text,
+            },
+            ensure_ascii=False,
+        ) + "\n"
+
+
+def output_extension(out_fmt: str, compress: bool = False) -> str:
+    """
+    Return the file extension of an output format.
+
+    Args:
+        out_fmt: Output format (one of OUTPUT_FORMATS)
+        compress: Whether the output is gzip-compressed
+
+    Returns:
+        Extension without the leading dot, e.g. 'md' or 'jsonl.gz'
+    """
+    extension = OUTPUT_EXTENSIONS.get(out_fmt, "md")
+    return f"{extension}.gz" if compress else extension
+
+
+_temp_output_counter = itertools.count()
+
+
+def write_temp_output(
+    dir_path: str, fragments: Iterable[str], compress: bool = False
+) -> str:
+    """
+    Stream document fragments into a new temporary file in the output directory.
+
+    The file is created next to its final location, so it can later be moved into
+    place with an atomic os.replace(). Nothing is left behind if writing fails.
+
+    Args:
+        dir_path: Directory the final output will be written to
+        fragments: Document fragments, written as they are produced
+        compress: Gzip-compress the file while writing it
+
+    Returns:
+        Path of the temporary file
+    """
+    dir_path = dir_path or os.curdir
+    os.makedirs(dir_path, exist_ok=True)
+    while True:
+        temp_path = os.path.join(
+            dir_path,
+            f"{TEMP_OUTPUT_PREFIX}{os.getpid()}-{next(_temp_output_counter)}.tmp",
+        )
+        try:
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            break
+        except FileExistsError:
+            continue
+
+    try:
+        if compress:
+            with open(fd, "wb") as raw, gzip.GzipFile(
+                fileobj=raw, mode="wb", compresslevel=GZIP_LEVEL, mtime=0
+            ) as compressed, io.TextIOWrapper(
+                io.BufferedWriter(compressed, OUTPUT_BUFFER_SIZE), encoding="utf-8"
+            ) as f:
+                for fragment in fragments:
+                    f.write(fragment)
+        else:
+            with open(fd, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE) as f:
+                for fragment in fragments:
+                    f.write(fragment)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return temp_path
+
+
+def discard_temp_output(result: Dict) -> None:
+    """Remove the temporary output of a result that will not be moved into place."""
+    temp_path = result.get("temp_path")
+    if temp_path and os.path.exists(temp_path):
+        os.remove(temp_path)
+
+
+def render_conversation_job(job: Dict) -> Dict:
+    """
+    Decode a conversation and stream its rendering into a temporary file.
+
+    This is the unit of work handed to worker processes, so it takes and returns
+    plain picklable data and never raises: failures are returned in 'error'.
+    Workers render straight to disk; the calling process only allocates the
+    final name and renames the temporary file.
+
+    Args:
+        job: Dict with the source label ('source'), input path ('input_path'),
+            raw JSON bytes ('raw'), output format ('format'), output directory
+            ('out_dir', None for the input file's directory) and optionally the
+            branch mode ('branch', default 'all'), content hash ('content_hash'),
+            whether to collect messages for the search index ('index'),
+            whether to deduplicate large tool payloads ('dedup'), the author
+            roles to render ('roles', None for all), whether to gzip the
+            output ('compress') and whether to collect statistics ('stats')
+
+    Returns:
+        Dict with the source label, input path, content hash, conversation
+        metadata, the temporary output path (None if there was nothing to
+        render), the messages to index (None unless requested), the blobs this
+        process had not sent before (None unless deduplicating), the
+        conversation statistics (None unless requested) and an error message
+        (None on success)
+    """
+    source_label = job["source"]
+    result: Dict = {
+        "source": source_label,
+        "input_path": job["input_path"],
+        "content_hash": job.get("content_hash"),
+        "conversation_id": None,
+        "title": "Untitled",
+        "create_time": None,
+        "update_time": None,
+        "temp_path": None,
+        "messages": None,
+        "blobs": None,
+        "stats": None,
+        "error": None,
+    }
+    blobs: Optional[BlobStore] = None
+    try:
+        session = get_render_session()
+        data = parse_conversation(source_label, job["raw"])
+        result["conversation_id"] = data.get("conversation_id") or data.get("id")
+        result["title"] = data.get("title", "Untitled")
+        result["create_time"] = data.get("create_time")
+        result["update_time"] = data.get("update_time")
+        if data.get("mapping"):
+            dir_path = job.get("out_dir") or os.path.dirname(job["input_path"])
+            if job.get("dedup"):
+                blobs = session.blob_store
+                blobs.begin(dir_path)
+            stats = ConversationStats() if job.get("stats") else None
+            index: Optional[List[Tuple[str, Optional[float], str]]] = [] if job.get("index") else None
+            result["temp_path"] = write_temp_output(
+                dir_path,
+                iter_conversation(
+                    data, job["format"], session, job.get("branch", "all"), blobs,
+                    job.get("roles"), stats, index,
+                ),
+                job.get("compress", False),
+            )
+            if blobs is not None:
+                result["blobs"] = blobs.take_new()
+            if stats is not None:
+                result["stats"] = stats.summary()
+            result["messages"] = index
+    except ValueError as e:
+        result["error"] = str(e)
+    except OSError as e:
+        result["error"] = f"Error writing output for {source_label}: {e}"
+    except Exception as e:
+        result["error"] = f"Error rendering {source_label}: {e}"
+    if result["error"] and blobs is not None:
+        blobs.discard_new()
+    return result
+
+
+def write_blobs(
+    dir_path: str,
+    result: Dict,
+    errors: Optional[List[Tuple[str, str]]] = None,
+) -> None:
+    """
+    Store the blobs first rendered with a conversation under BLOB_DIR.
+
+    Blobs already on disk (from another worker or an earlier run) are left alone.
+
+    Args:
+        dir_path: Output directory of the conversation
+        result: Result dict from render_conversation_job()
+        errors: Optional list collecting (source, message) pairs for failures
+    """
+    for blob_id, text in (result.get("blobs") or {}).items():
+        path = os.path.join(dir_path or os.curdir, blob_path(blob_id))
+        if os.path.exists(path):
+            continue
+        try:
+            os.replace(write_temp_output(os.path.dirname(path), [text]), path)
+        except OSError as err:
+            report_error(errors, result["source"], f"Error writing {path}: {err}")
+
+
+def write_conversation_result(
+    result: Dict,
+    out_dir: Optional[str],
+    out_fmt: str,
+    errors: Optional[List[Tuple[str, str]]] = None,
+    previous_path: Optional[str] = None,
+    allocator: Optional[FilenameAllocator] = None,
+    compress: bool = False,
+) -> Optional[str]:
+    """
+    Move a rendered conversation into place under a unique output name.
+
+    Output names are allocated here, in the calling process and in input order,
+    so parallel runs produce the same names as sequential ones. The rendered
+    temporary file is moved to the final name in one step, so readers never see
+    a partially written output, and never over an existing file.
+
+    Args:
+        result: Result dict from render_conversation_job()
+        out_dir: Optional output directory (defaults to the input file's directory)
+        out_fmt: Output format ('markdown' or 'html')
+        errors: Optional list collecting (source, message) pairs for failures
+        previous_path: Output written for this conversation by an earlier run.
+            It is overwritten in place when the name still fits the conversation
+            and removed after writing when the title or timestamps changed.
+        allocator: Filename allocator shared by all outputs of a run, so each
+            output directory is listed only once (a new one by default)
+        compress: Whether the output was gzip-compressed (adds '.gz' to its name)
+
+    Returns:
+        Path of the written file, or None if nothing was written
+    """
+    allocator = allocator if allocator is not None else FilenameAllocator()
+    source_label = result["source"]
+    if result["error"]:
+        report_error(errors, source_label, result["error"])
+        return None
+    if result["temp_path"] is None:
+        return None
+
+    # Use the same logic for generating the name, but with the output's extension
+    extension = output_extension(out_fmt, compress)
+    dir_path = out_dir if out_dir else os.path.dirname(result["input_path"])
+    write_blobs(dir_path, result, errors)
+    try:
+        base_name = output_base_name(
+            result["title"], result["create_time"], result["update_time"]
+        )
+    except ValueError as e:
+        discard_temp_output(result)
+        report_error(errors, source_label, f"Cannot generate filename for {source_label}: {e}")
+        return None
+
+    print(f"Processing: {source_label}")
+    replace_previous = bool(
+        previous_path
+        and os.path.exists(previous_path)
+        and is_output_name_for(previous_path, dir_path, base_name, extension)
+    )
+    # Named in errors; the allocator may still add a -NN suffix
+    target = (
+        previous_path if replace_previous else os.path.join(dir_path, f"{base_name}.{extension}")
+    )
+    try:
+        if replace_previous:
+            os.replace(result["temp_path"], target)
+            out_path = target
+        else:
+            out_path = allocator.create(
+                dir_path, base_name, extension, source_path=result["temp_path"]
+            )
+    except OSError as err:
+        discard_temp_output(result)
+        report_error(errors, source_label, f"Error writing {target}: {err}")
+        return None
+    print(f"Writing to: {out_path}")
+
+    if previous_path and previous_path != out_path and os.path.exists(previous_path):
+        print(f"Replacing: {previous_path}")
+        os.remove(previous_path)
+        allocator.release(previous_path)
+    return out_path
+
+
+def ordered_pool_map(func, items: Iterable, jobs: int) -> Iterator:
+    """
+    Map a function over items in a process pool, yielding results in input order.
+
+    At most a few items per worker are in flight at once, so a streamed export is
+    never read much further ahead than the workers can render it.
+
+    Args:
+        func: Picklable, module-level function to apply
+        items: Iterable of picklable work items
+        jobs: Number of worker processes
+
+    Yields:
+        func(item) for each item, in the order the items were produced
+    """
+    max_in_flight = jobs * 4
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending: Deque[Future] = deque()
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def iter_in_thread(items: Iterable, maxsize: int = PIPELINE_QUEUE_SIZE) -> Iterator:
+    """
+    Iterate over items produced by a background thread.
+
+    The producer runs at most maxsize items ahead of the consumer, so reading the
+    next input overlaps with rendering the current one without buffering whole
+    exports. Exceptions raised by the producer are re-raised in the consumer.
+    Closing the returned generator stops the producer and waits for it to exit.
+
+    Args:
+        items: Iterable to consume in the background thread
+        maxsize: Maximum number of items buffered between the threads
+
+    Yields:
+        The items, in order
+    """
+    handoff: "queue.Queue[Tuple[bool, object]]" = queue.Queue(maxsize)
+    stopped = threading.Event()
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if stopped.is_set():
+                    return
+                handoff.put((True, item))
+        except BaseException as e:  # pylint: disable=broad-except
+            handoff.put((False, e))
+            return
+        handoff.put((False, None))
+
+    producer = threading.Thread(target=produce, name="extract_chat-read", daemon=True)
+    producer.start()
+    try:
+        while True:
+            is_item, value = handoff.get()
+            if is_item:
+                yield value
+            elif value is not None:
+                raise value
+            else:
+                return
+    finally:
+        stopped.set()
+        # Unblock a producer waiting on a full queue so it can see the stop flag
+        while producer.is_alive():
+            try:
+                handoff.get(timeout=0.05)
+            except queue.Empty:
+                pass
+
+
+def consume_in_thread(func, items: Iterable, maxsize: int = PIPELINE_QUEUE_SIZE) -> None:
+    """
+    Apply func to each item in a background thread, in order.
+
+    Items are handed over through a bounded queue, so the caller can render the
+    next conversation while the previous one is being written. The first
+    exception raised by func stops the pipeline and is re-raised here once the
+    background thread has exited.
+
+    Args:
+        func: Function called with each item
+        items: Iterable of items, consumed in the calling thread
+        maxsize: Maximum number of items buffered between the threads
+    """
+    handoff: "queue.Queue[Tuple[bool, object]]" = queue.Queue(maxsize)
+    failures: List[BaseException] = []
+
+    def consume() -> None:
+        while True:
+            is_item, item = handoff.get()
+            if not is_item:
+                return
+            if failures:
+                continue  # Keep draining so the caller never blocks on a full queue
+            try:
+                func(item)
+            except BaseException as e:  # pylint: disable=broad-except
+                failures.append(e)
+
+    consumer = threading.Thread(target=consume, name="extract_chat-write", daemon=True)
+    consumer.start()
+    try:
+        for item in items:
+            if failures:
+                break
+            handoff.put((True, item))
+    finally:
+        handoff.put((False, None))
+        consumer.join()
+    if failures:
+        raise failures[0]
+
+
+def extract_one_file(
+    input_path: str,
+    out_dir: Optional[str],
+    out_fmt: str,
+    errors: Optional[List[Tuple[str, str]]] = None,
+    branch: str = "all",
+) -> None:
+    """
+    Extract every conversation in a JSON file into Markdown or HTML files.
+
+    Args:
+        input_path: Path to the JSON file (a single conversation or an export array)
+        out_dir: Optional output directory
+        out_fmt: Output format ('markdown' or 'html')
+        errors: Optional list collecting (source, message) pairs for failures
+        branch: Branch mode ('all' or 'current')
+
+    Conversations are extracted one at a time as they are read and rendered
+    straight to disk, so neither a monolithic export nor a rendered document ever
+    has to be held in memory as a whole.
+    """
+    allocator = FilenameAllocator()
+    for source_label, raw in iter_raw_conversations(input_path, errors):
+        job = {
+            "source": source_label,
+            "input_path": input_path,
+            "raw": raw,
+            "format": out_fmt,
+            "out_dir": out_dir,
+            "branch": branch,
+        }
+        write_conversation_result(
+            render_conversation_job(job), out_dir, out_fmt, errors, allocator=allocator
+        )
+
+
+def collect_input_files(patterns: List[str]) -> List[str]:
+    """
+    Expand file/directory patterns into the list of JSON files to process.
+
+    Args:
+        patterns: List of file/directory patterns
+
+    Returns:
+        Matching .json files, in pattern order
 
     For each pattern:
-    - If it's a directory, process all .json files in it
-    - If it's a file pattern, process all matching files
+    - If it's a directory, use all .json files in it
+    - If it's a file pattern, use all matching files
     - Skip non-JSON files
     """
     all_files: List[str] = []
@@ -1035,9 +3115,566 @@ def process_file_patterns(patterns: List[str], out_dir: Optional[str], out_fmt:
                 print(f"No files match: {pat}")
             all_files.extend(matched)
 
-    for f in all_files:
-        if os.path.isfile(f) and f.lower().endswith(".json"):
-            extract_one_file(f, out_dir, out_fmt)
+    return [f for f in all_files if os.path.isfile(f) and f.lower().endswith(".json")]
+
+
+def print_error_summary(errors: List[Tuple[str, str]]) -> None:
+    """
+    Print every error collected during a run in one block.
+
+    Args:
+        errors: List of (source, message) pairs
+    """
+    if not errors:
+        return
+    print(f"\n{len(errors)} error(s) during extraction:")
+    for _, message in errors:
+        print(f"  {message}")
+
+
+def output_variant(
+    out_fmt: str,
+    branch: str,
+    roles: Optional[Collection[str]] = None,
+    compress: bool = False,
+    out_dir: Optional[str] = None,
+) -> str:
+    """
+    Name the kind of output a run produces, as recorded in the state index.
+
+    Outputs written to another directory are a separate variant, so changing
+    the output directory while keeping the same state index extracts every
+    conversation again instead of treating the old directory's files as current.
+
+    Args:
+        out_fmt: Output format (one of OUTPUT_FORMATS)
+        branch: Branch mode ('all' or 'current')
+        roles: Optional author roles rendered
+        compress: Whether outputs are gzip-compressed
+        out_dir: Output directory relative to the state index (see
+            StateIndex.relative_path()), or None when outputs are written next
+            to their input files
+
+    Returns:
+        The format for uncompressed full-tree output of all roles next to the
+        inputs, otherwise the format with '.gz', ':branch', ':roles=a,b' and/or
+        ':dir=DIR' appended
+    """
+    variant = f"{out_fmt}.gz" if compress else out_fmt
+    if branch != "all":
+        variant += f":{branch}"
+    if roles is not None:
+        variant += ":roles=" + ",".join(sorted(roles))
+    if out_dir is not None:
+        variant += f":dir={out_dir}"
+    return variant
+
+
+def iter_work_items(
+    input_files: List[str],
+    job_options: Dict,
+    errors: List[Tuple[str, str]],
+    state: Optional[StateIndex] = None,
+    counts: Optional[Dict[str, int]] = None,
+    selector: Optional["ConversationFilter"] = None,
+) -> Iterator[Dict]:
+    """
+    Read input files and yield one render job per conversation.
+
+    With a state index, unchanged files are skipped without being read and
+    conversations whose exact content already has an output are skipped before
+    they are decoded. Conversations rejected by the selector are dropped before
+    they are decoded too.
+
+    Args:
+        input_files: JSON files to read
+        job_options: Settings shared by every job ('format', 'out_dir', 'branch',
+            'index', 'dedup' and 'roles'; see render_conversation_job())
+        errors: List collecting (source, message) pairs for failures
+        state: Optional state index for incremental runs
+        counts: Optional dict whose 'unchanged' counter is incremented per skip
+        selector: Optional filter on conversation metadata
+
+    Yields:
+        Job dicts for render_conversation_job()
+    """
+    counts = counts if counts is not None else {}
+    out_dir = job_options.get("out_dir")
+    variant = output_variant(
+        job_options["format"],
+        job_options.get("branch", "all"),
+        job_options.get("roles"),
+        job_options.get("compress", False),
+        state.relative_path(out_dir) if state is not None and out_dir else None,
+    )
+    for input_path in input_files:
+        if state is None:
+            for source_label, raw in iter_raw_conversations(input_path, errors, selector):
+                yield dict(job_options, source=source_label, input_path=input_path, raw=raw)
+            continue
+
+        if state.file_unchanged(input_path, variant):
+            counts["unchanged"] = counts.get("unchanged", 0) + len(
+                state.files[os.path.abspath(input_path)]["hashes"]
+            )
+            continue
+
+        try:
+            stat = os.stat(input_path)
+        except OSError as e:
+            report_error(errors, input_path, f"Error reading JSON from {input_path}: {e}")
+            continue
+        hashes: List[str] = []
+        for source_label, raw in iter_raw_conversations(input_path, errors, selector):
+            raw_hash = content_hash(raw)
+            hashes.append(raw_hash)
+            if state.is_current(raw_hash, variant):
+                counts["unchanged"] = counts.get("unchanged", 0) + 1
+                continue
+            yield dict(
+                job_options,
+                source=source_label,
+                input_path=input_path,
+                raw=raw,
+                content_hash=raw_hash,
+            )
+        # A filtered run has not rendered every conversation of the file, so
+        # the file must not be skipped as a whole by later runs
+        if selector is None:
+            state.record_file(input_path, stat, hashes)
+
+
+def process_file_patterns(
+    patterns: List[str],
+    out_dir: Optional[str],
+    out_fmt: str,
+    jobs: int = 1,
+    state_path: Optional[str] = None,
+    branch: str = "all",
+    index_path: Optional[str] = None,
+    archive_path: Optional[str] = None,
+    dedup: bool = False,
+    selector: Optional["ConversationFilter"] = None,
+    roles: Optional[Collection[str]] = None,
+    compress: bool = False,
+    stats_path: Optional[str] = None,
+) -> List[Tuple[str, str]]:
+    """
+    Process multiple file patterns and extract conversations from matching files.
+
+    Args:
+        patterns: List of file/directory patterns to process
+        out_dir: Optional output directory for extracted files
+        out_fmt: Output format ('markdown' or 'html')
+        jobs: Number of worker processes used for rendering (1 renders in-process)
+        state_path: Optional state index file; when given, only new or changed
+            conversations are rendered and their previous output is replaced
+        branch: 'all' renders every branch of each conversation, 'current' only
+            the branch ending at its 'current_node'
+        index_path: Optional SQLite file; every written conversation's messages
+            are added to its FTS5 search index
+        archive_path: Optional zip file; when given, conversations are packed
+            into it instead of being written as separate files (cannot be
+            combined with state_path)
+        dedup: Store large tool payloads once under '_blobs/' and link to them
+            from every conversation that repeats them
+        selector: Optional filter on conversation metadata (dates, title);
+            conversations that do not match are skipped before being decoded
+        roles: Optional author roles to render; other messages are left out
+        compress: Gzip-compress every output file (not with archive_path)
+        stats_path: Optional CSV file; every written conversation's row of
+            statistics is added to it, replacing its previous row
+
+    Returns:
+        List of (source, message) pairs for every conversation that failed
+
+    Files are read in a background thread; each conversation (a whole file, or one
+    element of a streamed export array) is rendered as a separate unit of work, and
+    the rendered outputs are moved into place by a second background thread. The
+    stages are connected by bounded queues, so disk latency is hidden behind
+    rendering without reading far ahead of it.
+    """
+    errors: List[Tuple[str, str]] = []
+    counts: Dict[str, int] = {}
+    state = StateIndex.load(state_path) if state_path else None
+    search = SearchIndex(index_path) if index_path else None
+    stats = StatsWriter(stats_path) if stats_path else None
+    archive = ArchiveWriter(archive_path) if archive_path else None
+    if archive is not None:
+        # Rendered conversations are staged next to the archive
+        out_dir = os.path.dirname(archive_path) or os.curdir
+
+    input_files = collect_input_files(patterns)
+    if state_path:
+        input_files = [
+            f for f in input_files if os.path.abspath(f) != os.path.abspath(state_path)
+        ]
+    roles = tuple(sorted(roles)) if roles is not None else None
+    variant = output_variant(
+        out_fmt, branch, roles, compress,
+        state.relative_path(out_dir) if state is not None and out_dir else None,
+    )
+    allocator = FilenameAllocator()
+    job_options = {
+        "format": out_fmt,
+        "out_dir": out_dir,
+        "branch": branch,
+        "index": search is not None,
+        "dedup": dedup,
+        "roles": roles,
+        "compress": compress,
+        "stats": stats is not None,
+    }
+    rejected_before = selector.rejected if selector is not None else 0
+    # Reading, rendering and writing run as a pipeline: the inputs are read and
+    # split in one thread and the results finalized in another, while rendering
+    # runs in this thread or the worker pool.
+    work_items = iter_in_thread(
+        iter_work_items(input_files, job_options, errors, state, counts, selector)
+    )
+
+    if jobs > 1:
+        results = ordered_pool_map(render_conversation_job, work_items, jobs)
+    else:
+        results = map(render_conversation_job, work_items)
+
+    def finalize(result: Dict) -> None:
+        if archive is not None:
+            member = archive.add(result, out_fmt, errors)
+            if search is not None and member:
+                search.add_conversation(
+                    conversation_key(result),
+                    result["title"],
+                    os.path.join(archive_path, member),
+                    result["update_time"],
+                    result["messages"] or [],
+                )
+            if stats is not None and member:
+                stats.add(result, os.path.join(archive_path, member))
+            return
+
+        previous_path = None
+        if state is not None:
+            key = conversation_key(result)
+            previous_path = state.output_path(key, variant)
+        out_path = write_conversation_result(
+            result, out_dir, out_fmt, errors, previous_path, allocator, compress
+        )
+        if state is not None and out_path:
+            state.record_output(
+                key,
+                variant,
+                result["content_hash"],
+                result["update_time"],
+                out_path,
+                result["source"],
+            )
+        if search is not None and out_path:
+            search.add_conversation(
+                conversation_key(result),
+                result["title"],
+                out_path,
+                result["update_time"],
+                result["messages"] or [],
+            )
+        if stats is not None and out_path:
+            stats.add(result, out_path)
+
+    try:
+        consume_in_thread(finalize, results)
+    except BaseException:
+        # A failed or interrupted run must not replace an existing archive
+        if archive is not None:
+            archive.abort()
+        raise
+    else:
+        if archive is not None:
+            archive.close()
+    finally:
+        work_items.close()
+        if state is not None:
+            state.save()
+        if search is not None:
+            search.close()
+        if stats is not None:
+            stats.close()
+
+    if counts.get("unchanged"):
+        print(f"Skipped {counts['unchanged']} unchanged conversation(s).")
+    if selector is not None and selector.rejected > rejected_before:
+        print(f"Skipped {selector.rejected - rejected_before} conversation(s) not matching the filters.")
+    print_error_summary(errors)
+    return errors
+
+
+# -----------------------------------------------------------------------------
+# Watch Mode
+# -----------------------------------------------------------------------------
+# inotify(7) event flags
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """
+    Detect new and changed files in a directory by comparing periodic scans.
+
+    Each scan is a single os.scandir() pass; a file counts as changed when its
+    size or modification time differs from the previous scan.
+    """
+
+    def __init__(self, dir_path: str, interval: float = WATCH_POLL_INTERVAL) -> None:
+        self.dir_path = dir_path
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self) -> Dict[str, Tuple[int, int]]:
+        """Return the (mtime_ns, size) of every regular file in the directory."""
+        snapshot = {}
+        try:
+            with os.scandir(self.dir_path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                    except OSError:
+                        continue  # Removed while scanning
+        except OSError as e:
+            print(f"Warning: cannot scan {self.dir_path}: {e}")
+        return snapshot
+
+    def changes(self, timeout: float) -> List[str]:
+        """
+        Wait up to timeout seconds and return the files changed since the last call.
+
+        Args:
+            timeout: Maximum time to wait, in seconds
+
+        Returns:
+            Paths of new or modified files
+        """
+        time.sleep(min(timeout, self.interval))
+        snapshot = self.scan()
+        changed = [path for path, sig in snapshot.items() if self.snapshot.get(path) != sig]
+        self.snapshot = snapshot
+        return changed
+
+    def close(self) -> None:
+        """Release the watcher (nothing to do when polling)."""
+
+
+class InotifyWatcher:
+    """
+    Detect new and changed files in a directory with Linux inotify, via ctypes.
+
+    Raises:
+        OSError: If inotify is not available or the directory cannot be watched
+    """
+
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self, dir_path: str) -> None:
+        self.dir_path = dir_path
+        libc_name = ctypes.util.find_library("c")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        try:
+            inotify_init1 = libc.inotify_init1
+            inotify_add_watch = libc.inotify_add_watch
+        except AttributeError as e:
+            raise OSError("inotify is not available") from e
+        self.fd = inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        if inotify_add_watch(self.fd, os.fsencode(dir_path), self.MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"{os.strerror(errno)}: {dir_path}")
+
+    def changes(self, timeout: float) -> List[str]:
+        """
+        Wait up to timeout seconds for events and return the files they name.
+
+        A queue overflow reports every file in the directory, so nothing is missed.
+
+        Args:
+            timeout: Maximum time to wait, in seconds
+
+        Returns:
+            Paths of created, modified or moved-in files
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            buffer = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return []
+        changed = []
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(buffer):
+            _, mask, _, name_length = INOTIFY_EVENT.unpack_from(buffer, offset)
+            offset += INOTIFY_EVENT.size
+            name = buffer[offset:offset + name_length].rstrip(b"\0")
+            offset += name_length
+            if mask & IN_Q_OVERFLOW:
+                changed.extend(PollingWatcher(self.dir_path).snapshot)
+            elif name:
+                changed.append(os.path.join(self.dir_path, os.fsdecode(name)))
+        return changed
+
+    def close(self) -> None:
+        """Stop watching and close the inotify descriptor."""
+        os.close(self.fd)
+
+
+def open_watcher(dir_path: str, poll: bool = False):
+    """
+    Watch a directory with inotify where available, falling back to polling.
+
+    Args:
+        dir_path: Directory to watch
+        poll: Always use polling (e.g. for network filesystems, where inotify
+            does not see changes made by other hosts)
+
+    Returns:
+        An InotifyWatcher or PollingWatcher
+    """
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(dir_path)
+        except OSError as e:
+            print(f"Warning: inotify unavailable ({e}); polling {dir_path} instead.")
+    return PollingWatcher(dir_path)
+
+
+def is_watched_input(path: str, ignored: Iterable[str] = ()) -> bool:
+    """
+    Check whether a changed path in a watched directory is an export to extract.
+
+    Hidden files (temporary files of writers, the state index) are ignored.
+
+    Args:
+        path: Changed path
+        ignored: Absolute paths to ignore
+
+    Returns:
+        True for visible .json files
+    """
+    name = os.path.basename(path)
+    return (
+        name.lower().endswith(".json")
+        and not name.startswith(".")
+        and os.path.abspath(path) not in ignored
+    )
+
+
+def watch_directory(
+    dir_path: str,
+    out_dir: Optional[str],
+    out_fmt: str,
+    jobs: int = 1,
+    state_path: Optional[str] = None,
+    branch: str = "all",
+    index_path: Optional[str] = None,
+    dedup: bool = False,
+    poll: bool = False,
+    debounce: float = WATCH_DEBOUNCE,
+    retry_delay: float = WATCH_RETRY_DELAY,
+    stop: Optional[threading.Event] = None,
+    selector: Optional[ConversationFilter] = None,
+    roles: Optional[Collection[str]] = None,
+    compress: bool = False,
+    stats_path: Optional[str] = None,
+) -> None:
+    """
+    Extract the .json files in a directory, then keep extracting new or changed ones.
+
+    A file is extracted once it has not changed for `debounce` seconds, so files
+    that are still being copied in are not read half-written. Extraction always
+    uses a state index (by default in the output directory), so only the
+    conversations that are new or changed in a modified export are re-rendered.
+    An extraction that fails as a whole (e.g. the search index is locked or the
+    disk is full) is reported and its files are retried after `retry_delay`
+    seconds; only Ctrl-C or `stop` end the loop.
+
+    Args:
+        dir_path: Directory to watch (not recursive)
+        out_dir: Output directory (the watched directory if None)
+        out_fmt: Output format ('markdown' or 'html')
+        jobs: Number of rendering worker processes
+        state_path: State index file (default: WATCH_STATE_NAME in the output directory)
+        branch: Branch mode ('all' or 'current')
+        index_path: Optional SQLite search index to update
+        dedup: Store large repeated tool payloads once
+        poll: Poll instead of using inotify
+        debounce: Seconds a file must be quiet before it is extracted
+        retry_delay: Seconds before the files of a failed extraction are retried
+        stop: Optional event that ends the loop when set
+        selector: Optional filter on conversation metadata
+        roles: Optional author roles to render
+        compress: Gzip-compress every output file
+        stats_path: Optional CSV file of conversation statistics to update
+    """
+    stop = stop if stop is not None else threading.Event()
+    state_path = state_path or os.path.join(out_dir or dir_path, WATCH_STATE_NAME)
+    ignored = {os.path.abspath(state_path)}
+    if index_path:
+        ignored.add(os.path.abspath(index_path))
+
+    pending: Dict[str, float] = {}  # Path -> time of its last change
+
+    def extract(paths: List[str]) -> None:
+        try:
+            # The paths are literal, so keep glob from reading [, * and ? in their names
+            process_file_patterns(
+                [glob.escape(path) for path in paths], out_dir, out_fmt, jobs,
+                state_path=state_path, branch=branch, index_path=index_path, dedup=dedup,
+                selector=selector, roles=roles, compress=compress, stats_path=stats_path,
+            )
+        except Exception as e:
+            print(
+                f"Warning: extracting {len(paths)} file(s) failed ({e}); "
+                f"retrying in {retry_delay:g}s"
+            )
+            # Dated into the future, so the files become ready after the delay
+            retry_at = time.monotonic() + retry_delay - debounce
+            for path in paths:
+                pending.setdefault(path, retry_at)
+
+    # Start watching before the initial pass, so files dropped during it are seen
+    watcher = open_watcher(dir_path, poll)
+    try:
+        existing = sorted(
+            entry.path for entry in os.scandir(dir_path)
+            if entry.is_file() and is_watched_input(entry.path, ignored)
+        )
+        if existing:
+            extract(existing)
+        print(f"Watching {dir_path} for new or changed .json files (Ctrl-C to stop)")
+
+        while not stop.is_set():
+            timeout = min(debounce, WATCH_POLL_INTERVAL) if pending else WATCH_POLL_INTERVAL
+            changes = watcher.changes(timeout)
+            now = time.monotonic()
+            for path in changes:
+                if is_watched_input(path, ignored):
+                    pending[path] = now
+            ready = sorted(path for path, changed in pending.items() if now - changed >= debounce)
+            for path in ready:
+                del pending[path]
+            ready = [path for path in ready if os.path.isfile(path)]
+            if ready:
+                extract(ready)
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+    finally:
+        watcher.close()
 
 
 def main():
@@ -1047,15 +3684,145 @@ def main():
     Parses command line arguments and processes the specified files:
     - Takes one or more file patterns as input
     - Optional output directory
-    - Optional output format (markdown or html)
+    - Optional output format (markdown, html or jsonl) and gzip compression
+    - Optional number of rendering worker processes
+    - Optional state index for incremental runs
+    - Optional branch mode (all branches, or only the current one)
+    - Optional SQLite full-text search index
+    - Optional packed zip archive instead of one file per conversation
+    - Optional deduplication of large tool payloads
+    - Optional watch mode extracting new or changed exports as they appear
+    - Optional filters on conversation dates and titles, and on message roles
+
+    'extract-chat search INDEX QUERY' searches an index instead (see search_main()).
     """
+    if sys.argv[1:2] == ["search"]:
+        search_main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(description="Extract conversation logs to Markdown/HTML.")
-    parser.add_argument("patterns", nargs="+", help="File patterns for JSON input")
+    parser.add_argument("patterns", nargs="*", help="File patterns for JSON input")
     parser.add_argument("-o", "--output-dir", help="Output directory")
-    parser.add_argument("-f", "--format", choices=["markdown", "html"], default="markdown", help="Output format")
+    parser.add_argument(
+        "-f", "--format", choices=OUTPUT_FORMATS, default="markdown",
+        help="Output format (jsonl: one normalized JSON record per message)"
+    )
+    parser.add_argument(
+        "-z", "--gzip", action="store_true",
+        help="Gzip-compress each output file (adds .gz to its name)"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="Number of worker processes used for rendering (0 = one per CPU)"
+    )
+    parser.add_argument(
+        "-s", "--state",
+        help="State index file for incremental runs; only new or changed conversations are re-rendered"
+    )
+    parser.add_argument(
+        "-b", "--branch", choices=BRANCH_MODES, default="all",
+        help="Render every branch of edited/regenerated conversations, or only the current one"
+    )
+    parser.add_argument(
+        "-x", "--index",
+        help="SQLite file to add extracted messages to, for 'extract-chat search'"
+    )
+    parser.add_argument(
+        "--stats", metavar="FILE",
+        help="Keep a CSV row of statistics (message counts, characters per role, code blocks, duration) "
+        "for every written conversation in FILE, replacing the row of a conversation written again"
+    )
+    parser.add_argument(
+        "-a", "--archive",
+        help="Pack all conversations into this zip file (with an index.json member) instead of separate files"
+    )
+    parser.add_argument(
+        "--dedup-tool-output", action="store_true",
+        help=f"Store tool payloads of {BLOB_MIN_SIZE}+ characters once under {BLOB_DIR}/ and link to them"
+    )
+    parser.add_argument(
+        "-w", "--watch", metavar="DIR",
+        help="Extract the .json files in DIR, then keep extracting new or changed ones until interrupted"
+    )
+    parser.add_argument(
+        "--poll", action="store_true",
+        help="With --watch, poll the directory instead of using inotify (e.g. on network filesystems)"
+    )
+    parser.add_argument(
+        "--since", type=parse_date_option, metavar="DATE",
+        help="Only conversations updated on or after DATE (YYYY-MM-DD or YYYY-MM-DDTHH:MM)"
+    )
+    parser.add_argument(
+        "--until", type=lambda value: parse_date_option(value, end_of_day=True), metavar="DATE",
+        help="Only conversations created on or before DATE (YYYY-MM-DD or YYYY-MM-DDTHH:MM)"
+    )
+    parser.add_argument(
+        "--title-regex", metavar="REGEX",
+        help="Only conversations whose title matches REGEX (Python syntax, unanchored)"
+    )
+    parser.add_argument(
+        "--roles", type=parse_roles_option,
+        help=f"Only render messages from these comma-separated roles ({','.join(MESSAGE_ROLES)})"
+    )
     args = parser.parse_args()
 
-    process_file_patterns(args.patterns, args.output_dir, args.format)
+    if args.jobs < 0:
+        parser.error("--jobs must be zero or a positive integer")
+    jobs = args.jobs or os.cpu_count() or 1
+    if args.archive and args.state:
+        parser.error("--archive cannot be combined with --state")
+    if args.archive and args.gzip:
+        parser.error("--archive is already compressed; it cannot be combined with --gzip")
+    if args.title_regex:
+        try:
+            re.compile(args.title_regex)
+        except re.error as e:
+            parser.error(f"invalid --title-regex: {e}")
+    selector = None
+    if args.since is not None or args.until is not None or args.title_regex:
+        selector = ConversationFilter(args.since, args.until, args.title_regex)
+
+    if args.watch:
+        if args.patterns or args.archive:
+            parser.error("--watch cannot be combined with file patterns or --archive")
+        if not os.path.isdir(args.watch):
+            parser.error(f"--watch: {args.watch} is not a directory")
+        watch_directory(
+            args.watch,
+            args.output_dir,
+            args.format,
+            jobs,
+            state_path=args.state,
+            branch=args.branch,
+            index_path=args.index,
+            dedup=args.dedup_tool_output,
+            poll=args.poll,
+            selector=selector,
+            roles=args.roles,
+            compress=args.gzip,
+            stats_path=args.stats,
+        )
+        return
+    if not args.patterns:
+        parser.error("the following arguments are required: patterns")
+
+    errors = process_file_patterns(
+        args.patterns,
+        args.output_dir,
+        args.format,
+        jobs,
+        state_path=args.state,
+        branch=args.branch,
+        index_path=args.index,
+        archive_path=args.archive,
+        dedup=args.dedup_tool_output,
+        selector=selector,
+        roles=args.roles,
+        compress=args.gzip,
+        stats_path=args.stats,
+    )
+    if errors:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -16,6 +16,17 @@ Options:
                                 Multiple patterns can be separated by '|' or spaces.
     -h, --help                  Show this help message and exit.
     -L, --follow-links          Follow symlinks when scanning directories.
+    -j, --jobs N                List directories in N threads (faster on network filesystems).
+    -f, --format FORMAT         Output format: rich (default), or plain, json, ndjson, which
+                                stream entries as they are found without loading rich.
+    -g, --gitignore             Skip what .gitignore files ignore; ignored directories are not scanned.
+    -s, --sizes                 Show file sizes and per-directory size totals and file counts,
+                                and list the largest files.
+    --sort name|size            Order entries by name (default) or by size, largest first.
+    --min-size SIZE             Hide files and directories smaller than SIZE (e.g. 10M).
+    --largest N                 Number of largest files listed with --sizes (default 10).
+    --no-cache                  Do not use the listing cache of unchanged directories
+                                (kept in $XDG_CACHE_HOME/filetree, ~/.cache/filetree by default).
     -l, --log-level             Set the logging level (10=DEBUG, 20=INFO, 30=WARNING, 40=ERROR, 50=CRITICAL)
     -a, --all                   Display the entire file tree without any filters
     root_directory              Optional path to scan (defaults to the current directory)
@@ -71,15 +82,32 @@ License:
 """
 
 import argparse
+import contextlib
 import fnmatch
+import functools
+import hashlib
+import heapq
+import json
 import logging
 import os
 import re
 import sys
-from typing import List, Sequence
-
-from rich.console import Console
-from rich.tree import Tree
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Sequence, Tuple
+
+# Output formats: 'rich' renders the whole tree at the end; the others stream
+OUTPUT_FORMATS = ("rich", "plain", "json", "ndjson")
+# Connectors drawn by the plain format (the same guides rich draws)
+PLAIN_BRANCH = "├── "
+PLAIN_LAST = "└── "
+PLAIN_PIPE = "│   "
+PLAIN_SPACE = "    "
+# Orders of siblings (--sort); names are listed in sorted order already
+SORT_KEYS = ("name", "size")
+# Size units, in steps of 1024 as du -h prints them
+SIZE_UNITS = ("B", "K", "M", "G", "T", "P")
 
 # Get the program name dynamically
 program_name = os.path.basename(sys.argv[0])
@@ -97,6 +125,24 @@ def configure_logging():
 configure_logging()
 
 
+def __getattr__(name):
+    """
+    Import rich's Console and Tree on first use.
+
+    The streaming output formats never touch rich, so it is only imported when
+    the rich format (or an importer of this module) asks for it.
+    """
+    if name == "Console":
+        from rich.console import Console  # pylint: disable=import-outside-toplevel
+
+        return Console
+    if name == "Tree":
+        from rich.tree import Tree  # pylint: disable=import-outside-toplevel
+
+        return Tree
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def _split_pattern_tokens(raw_pattern: str) -> List[str]:
     """Split a raw pattern string on pipe characters and whitespace."""
 
@@ -124,7 +170,7 @@ def collect_pattern_tokens(patterns: Sequence[str]) -> List[str]:
                 if extension:
                     collected.append(f"*{extension}")
             else:
-                collected.append(os.path.basename(normalized_input))
+                collected.append(os.path.basename(normalized_input.rstrip("/\\")))
             continue
 
         split_tokens = _split_pattern_tokens(normalized_input)
@@ -284,44 +330,83 @@ def should_descend_directory(
     return is_path_within_allowlist(relative_path, directory_allowlist)
 
 
+class PatternMatcher:
+    """
+    Glob patterns compiled into combined regular expressions.
+
+    Every pattern is translated with ``fnmatch.translate`` and joined into one
+    alternation, so testing a name against 50 patterns is one regex search
+    instead of 50 ``fnmatch`` calls. The same expression tests single path
+    components and full relative paths.
+
+    :param patterns: Normalized glob patterns (see normalize_patterns).
+    :param substring: Also match components that merely contain a pattern, as
+        exclusions do.
+    """
+
+    def __init__(self, patterns: Sequence[str], substring: bool = False):
+        self.patterns = list(patterns)
+        self.glob = None
+        self.contains = None
+        if self.patterns:
+            self.glob = re.compile(
+                "|".join(fnmatch.translate(os.path.normcase(pattern)) for pattern in self.patterns)
+            )
+            if substring:
+                self.contains = re.compile(
+                    "|".join(re.escape(pattern) for pattern in self.patterns)
+                )
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def matches_part(self, part: str) -> bool:
+        """Check a single path component (a file or directory name)."""
+
+        if self.glob is None:
+            return False
+        if self.contains is not None and self.contains.search(part):
+            return True
+        return self.glob.match(os.path.normcase(part)) is not None
+
+    def matches_path(self, relative_path: str) -> bool:
+        """Check a full relative path against the patterns as a whole."""
+
+        return self.glob is not None and self.glob.match(os.path.normcase(relative_path)) is not None
+
+    def matches(self, relative_path: str) -> bool:
+        """Check any component of a relative path, then the full path."""
+
+        return any(
+            self.matches_part(part) for part in relative_path.split(os.sep)
+        ) or self.matches_path(relative_path)
+
+
+@functools.lru_cache(maxsize=32)
+def compile_patterns(patterns: Tuple[str, ...], substring: bool = False) -> PatternMatcher:
+    """Return the (cached) compiled matcher for a tuple of patterns."""
+
+    return PatternMatcher(patterns, substring)
+
+
 def is_ignored(item_relative_path, exclude_patterns, show_all=False):
     """
     Check if the item should be ignored based on the exclusion patterns.
 
+    An item is ignored when a pattern is contained in, or glob-matches, any
+    component of its path, or glob-matches the full path.
+
     :param item_relative_path: The relative path of the item to check.
     :param exclude_patterns: List of patterns to exclude.
     :param show_all: If True, do not ignore any items.
     :return: True if the item should be ignored, False otherwise.
     """
-    if show_all:
+    if show_all or not exclude_patterns:
         return False
 
-    # Check if any part of the path matches an exclude pattern
-    path_parts = item_relative_path.split(os.sep)
-    for pattern in exclude_patterns:
-        # First check if the pattern is a substring of any part of the path
-        for part in path_parts:
-            if pattern in part:
-                logging.debug(
-                    "Ignoring item because pattern '%s' is in path part '%s': %s",
-                    pattern, part, item_relative_path
-                )
-                return True
-        # Then check if the pattern matches as a glob pattern
-        for part in path_parts:
-            if fnmatch.fnmatch(part, pattern):
-                logging.debug(
-                    "Ignoring item based on pattern '%s' matching part '%s': %s",
-                    pattern, part, item_relative_path
-                )
-                return True
-        # Also check if the full path matches the pattern
-        if fnmatch.fnmatch(item_relative_path, pattern):
-            logging.debug(
-                "Ignoring item based on pattern '%s' matching full path: %s",
-                pattern, item_relative_path
-            )
-            return True
+    if compile_patterns(tuple(exclude_patterns), substring=True).matches(item_relative_path):
+        logging.debug("Ignoring item matching the exclude patterns: %s", item_relative_path)
+        return True
     return False
 
 
@@ -329,6 +414,9 @@ def is_included(item_relative_path, include_patterns, show_all=False):
     """
     Check if the item should be included based on the inclusion patterns.
 
+    An item is included when a pattern glob-matches any component of its path
+    or its full path.
+
     :param item_relative_path: The relative path of the item to check.
     :param include_patterns: List of patterns to include.
     :param show_all: If True, include all items.
@@ -336,71 +424,940 @@ def is_included(item_relative_path, include_patterns, show_all=False):
     """
     if show_all or not include_patterns:
         return True
-    # Check if any part of the path matches an include pattern
-    path_parts = item_relative_path.split(os.sep)
-    for pattern in include_patterns:
-        # Check if pattern matches any part of the path
-        for part in path_parts:
-            if fnmatch.fnmatch(part, pattern):
-                logging.debug(
-                    "Including item based on pattern '%s' matching part '%s': %s",
-                    pattern, part, item_relative_path
+
+    if compile_patterns(tuple(include_patterns)).matches(item_relative_path):
+        logging.debug("Including item matching the include patterns: %s", item_relative_path)
+        return True
+    return False
+
+
+def format_size(size):
+    """
+    Format a byte count the way ``du -h`` does.
+
+    :param size: Number of bytes.
+    :return: E.g. '512B', '4.0K' or '1.2M'.
+    """
+    if size < 1024:
+        return f"{size}B"
+    value = float(size)
+    for unit in SIZE_UNITS[1:]:
+        value /= 1024
+        if value < 1024 or unit == SIZE_UNITS[-1]:
+            return f"{value:.1f}{unit}"
+    return f"{size}B"
+
+
+def parse_size(text):
+    """
+    Parse a size such as '500', '64K', '1.5M' or '2GiB' into bytes.
+
+    :param text: Number with an optional unit (B, K, M, G, T, P; powers of
+        1024, case-insensitive, optionally followed by 'B' or 'iB').
+    :return: Number of bytes.
+    :raises ValueError: If the text is not a size.
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d*)?)\s*([bkmgtp]?)(?:i?b)?\s*", text, re.IGNORECASE)
+    if not match:
+        raise ValueError(f"invalid size: {text!r}")
+    exponent = SIZE_UNITS.index(match.group(2).upper() or "B")
+    return int(float(match.group(1)) * 1024**exponent)
+
+
+def scan_directory(dir_path):
+    """
+    List a directory once, sorted by name.
+
+    The returned ``os.DirEntry`` objects carry the file type reported by the
+    directory listing, so checking whether an entry is a file, directory or
+    symlink needs no further ``stat`` call (except to resolve symlinks). The
+    directory handle is closed before returning, so a deep traversal never
+    holds more than one open.
+
+    :param dir_path: Directory to list.
+    :return: List of ``os.DirEntry`` objects sorted by name.
+    :raises OSError: If the directory cannot be read.
+    """
+    with os.scandir(dir_path) as entries:
+        return sorted(entries, key=lambda entry: entry.name)
+
+
+# Version of the listing cache file format
+LISTING_CACHE_VERSION = 1
+# Listings of directories modified this recently (seconds) are not cached:
+# a change within the same mtime tick would go unnoticed
+LISTING_CACHE_RACY_SECONDS = 2
+# Entry type bits stored in the listing cache
+ENTRY_FILE = 1
+ENTRY_DIR = 2
+ENTRY_SYMLINK = 4
+
+
+class CachedEntry:
+    """
+    A directory entry served from the listing cache.
+
+    Answers the ``os.DirEntry`` methods the walker uses from the types
+    recorded when the directory was listed. The path is only joined when it is
+    asked for, which the walker does for subdirectories alone.
+    """
+
+    __slots__ = ("name", "dir_path", "flags")
+
+    def __init__(self, name, dir_path, flags):
+        self.name = name
+        self.dir_path = dir_path
+        self.flags = flags
+
+    @property
+    def path(self):
+        return os.path.join(self.dir_path, self.name)
+
+    def stat(self):
+        return os.stat(self.path)
+
+    def is_file(self):
+        return bool(self.flags & ENTRY_FILE)
+
+    def is_dir(self):
+        return bool(self.flags & ENTRY_DIR)
+
+    def is_symlink(self):
+        return bool(self.flags & ENTRY_SYMLINK)
+
+
+def default_cache_path(root_dir):
+    """
+    Return the listing cache file of a root directory.
+
+    :param root_dir: Root directory of the walk.
+    :return: Path below ``$XDG_CACHE_HOME/filetree`` (``~/.cache/filetree``),
+        named after a hash of the root's absolute path.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    digest = hashlib.sha1(os.path.abspath(root_dir).encode("utf-8", "surrogateescape")).hexdigest()
+    return os.path.join(cache_home, "filetree", f"{digest[:16]}.json")
+
+
+class ListingCache:
+    """
+    Persistent cache of directory listings, validated by each directory's stat.
+
+    A listing is stored with the directory's mtime, ctime and inode, keyed by
+    its absolute path. Adding, removing or renaming an entry changes the
+    directory's mtime, so a directory whose stat still matches is served from
+    the cache: one ``stat`` replaces reading and sorting the listing. Listings
+    of directories modified in the last LISTING_CACHE_RACY_SECONDS are not
+    stored, since a change within the same timestamp tick would not be seen.
+
+    Only directories are tracked; the contents of files (including .gitignore
+    files, which are always read) do not matter to the listing.
+
+    :param path: Path of the JSON cache file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.listings = {}
+        self.visited = {}
+        self.changed = False
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a cache file, starting empty if it does not exist or is unreadable.
+
+        :param path: Path of the JSON cache file.
+        :return: Loaded ListingCache.
+        """
+        cache = cls(path)
+        if not os.path.exists(path):
+            return cache
+        try:
+            with open(path, "r", encoding="utf-8", errors="surrogateescape") as file:
+                data = json.load(file)
+            if not isinstance(data, dict) or data.get("version") != LISTING_CACHE_VERSION:
+                raise ValueError("unsupported listing cache format")
+        except (OSError, ValueError) as error:
+            logging.warning("Ignoring listing cache %s: %s", path, error)
+            return cache
+        cache.listings = data.get("directories", {})
+        return cache
+
+    def save(self):
+        """
+        Write the cache atomically, if any listing changed.
+
+        Directories that were not visited are kept, unless a parent listed in
+        this run no longer contains them.
+        """
+        if not self.changed:
+            return
+        listings = {}
+        names = {}
+        for dir_path, record in self.listings.items():
+            if dir_path not in self.visited:
+                parent, name = os.path.split(dir_path)
+                parent_record = self.visited.get(parent)
+                if parent_record is not None:
+                    if parent not in names:
+                        names[parent] = {entry_name for entry_name, _ in parent_record["entries"]}
+                    if name not in names[parent]:
+                        continue
+            listings[dir_path] = record
+        listings.update(self.visited)
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8", errors="surrogateescape") as file:
+                json.dump(
+                    {"version": LISTING_CACHE_VERSION, "directories": listings},
+                    file,
+                    ensure_ascii=False,
+                    separators=(",", ":"),
                 )
-                return True
-        # Also check if the full path matches the pattern
-        if fnmatch.fnmatch(item_relative_path, pattern):
-            logging.debug(
-                "Including item based on pattern '%s' matching full path: %s",
-                pattern, item_relative_path
-            )
-            return True
+            os.replace(tmp_path, self.path)
+        except OSError as error:
+            logging.warning("Cannot write listing cache %s: %s", self.path, error)
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+
+    def scan(self, dir_path):
+        """
+        List a directory like scan_directory(), from the cache if it is unchanged.
+
+        :param dir_path: Directory to list.
+        :return: List of ``os.DirEntry`` or CachedEntry objects sorted by name.
+        :raises OSError: If the directory cannot be read.
+        """
+        key = os.path.abspath(dir_path)
+        stat = os.stat(dir_path)
+        record = self.listings.get(key)
+        if (
+            record is not None
+            and record["mtime_ns"] == stat.st_mtime_ns
+            and record["ctime_ns"] == stat.st_ctime_ns
+            and record["ino"] == stat.st_ino
+        ):
+            with self.lock:
+                self.visited[key] = record
+            return [CachedEntry(name, dir_path, flags) for name, flags in record["entries"]]
+
+        # The stat is taken before listing, so a change during the listing
+        # invalidates the stored record on the next run
+        entries = scan_directory(dir_path)
+        if time.time_ns() - stat.st_mtime_ns < LISTING_CACHE_RACY_SECONDS * 1_000_000_000:
+            return entries
+        record = {
+            "mtime_ns": stat.st_mtime_ns,
+            "ctime_ns": stat.st_ctime_ns,
+            "ino": stat.st_ino,
+            "entries": [
+                [
+                    entry.name,
+                    (ENTRY_FILE if entry.is_file() else 0)
+                    | (ENTRY_DIR if entry.is_dir() else 0)
+                    | (ENTRY_SYMLINK if entry.is_symlink() else 0),
+                ]
+                for entry in entries
+            ],
+        }
+        with self.lock:
+            self.visited[key] = record
+            self.changed = True
+        return entries
+
+
+# Name of the per-directory ignore files read with --gitignore
+GITIGNORE_NAME = ".gitignore"
+
+
+def translate_gitignore(pattern):
+    """
+    Translate the glob of a gitignore pattern into a regular expression.
+
+    Follows gitignore(5): ``*``, ``?`` and ``[...]`` never match a slash, a
+    leading ``**/`` matches in all directories, a trailing ``/**`` matches
+    everything inside, ``/**/`` matches zero or more directories, and a
+    backslash quotes the next character. A pattern without a slash (other than
+    a trailing one) matches a name at any depth; otherwise it is anchored to
+    the directory of its ignore file.
+
+    :param pattern: Pattern without its negation prefix and trailing slash.
+    :return: Regular expression source, to be matched against a whole
+        slash-separated path relative to the ignore file's directory.
+    """
+    anchored = "/" in pattern
+    if pattern.startswith("/"):
+        pattern = pattern[1:]
+    parts = []
+    index = 0
+    length = len(pattern)
+    while index < length:
+        char = pattern[index]
+        if char == "*" and pattern.startswith("**", index):
+            at_start = index == 0 or pattern[index - 1] == "/"
+            end = index + 2
+            if at_start and end == length:
+                parts.append(".*")
+                index = end
+            elif at_start and pattern.startswith("/", end):
+                parts.append("(?:.*/)?")
+                index = end + 1
+            else:
+                # Other consecutive asterisks are regular asterisks
+                parts.append("[^/]*")
+                index = end
+                while index < length and pattern[index] == "*":
+                    index += 1
+        elif char == "*":
+            parts.append("[^/]*")
+            index += 1
+        elif char == "?":
+            parts.append("[^/]")
+            index += 1
+        elif char == "[":
+            end = index + 1
+            if end < length and pattern[end] in "!^":
+                end += 1
+            if end < length and pattern[end] == "]":
+                end += 1
+            while end < length and pattern[end] != "]":
+                end += 1
+            if end >= length:
+                parts.append(re.escape(char))
+                index += 1
+                continue
+            body = pattern[index + 1:end]
+            negate = body[:1] in ("!", "^")
+            if negate:
+                body = body[1:]
+            body = re.sub(r"([\\\[&~|])", r"\\\1", body)
+            parts.append(f"[^/{body}]" if negate else f"(?!/)[{body}]")
+            index = end + 1
+        elif char == "\\" and index + 1 < length:
+            parts.append(re.escape(pattern[index + 1]))
+            index += 2
+        else:
+            parts.append(re.escape(char))
+            index += 1
+    return ("" if anchored else "(?:.*/)?") + "".join(parts)
+
+
+def parse_gitignore(lines):
+    """
+    Parse the lines of an ignore file into rules.
+
+    Blank lines and comments are skipped, trailing spaces are dropped unless
+    quoted with a backslash, ``!`` negates a pattern (``\\!`` and ``\\#`` are
+    literal), and a trailing slash restricts a pattern to directories.
+
+    :param lines: Lines of a .gitignore (or .git/info/exclude) file.
+    :return: List of ``(regex, negated, directory_only)`` in file order.
+    """
+    rules = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        stripped = line.rstrip(" ")
+        if len(stripped) < len(line) and stripped.endswith("\\"):
+            stripped += " "
+        line = stripped
+        if not line or line.startswith("#"):
+            continue
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        directory_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        rules.append((re.compile(translate_gitignore(line), re.DOTALL), negated, directory_only))
+    return rules
+
+
+class GitIgnoreFile:
+    """
+    The compiled rules of one ignore file.
+
+    Paths are tested relative to the walk's root, slash-separated: ``strip``
+    characters are removed (the path of the file's directory below the root)
+    and ``prefix`` is prepended (the path of the root below the file's
+    directory, for ignore files above the root). All rules are also joined
+    into one expression, so a path no rule matches costs one regex search.
+
+    :param rules: Rules from parse_gitignore().
+    :param strip: Length of the relative path of the file's directory, plus
+        its separator.
+    :param prefix: Path of the walk's root relative to the file's directory,
+        with a trailing slash (empty for files at or below the root).
+    """
+
+    def __init__(self, rules, strip=0, prefix=""):
+        self.rules = rules
+        self.strip = strip
+        self.prefix = prefix
+        self.any = re.compile("|".join(f"(?:{regex.pattern})" for regex, _, _ in rules), re.DOTALL)
+
+    def match(self, relative_path, is_dir):
+        """
+        Apply the rules to a path; the last matching rule decides.
+
+        :param relative_path: Slash-separated path relative to the walk's root.
+        :param is_dir: Whether the path is a directory.
+        :return: True if ignored, False if re-included by a negated rule, or
+            None if no rule matches.
+        """
+        path = self.prefix + relative_path[self.strip:]
+        if not self.any.fullmatch(path):
+            return None
+        for regex, negated, directory_only in reversed(self.rules):
+            if (is_dir or not directory_only) and regex.fullmatch(path):
+                return not negated
+        return None
+
+
+def load_gitignore(file_path, strip=0, prefix=""):
+    """
+    Read an ignore file into a GitIgnoreFile.
+
+    :param file_path: Path of the ignore file.
+    :param strip: See GitIgnoreFile.
+    :param prefix: See GitIgnoreFile.
+    :return: GitIgnoreFile, or None if the file is unreadable or has no rules.
+    """
+    try:
+        with open(file_path, "r", encoding="utf-8", errors="surrogateescape") as file:
+            rules = parse_gitignore(file)
+    except OSError as error:
+        logging.warning("Cannot read %s: %s", file_path, error)
+        return None
+    return GitIgnoreFile(rules, strip, prefix) if rules else None
+
+
+def is_gitignored(ignore_files, relative_path, is_dir):
+    """
+    Check a path against a chain of ignore files.
+
+    Files deeper in the tree take precedence over the ones above them, so the
+    chain is searched from its end and the first file with a matching rule
+    decides.
+
+    :param ignore_files: GitIgnoreFile objects, outermost first.
+    :param relative_path: Path relative to the walk's root (os.sep-separated).
+    :param is_dir: Whether the path is a directory.
+    :return: True if the path is ignored.
+    """
+    if os.sep != "/":
+        relative_path = relative_path.replace(os.sep, "/")
+    for ignore_file in reversed(ignore_files):
+        ignored = ignore_file.match(relative_path, is_dir)
+        if ignored is not None:
+            return ignored
     return False
 
 
-def add_items(
-    root_dir,
-    parent_tree,
-    exclude_patterns,
-    include_patterns,
-    show_all=False,
-    relative_path="",
-    follow_links=False,
-    directory_allowlist=None,
-):
+def find_git_root(dir_path):
     """
-    Recursively add items in the file system to the tree structure.
+    Find the top of the git work tree containing a directory.
+
+    :param dir_path: Directory to start from.
+    :return: Absolute path of the nearest directory (dir_path or above) that
+        contains ``.git``, or None outside a repository.
+    """
+    current = os.path.abspath(dir_path)
+    while True:
+        if os.path.exists(os.path.join(current, ".git")):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+def outer_gitignores(root_dir, relative_path=""):
+    """
+    Load the ignore files that apply to a walk's root from above it.
+
+    Inside a git work tree these are ``.git/info/exclude`` and the .gitignore
+    files of the directories from the top of the work tree down to the root's
+    parent; the root's own .gitignore is read when it is listed.
+
+    :param root_dir: Root directory of the walk.
+    :param relative_path: Relative path of root_dir from the displayed root.
+    :return: List of GitIgnoreFile objects, outermost first.
+    """
+    git_root = find_git_root(root_dir)
+    if git_root is None:
+        return []
+    root = os.path.abspath(root_dir)
+    below = os.path.relpath(root, git_root)
+    parts = [] if below == os.curdir else below.split(os.sep)
+    strip = len(relative_path) + 1 if relative_path else 0
+
+    candidates = [(os.path.join(git_root, ".git", "info", "exclude"), "".join(f"{part}/" for part in parts))]
+    for depth in range(len(parts)):
+        directory = os.path.join(git_root, *parts[:depth])
+        prefix = "".join(f"{part}/" for part in parts[depth:])
+        candidates.append((os.path.join(directory, GITIGNORE_NAME), prefix))
+
+    ignore_files = []
+    for file_path, prefix in candidates:
+        if os.path.isfile(file_path):
+            ignore_file = load_gitignore(file_path, strip, prefix)
+            if ignore_file is not None:
+                ignore_files.append(ignore_file)
+    return ignore_files
+
+
+class _DirectoryFrame:
+    """
+    A directory being traversed by TreeWalker, kept on an explicit stack.
+
+    ``items`` are the directory's entries, already filtered and classified
+    (see TreeWalker.list_items), and ``index`` is the next one to visit. The
+    rich walk attaches ``tree`` to the parent's when the directory is done;
+    the streaming walk keeps ``pending`` set until the directory's own entry
+    has been emitted.
+    """
+
+    __slots__ = ("tree", "name", "relative_path", "items", "index", "has_items", "parent", "pending")
+
+    def __init__(self, tree, relative_path, parent=None, name=""):
+        self.tree = tree
+        self.name = name
+        self.relative_path = relative_path
+        self.items = []
+        self.index = 0
+        self.has_items = False
+        self.parent = parent
+        self.pending = True
+
+
+# Item standing for an unreadable directory's contents
+PERMISSION_DENIED_ITEM = ("Permission Denied", None, None, False, None)
+
+
+class SizeNode:
+    """
+    A shown entry of a measured tree (see TreeWalker.measure).
+
+    ``size`` is the file's size, or for a directory the total of the files
+    shown below it, which ``files`` counts.
+    """
+
+    __slots__ = ("name", "relative_path", "kind", "size", "files", "children")
+
+    def __init__(self, name, relative_path, kind, size=0):
+        self.name = name
+        self.relative_path = relative_path
+        self.kind = kind
+        self.size = size
+        self.files = 1 if kind == "file" else 0
+        self.children = []
+
+    def add(self, child):
+        """Append a child and add its size and file count to the totals."""
+
+        self.children.append(child)
+        self.size += child.size
+        self.files += child.files
+
+
+class TreeWalker:
+    """
+    Walk a directory tree into rich Tree nodes, or stream its entries.
+
+    Directories are read with ``os.scandir``, whose cached entry types replace
+    the ``isfile``/``isdir``/``islink`` calls per entry, and traversed with an
+    explicit stack rather than recursion, so arbitrarily deep trees do not hit
+    Python's recursion limit. Entries are visited in sorted order and a
+    directory is only shown once it is known to contain items.
+
+    The patterns are compiled once (see PatternMatcher). Excluded directories
+    are never descended into, so the components of a directory on the stack
+    are known not to be excluded and only each entry's own name and full path
+    are tested; whether a component already matched an include pattern is
+    carried down the stack in the same way. The result is the same as calling
+    is_ignored() and is_included() for every entry.
+
+    With ``jobs`` > 1, directories are listed by a thread pool fed from a work
+    queue: each task lists and classifies one directory and queues every
+    subdirectory that will be descended into, so on network filesystems many
+    listings are in flight at once. The tree itself is still assembled in one
+    thread, in sorted order, from the finished listings, so the output is
+    identical to a sequential walk.
+
+    With ``gitignore``, each directory's .gitignore is read when the directory
+    is listed, and the chain of ignore files that applies to it is handed down
+    to its subdirectories (see is_gitignored()). Ignored directories are
+    pruned like excluded ones, so their contents are never listed.
+
+    With a ``cache``, directories whose stat matches the cached listing are
+    not read again (see ListingCache).
+
+    With ``sizes``, every file to be shown is also stat'ed for its size while
+    its directory is listed (so in the listing threads with ``jobs`` > 1), and
+    measure() sums them up per directory in the same walk.
 
-    :param root_dir: The root directory to start from.
-    :param parent_tree: The parent tree node to add items to.
     :param exclude_patterns: List of patterns to exclude.
     :param include_patterns: List of patterns to include.
     :param show_all: If True, include all items without filtering.
-    :param relative_path: The relative path from the root directory.
     :param follow_links: If True, follow symbolic links.
-    :return: True if any items were added to the tree, False otherwise.
+    :param directory_allowlist: Directories to restrict traversal to (all if empty).
+    :param jobs: Number of threads listing directories (1 lists them inline).
+    :param gitignore: If True, skip what .gitignore files ignore (not with show_all).
+    :param cache: Optional ListingCache to serve unchanged directories from.
+    :param sizes: If True, record the size of every file (see measure()).
     """
-    has_included_items = False
-    if directory_allowlist is None:
-        directory_allowlist = []
 
-    try:
-        # Process all items in the current directory
-        for item_name in sorted(os.listdir(root_dir)):
-            item_path = os.path.join(root_dir, item_name)
+    def __init__(
+        self,
+        exclude_patterns,
+        include_patterns,
+        show_all=False,
+        follow_links=False,
+        directory_allowlist=None,
+        jobs=1,
+        gitignore=False,
+        cache=None,
+        sizes=False,
+    ):
+        self.exclude = PatternMatcher([] if show_all else exclude_patterns, substring=True)
+        self.include = PatternMatcher([] if show_all else include_patterns)
+        self.show_all = show_all
+        self.follow_links = follow_links
+        self.directory_allowlist = directory_allowlist or []
+        self.jobs = jobs
+        self.gitignore = gitignore and not show_all
+        self.cache = cache
+        self.sizes = sizes
+        self.pool = None
+        self.listings = {}
+        self.nonempty = {}
+        self.ignore_files = {}
+
+    @contextlib.contextmanager
+    def _pool(self):
+        """Run a walk with the listing thread pool, if jobs > 1."""
+
+        if self.jobs > 1:
+            self.pool = ThreadPoolExecutor(self.jobs, thread_name_prefix="filetree-scan")
+        try:
+            yield
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown(cancel_futures=True)
+                self.pool = None
+            self.listings.clear()
+            self.nonempty.clear()
+            self.ignore_files.clear()
+
+    def _open_root(self, frame, root_dir):
+        """Fill the root frame, unless a component of its relative path is excluded."""
+
+        root_parts = frame.relative_path.split(os.sep) if frame.relative_path else []
+        if self.gitignore:
+            self.ignore_files[root_dir] = outer_gitignores(root_dir, frame.relative_path)
+        # Every entry below an excluded component is excluded too
+        if not any(self.exclude.matches_part(part) for part in root_parts):
+            included = any(self.include.matches_part(part) for part in root_parts)
+            self._open(frame, root_dir, included)
+
+    def walk(self, root_dir, parent_tree, relative_path=""):
+        """
+        Add the items below a directory to a rich tree node.
+
+        :param root_dir: The root directory to start from.
+        :param parent_tree: The tree node to add items to.
+        :param relative_path: The relative path of root_dir from the displayed root.
+        :return: True if any items were added to the tree, False otherwise.
+        """
+        from rich.tree import Tree  # pylint: disable=import-outside-toplevel
+
+        with self._pool():
+            root_frame = _DirectoryFrame(parent_tree, relative_path)
+            self._open_root(root_frame, root_dir)
+
+            stack = [root_frame]
+            while stack:
+                frame = stack[-1]
+                if frame.index == len(frame.items):
+                    # Directory finished: attach it to its parent if anything was added
+                    stack.pop()
+                    if frame.parent is not None and frame.has_items:
+                        frame.parent.tree.add(frame.tree)
+                        frame.parent.has_items = True
+                        logging.debug("Added directory with items: %s", frame.relative_path)
+                    continue
+
+                item = frame.items[frame.index]
+                frame.index += 1
+                item_name, item_relative_path, item_path, included, _ = item
+                if item is PERMISSION_DENIED_ITEM:
+                    frame.tree.add("[red]Permission Denied[/red]")
+                    frame.has_items = True
+                    continue
+                if item_path is None:
+                    frame.tree.add(item_name)
+                    frame.has_items = True
+                    logging.debug("Added file: %s", item_relative_path)
+                    continue
+
+                logging.debug("Entering directory: %s", item_relative_path)
+                child = _DirectoryFrame(Tree(f"{item_name}/"), item_relative_path, frame)
+                self._open(child, item_path, included)
+                stack.append(child)
+
+            return root_frame.has_items
+
+    def measure(self, root_dir, relative_path=""):
+        """
+        Walk a directory into a tree of SizeNode objects with size totals.
+
+        Shows the same entries as walk(), but keeps the whole tree so that
+        directories can be annotated with, sorted by and pruned on the totals
+        of their contents. File sizes are only known if the walker was created
+        with ``sizes``.
+
+        :param root_dir: The root directory to start from.
+        :param relative_path: The relative path of root_dir from the displayed root.
+        :return: SizeNode of root_dir, with an empty name.
+        """
+        with self._pool():
+            root = SizeNode("", relative_path, "directory")
+            root_frame = _DirectoryFrame(root, relative_path)
+            self._open_root(root_frame, root_dir)
+
+            stack = [root_frame]
+            while stack:
+                frame = stack[-1]
+                if frame.index == len(frame.items):
+                    # Directory finished: attach it to its parent if anything was added
+                    stack.pop()
+                    if frame.parent is not None and frame.tree.children:
+                        frame.parent.tree.add(frame.tree)
+                    continue
+
+                item = frame.items[frame.index]
+                frame.index += 1
+                item_name, item_relative_path, item_path, included, size = item
+                if item is PERMISSION_DENIED_ITEM:
+                    frame.tree.add(SizeNode(item_name, frame.relative_path, "error"))
+                elif item_path is None:
+                    frame.tree.add(SizeNode(item_name, item_relative_path, "file", size or 0))
+                else:
+                    node = SizeNode(item_name, item_relative_path, "directory")
+                    child = _DirectoryFrame(node, item_relative_path, frame)
+                    self._open(child, item_path, included)
+                    stack.append(child)
+
+            return root
+
+    def iter_entries(self, root_dir, relative_path=""):
+        """
+        Stream the entries below a directory in display order, as they are found.
+
+        Entries come in the order the tree is drawn: each directory directly
+        before its contents. A directory is emitted as soon as its first
+        descendant is found, so empty directories never appear. To know whether
+        an entry is the last of its siblings (which the tree's connectors
+        depend on), later sibling directories are probed for content when no
+        later file settles it (see has_entries()). Memory stays proportional to
+        the depth of the tree, not its size.
+
+        :param root_dir: The root directory to start from.
+        :param relative_path: The relative path of root_dir from the displayed root.
+        :return: Iterator of ``(depth, name, kind, is_last, relative_path,
+            size, files)``, where depth 0 is the root's children, kind is
+            'file', 'directory' or 'error' (an unreadable directory's contents),
+            and size and files are None (see iter_size_entries()).
+        """
+        with self._pool():
+            root_frame = _DirectoryFrame(None, relative_path)
+            root_frame.pending = False
+            self._open_root(root_frame, root_dir)
+
+            stack = [root_frame]
+            while stack:
+                frame = stack[-1]
+                if frame.index == len(frame.items):
+                    stack.pop()
+                    continue
+
+                item = frame.items[frame.index]
+                frame.index += 1
+                item_name, item_relative_path, item_path, included, _ = item
+                if item_path is not None:
+                    if self.nonempty.get(item_path) is False:
+                        continue  # Probed already and found empty
+                    child = _DirectoryFrame(None, item_relative_path, frame, item_name)
+                    self._open(child, item_path, included)
+                    stack.append(child)
+                    continue
+
+                # A file (or error) is shown: first emit the directories above it
+                for depth, pending in enumerate(stack[1:]):
+                    if pending.pending:
+                        pending.pending = False
+                        yield (
+                            depth,
+                            pending.name,
+                            "directory",
+                            not self._has_later(pending.parent),
+                            pending.relative_path,
+                            None,
+                            None,
+                        )
+                kind = "error" if item is PERMISSION_DENIED_ITEM else "file"
+                yield (
+                    len(stack) - 1,
+                    item_name,
+                    kind,
+                    not self._has_later(frame),
+                    item_relative_path or frame.relative_path,
+                    None,
+                    None,
+                )
+
+    def _has_later(self, frame):
+        """Whether any item after the current one of a frame will be shown."""
+
+        for index in range(frame.index, len(frame.items)):
+            _, item_relative_path, item_path, included, _ = frame.items[index]
+            if item_path is None or self.has_entries(item_path, item_relative_path, included):
+                return True
+        return False
+
+    def has_entries(self, dir_path, relative_path, included):
+        """
+        Check whether a directory would show anything, stopping at the first hit.
+
+        The directories probed are listed once: their listings are kept for the
+        walk that visits them later, and subtrees found empty are remembered so
+        the walk skips them.
+
+        :param dir_path: Path of the directory.
+        :param relative_path: Its path relative to the displayed root.
+        :param included: Whether a component of its path matched an include pattern.
+        :return: True if it contains a file to show or an unreadable directory.
+        """
+        known = self.nonempty.get(dir_path)
+        if known is not None:
+            return known
+
+        found = False
+        scanned = []
+        pending = [(dir_path, relative_path, included)]
+        while pending and not found:
+            path, item_relative_path, item_included = pending.pop()
+            known = self.nonempty.get(path)
+            if known is not None:
+                found = known
+                continue
+            listing = self.listings.get(path)
+            if listing is None:
+                listing = Future()
+                try:
+                    listing.set_result(self._list(path, item_relative_path, item_included))
+                except PermissionError as error:
+                    listing.set_exception(error)
+                self.listings[path] = listing
+            try:
+                items = listing.result()
+            except PermissionError:
+                found = True
+                continue
+            scanned.append(path)
+            for _, child_relative_path, child_path, child_included, _ in reversed(items):
+                if child_path is None:
+                    found = True
+                    break
+                pending.append((child_path, child_relative_path, child_included))
+
+        if not found:
+            for path in scanned:
+                self.nonempty[path] = False
+                self.listings.pop(path, None)
+        self.nonempty[dir_path] = found
+        return found
+
+    def _open(self, frame, dir_path, included):
+        """
+        Fill a frame with the classified entries of its directory.
+
+        :param frame: Frame of the directory.
+        :param dir_path: Path of the directory.
+        :param included: Whether a component of its path matched an include pattern.
+        """
+        listing = self.listings.pop(dir_path, None)
+        try:
+            if listing is not None:
+                frame.items = listing.result()
+            else:
+                frame.items = self._list(dir_path, frame.relative_path, included)
+        except PermissionError:
+            frame.items = [PERMISSION_DENIED_ITEM]
+
+    def _list(self, dir_path, relative_path, included):
+        """List a directory, queueing its subdirectories when there is a pool."""
+
+        if self.pool is None:
+            return self.list_items(dir_path, relative_path, included)
+        return self._list_and_queue(dir_path, relative_path, included)
+
+    def _list_and_queue(self, dir_path, relative_path, included):
+        """Pool task: list a directory, then queue its subdirectories."""
+
+        items = self.list_items(dir_path, relative_path, included)
+        for _, item_relative_path, item_path, item_included, _ in items:
+            if item_path is not None:
+                self.listings[item_path] = self.pool.submit(
+                    self._list_and_queue, item_path, item_relative_path, item_included
+                )
+        return items
+
+    def list_items(self, dir_path, relative_path, included):
+        """
+        List a directory and filter its entries into files and subdirectories.
+
+        :param dir_path: Path of the directory.
+        :param relative_path: Its path relative to the displayed root.
+        :param included: Whether a component of its path matched an include pattern.
+        :return: Sorted list of ``(name, relative_path, path, included, size)``
+            items. path is None for files to add and the directory's path for
+            subdirectories to descend into; included tells whether a component
+            of the item's path matched an include pattern; size is a file's size
+            in bytes, or None for directories and when the walker does not
+            record sizes.
+        :raises OSError: If the directory cannot be read.
+        """
+        items = []
+        entries = scan_directory(dir_path) if self.cache is None else self.cache.scan(dir_path)
+        ignore_files = self._ignore_files(dir_path, relative_path, entries) if self.gitignore else None
+        for entry in entries:
+            item_name = entry.name
             item_relative_path = (
                 os.path.join(relative_path, item_name) if relative_path else item_name
             )
 
             # Skip if the item is in the exclude list
-            if is_ignored(item_relative_path, exclude_patterns, show_all):
+            if self.exclude.matches_part(item_name) or self.exclude.matches_path(
+                item_relative_path
+            ):
                 logging.debug("Skipping excluded item: %s", item_relative_path)
                 continue
+            if ignore_files and is_gitignored(ignore_files, item_relative_path, entry.is_dir()):
+                logging.debug("Skipping gitignored item: %s", item_relative_path)
+                continue
+            name_included = included or self.include.matches_part(item_name)
 
-            if os.path.isfile(item_path):
+            if entry.is_file():
                 # For files, check if they match the include patterns
-                if directory_allowlist and not is_path_within_allowlist(
+                if self.directory_allowlist and not is_path_within_allowlist(
                     item_relative_path,
-                    directory_allowlist,
+                    self.directory_allowlist,
                 ):
                     logging.debug(
                         "Skipping file outside allowlist: %s",
@@ -408,17 +1365,19 @@ def add_items(
                     )
                     continue
 
-                if is_included(item_relative_path, include_patterns, show_all):
-                    parent_tree.add(item_name)
-                    has_included_items = True
-                    logging.debug("Added file: %s", item_relative_path)
-            elif os.path.isdir(item_path) and (
-                follow_links or not os.path.islink(item_path)
-            ):
+                if (
+                    not self.include
+                    or name_included
+                    or self.include.matches_path(item_relative_path)
+                ):
+                    items.append(
+                        (item_name, item_relative_path, None, name_included, self._file_size(entry))
+                    )
+            elif entry.is_dir() and (self.follow_links or not entry.is_symlink()):
                 if not should_descend_directory(
                     item_relative_path,
-                    directory_allowlist,
-                    show_all,
+                    self.directory_allowlist,
+                    self.show_all,
                 ):
                     logging.debug(
                         "Skipping directory outside allowlist: %s",
@@ -427,27 +1386,316 @@ def add_items(
                     continue
 
                 # For directories, always traverse them unless explicitly excluded
-                logging.debug("Entering directory: %s", item_relative_path)
-                dir_branch = Tree(f"{item_name}/")
-                dir_has_items = add_items(
-                    item_path,
-                    dir_branch,
-                    exclude_patterns,
-                    include_patterns,
-                    show_all,
-                    item_relative_path,
-                    follow_links,
-                    directory_allowlist,
-                )
-                if dir_has_items:
-                    parent_tree.add(dir_branch)
-                    has_included_items = True
-                    logging.debug("Added directory with items: %s", item_relative_path)
+                items.append((item_name, item_relative_path, entry.path, name_included, None))
+                if ignore_files is not None:
+                    self.ignore_files[entry.path] = ignore_files
+        return items
+
+    def _file_size(self, entry):
+        """Return the size of a file entry if sizes are recorded, else None."""
+
+        if not self.sizes:
+            return None
+        try:
+            return entry.stat().st_size
+        except OSError as error:
+            logging.debug("Cannot stat %s: %s", entry.path, error)
+            return 0
+
+    def _ignore_files(self, dir_path, relative_path, entries):
+        """
+        Return the ignore files that apply to a directory's entries.
+
+        :param dir_path: Path of the directory.
+        :param relative_path: Its path relative to the displayed root.
+        :param entries: Its listing, from scan_directory().
+        :return: The chain handed down by its parent, extended with its own
+            .gitignore if it has one.
+        """
+        ignore_files = self.ignore_files.pop(dir_path, [])
+        for entry in entries:
+            if entry.name == GITIGNORE_NAME and entry.is_file():
+                strip = len(relative_path) + 1 if relative_path else 0
+                ignore_file = load_gitignore(entry.path, strip)
+                if ignore_file is not None:
+                    ignore_files = ignore_files + [ignore_file]
+                break
+        return ignore_files
 
-    except PermissionError:
-        parent_tree.add("[red]Permission Denied[/red]")
-        has_included_items = True
-    return has_included_items
+
+def add_items(
+    root_dir,
+    parent_tree,
+    exclude_patterns,
+    include_patterns,
+    show_all=False,
+    relative_path="",
+    follow_links=False,
+    directory_allowlist=None,
+    jobs=1,
+    gitignore=False,
+):
+    """
+    Add the items below a directory to the tree structure (see TreeWalker).
+
+    :param root_dir: The root directory to start from.
+    :param parent_tree: The parent tree node to add items to.
+    :param exclude_patterns: List of patterns to exclude.
+    :param include_patterns: List of patterns to include.
+    :param show_all: If True, include all items without filtering.
+    :param relative_path: The relative path from the root directory.
+    :param follow_links: If True, follow symbolic links.
+    :param directory_allowlist: Directories to restrict traversal to (all if empty).
+    :param jobs: Number of threads listing directories concurrently.
+    :param gitignore: If True, skip what .gitignore files ignore.
+    :return: True if any items were added to the tree, False otherwise.
+    """
+    walker = TreeWalker(
+        exclude_patterns,
+        include_patterns,
+        show_all,
+        follow_links,
+        directory_allowlist,
+        jobs,
+        gitignore,
+    )
+    return walker.walk(root_dir, parent_tree, relative_path)
+
+
+def size_annotation(size, files=None):
+    """
+    Return the size annotation of an entry.
+
+    :param size: Size in bytes.
+    :param files: Number of files below a directory (None for a file).
+    :return: E.g. '(4.0K)' for a file or '(1.2M, 34 files)' for a directory.
+    """
+    if files is None:
+        return f"({format_size(size)})"
+    return f"({format_size(size)}, {files} file{'' if files == 1 else 's'})"
+
+
+def entry_label(name, kind, size=None, files=None):
+    """
+    Return the text shown for an entry in the plain and rich trees.
+
+    :param name: Entry name.
+    :param kind: 'file', 'directory' or 'error'.
+    :param size: Size in bytes (None if sizes are not measured).
+    :param files: Number of files below a directory.
+    :return: The name, with a slash for directories and a size annotation
+        such as 'src/ (1.2M, 34 files)' or 'app.py (4.0K)'.
+    """
+    label = f"{name}/" if kind == "directory" else name
+    if size is None or kind == "error":
+        return label
+    return f"{label} {size_annotation(size, files if kind == 'directory' else None)}"
+
+
+def iter_plain_lines(entries, display_root):
+    """
+    Draw streamed entries as the lines of a plain-text tree.
+
+    :param entries: Entries from TreeWalker.iter_entries() or iter_size_entries().
+    :param display_root: Label of the root line.
+    :return: Iterator of lines (without newlines), the same text rich draws.
+    """
+    yield display_root
+    guides = []
+    for depth, name, kind, is_last, _, size, files in entries:
+        del guides[depth:]
+        label = entry_label(name, kind, size, files)
+        yield "".join(guides) + (PLAIN_LAST if is_last else PLAIN_BRANCH) + label
+        if kind == "directory":
+            guides.append(PLAIN_SPACE if is_last else PLAIN_PIPE)
+
+
+def entry_record(entry):
+    """
+    Convert a streamed entry to its JSON record.
+
+    :param entry: Entry from TreeWalker.iter_entries() or iter_size_entries().
+    :return: Dict with 'path' (relative to the root), 'name', 'type' ('file',
+        'directory' or 'error') and 'depth' (0 for the root's children), plus
+        'size' in bytes for measured entries and 'files' for measured
+        directories.
+    """
+    depth, name, kind, _, relative_path, size, files = entry
+    record = {"path": relative_path, "name": name, "type": kind, "depth": depth}
+    if size is not None:
+        record["size"] = size
+        if kind == "directory":
+            record["files"] = files
+    return record
+
+
+def write_stream(entries, display_root, output_format, file, header=None):
+    """
+    Write streamed entries in a streaming format, one entry at a time.
+
+    :param entries: Entries from TreeWalker.iter_entries() or iter_size_entries().
+    :param display_root: Label of the root.
+    :param output_format: 'plain', 'json' ({"root": ..., "entries": [...]})
+        or 'ndjson' (one record per line).
+    :param file: Text stream to write to.
+    :param header: Optional further keys of the json document, written
+        between 'root' and 'entries'.
+    """
+    if output_format == "plain":
+        for line in iter_plain_lines(entries, display_root):
+            file.write(line + "\n")
+    elif output_format == "ndjson":
+        for entry in entries:
+            file.write(json.dumps(entry_record(entry), ensure_ascii=False) + "\n")
+    else:
+        document = json.dumps({"root": display_root, **(header or {})}, ensure_ascii=False)
+        file.write(document[:-1] + ', "entries": [')
+        separator = "\n"
+        for entry in entries:
+            file.write(separator + json.dumps(entry_record(entry), ensure_ascii=False))
+            separator = ",\n"
+        file.write("\n]}\n")
+
+
+def iter_size_entries(root):
+    """
+    Stream a measured tree in display order.
+
+    :param root: SizeNode from TreeWalker.measure() (see arrange_tree()).
+    :return: Iterator of entries like TreeWalker.iter_entries(), with size
+        and files filled in.
+    """
+    stack = [[root.children, 0]]
+    while stack:
+        position = stack[-1]
+        children, index = position
+        if index == len(children):
+            stack.pop()
+            continue
+        position[1] += 1
+        node = children[index]
+        yield (
+            len(stack) - 1,
+            node.name,
+            node.kind,
+            index == len(children) - 1,
+            node.relative_path,
+            node.size,
+            node.files,
+        )
+        if node.kind == "directory":
+            stack.append([node.children, 0])
+
+
+def iter_size_nodes(root):
+    """Iterate over every node of a measured tree in display order, root included."""
+
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(node.children))
+
+
+def largest_files(root, count):
+    """
+    Find the largest files of a measured tree.
+
+    :param root: SizeNode from TreeWalker.measure().
+    :param count: Number of files to return.
+    :return: Up to count file nodes, largest first.
+    """
+    files = (node for node in iter_size_nodes(root) if node.kind == "file")
+    return heapq.nlargest(count, files, key=lambda node: node.size)
+
+
+def arrange_tree(root, sort="name", min_size=0):
+    """
+    Prune and order a measured tree in place.
+
+    Totals are not changed by pruning, so a directory keeps showing the size
+    and count of everything below it even when its small entries are hidden.
+
+    :param root: SizeNode from TreeWalker.measure().
+    :param sort: 'name' keeps the listing order; 'size' puts the largest
+        entries first (ties stay in name order).
+    :param min_size: Hide files and directories smaller than this many bytes
+        (unreadable directories are always shown).
+    """
+    for node in iter_size_nodes(root):
+        if min_size:
+            node.children = [
+                child for child in node.children if child.kind == "error" or child.size >= min_size
+            ]
+        if sort == "size":
+            node.children.sort(key=lambda child: -child.size)
+
+
+def build_rich_tree(entries, root_label):
+    """
+    Build a rich Tree from streamed entries.
+
+    :param entries: Entries from TreeWalker.iter_entries() or iter_size_entries().
+    :param root_label: Label of the root.
+    :return: rich Tree.
+    """
+    from rich.tree import Tree  # pylint: disable=import-outside-toplevel
+
+    tree = Tree(root_label)
+    parents = [tree]
+    for depth, name, kind, _, _, size, files in entries:
+        del parents[depth + 1:]
+        if kind == "error":
+            parents[-1].add("[red]Permission Denied[/red]")
+            continue
+        node = parents[-1].add(entry_label(name, kind, size, files))
+        if kind == "directory":
+            parents.append(node)
+    return tree
+
+
+def write_size_tree(root, display_root, output_format, file=None, sort="name", min_size=0, largest=0):
+    """
+    Write a measured tree with its size annotations.
+
+    :param root: SizeNode from TreeWalker.measure().
+    :param display_root: Label of the root.
+    :param output_format: One of OUTPUT_FORMATS. The plain and rich trees are
+        followed by the largest files; json has them under 'largest'
+        (ndjson only has the entries).
+    :param file: Text stream for formats other than rich (defaults to stdout).
+    :param sort: Order of siblings (see arrange_tree()).
+    :param min_size: Hide entries smaller than this many bytes.
+    :param largest: Number of largest files to list.
+    """
+    top = largest_files(root, largest) if largest > 0 else []
+    arrange_tree(root, sort, min_size)
+    root_label = f"{display_root} {size_annotation(root.size, root.files)}"
+    top_lines = ["Largest files:"] + [
+        f"{format_size(node.size):>8}  {node.relative_path}" for node in top
+    ]
+
+    if output_format == "rich":
+        from rich.console import Console  # pylint: disable=import-outside-toplevel
+
+        console = Console()
+        console.print(build_rich_tree(iter_size_entries(root), root_label))
+        if top:
+            console.print("\n".join(top_lines), markup=False, highlight=False)
+        return
+
+    file = file or sys.stdout
+    if output_format == "json":
+        header = {
+            "size": root.size,
+            "files": root.files,
+            "largest": [{"path": node.relative_path, "size": node.size} for node in top],
+        }
+        write_stream(iter_size_entries(root), display_root, output_format, file, header)
+        return
+    write_stream(iter_size_entries(root), root_label, output_format, file)
+    if output_format == "plain" and top:
+        file.write("\n".join(top_lines) + "\n")
 
 
 def generate_tree(
@@ -457,6 +1705,15 @@ def generate_tree(
     follow_links=False,
     directory_allowlist=None,
     root_dir=".",
+    jobs=1,
+    output_format="rich",
+    file=None,
+    gitignore=False,
+    cache_path=None,
+    sizes=False,
+    sort="name",
+    min_size=0,
+    largest=0,
 ):
     """
     Generate a tree structure of the current directory excluding and including specific directories/files.
@@ -466,20 +1723,50 @@ def generate_tree(
     :param show_all: If True, display the entire file tree without any filters.
     :param follow_links: If True, follow symbolic links.
     :param root_dir: Directory to scan (defaults to the current directory).
+    :param jobs: Number of threads listing directories concurrently.
+    :param output_format: 'rich' builds and prints a rich tree; 'plain', 'json'
+        and 'ndjson' stream entries as they are found, without importing rich.
+    :param file: Text stream for the streaming formats (defaults to stdout).
+    :param gitignore: If True, skip what .gitignore files ignore.
+    :param cache_path: Optional listing cache file (see ListingCache), read
+        before and updated after the walk.
+    :param sizes: If True, annotate files with their sizes and directories
+        with the total size and number of files below them. The tree is
+        measured in full before it is written (see write_size_tree()).
+    :param sort: 'name' (default) or 'size', largest first; implies sizes.
+    :param min_size: Hide files and directories smaller than this many bytes;
+        implies sizes.
+    :param largest: With sizes, list this many of the largest files.
     """
-    console = Console()
+    sizes = sizes or sort == "size" or min_size > 0
+    cache = ListingCache.load(cache_path) if cache_path else None
     display_root = root_dir if root_dir not in {".", ""} else os.path.basename(os.getcwd()) or "."
-    tree = Tree(display_root)
-    add_items(
-        root_dir,
-        tree,
+    walker = TreeWalker(
         exclude_patterns,
         include_patterns,
         show_all,
-        follow_links=follow_links,
-        directory_allowlist=directory_allowlist,
+        follow_links,
+        directory_allowlist,
+        jobs,
+        gitignore,
+        cache,
+        sizes,
     )
-    console.print(tree)
+    if sizes:
+        write_size_tree(
+            walker.measure(root_dir), display_root, output_format, file, sort, min_size, largest
+        )
+    elif output_format != "rich":
+        write_stream(walker.iter_entries(root_dir), display_root, output_format, file or sys.stdout)
+    else:
+        from rich.console import Console  # pylint: disable=import-outside-toplevel
+        from rich.tree import Tree  # pylint: disable=import-outside-toplevel
+
+        tree = Tree(display_root)
+        walker.walk(root_dir, tree)
+        Console().print(tree)
+    if cache is not None:
+        cache.save()
 
 
 def load_patterns_from_env(var_name):
@@ -570,6 +1857,62 @@ def main():
         action="store_true",
         help="Follow symbolic links when scanning directories.",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="List directories in N threads (0 picks a default for I/O-bound work); "
+        "speeds up network filesystems. The output is the same.",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="rich",
+        help="Output format: 'rich' (default) renders the tree when the walk is done; "
+        "'plain', 'json' and 'ndjson' stream entries as they are found, without loading rich.",
+    )
+    parser.add_argument(
+        "-g",
+        "--gitignore",
+        action="store_true",
+        help="Skip files and directories ignored by .gitignore files (nested ones and "
+        "negations included); ignored directories are not scanned.",
+    )
+    parser.add_argument(
+        "-s",
+        "--sizes",
+        action="store_true",
+        help="Show file sizes, and the total size and number of files below each directory "
+        "(the tree is measured in full before it is written).",
+    )
+    parser.add_argument(
+        "--sort",
+        choices=SORT_KEYS,
+        default="name",
+        help="Order of the entries in a directory: 'name' (default) or 'size', largest first.",
+    )
+    parser.add_argument(
+        "--min-size",
+        type=parse_size,
+        default=0,
+        metavar="SIZE",
+        help="Hide files and directories smaller than SIZE (e.g. 500K, 10M, 1G).",
+    )
+    parser.add_argument(
+        "--largest",
+        type=int,
+        default=10,
+        metavar="N",
+        help="With sizes, list the N largest files after the tree (default 10, 0 to disable).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or update the listing cache, which serves unchanged "
+        "directories of repeated runs without reading them.",
+    )
     parser.add_argument(
         "-l",
         "--log-level",
@@ -592,6 +1935,10 @@ def main():
     logging_level = (args.log_level // 10) * 10
     logging.basicConfig(level=logging_level, format=f"{program_name} %(message)s")
 
+    if args.jobs < 0:
+        parser.error("--jobs must be zero or a positive integer")
+    jobs = args.jobs or min(32, (os.cpu_count() or 1) + 4)
+
     root_dir = args.root
     if not os.path.isdir(root_dir):
         logging.error("Root directory does not exist: %s", root_dir)
@@ -649,6 +1996,7 @@ def main():
 
     # Process follow_links argument
     follow_links = args.follow_links
+    cache_path = None if args.no_cache else default_cache_path(root_dir)
 
     if args.all:
         logging.debug("Displaying the entire file tree without any filters")
@@ -661,6 +2009,13 @@ def main():
             follow_links=follow_links,
             directory_allowlist=[],
             root_dir=root_dir,
+            jobs=jobs,
+            output_format=args.format,
+            cache_path=cache_path,
+            sizes=args.sizes,
+            sort=args.sort,
+            min_size=args.min_size,
+            largest=args.largest,
         )
     else:
         generate_tree(
@@ -670,6 +2025,14 @@ def main():
             follow_links=follow_links,
             directory_allowlist=include_directory_allowlist,
             root_dir=root_dir,
+            jobs=jobs,
+            output_format=args.format,
+            gitignore=args.gitignore,
+            cache_path=cache_path,
+            sizes=args.sizes,
+            sort=args.sort,
+            min_size=args.min_size,
+            largest=args.largest,
         )
 
 
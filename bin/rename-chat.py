@@ -2,12 +2,16 @@
 
 import os
 import re
-import json
+import sys
 from datetime import datetime
 from typing import Dict, Optional, List
 import argparse
 import glob
 
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+import chat_json
+from chat_names import FilenameAllocator, claim_path
+
 # Date/time formats
 FILENAME_DATE_FORMAT = "%Y-%m-%d-%H%M%S"
 DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
@@ -70,7 +74,8 @@ def generate_unique_filename(
     create_time: Optional[float],
     update_time: Optional[float],
     extension: str = "json",
-    out_dir: Optional[str] = None
+    out_dir: Optional[str] = None,
+    allocator: Optional[FilenameAllocator] = None,
 ) -> str:
     """
     Generate a unique filename of form:
@@ -78,9 +83,12 @@ def generate_unique_filename(
 
     - Fix timestamps if necessary.
     - Use create_time if update_time is missing.
-    - Check for collisions, append -NN if needed (max 99 collisions).
+    - Check for collisions, append -NN if needed (-01, -02, ... without limit).
+
+    The name is reserved in the allocator, which lists each directory once,
+    instead of probing the filesystem for every candidate.
 
-    Raises ValueError if we fail after 99 collisions.
+    Raises ValueError if create_time is invalid.
     """
 
     # Fix both timestamps
@@ -100,18 +108,9 @@ def generate_unique_filename(
     cleaned_title = sanitize_title(title)
 
     dir_path = out_dir if out_dir else os.path.dirname(input_file)
-    os.makedirs(dir_path, exist_ok=True)
-
     base_name = f"{ctime_str}_{utime_str}-{cleaned_title}"
-    filename = os.path.join(dir_path, f"{base_name}.{extension}")
-
-    counter = 0
-    while os.path.exists(filename):
-        counter += 1
-        if counter > 99:
-            raise ValueError(f"Too many duplicates for {filename}")
-        filename = os.path.join(dir_path, f"{base_name}-{counter:02d}.{extension}")
-    return filename
+    allocator = allocator if allocator is not None else FilenameAllocator()
+    return allocator.reserve(dir_path, base_name, extension)
 
 
 def load_json_file(file_path: str) -> Optional[Dict]:
@@ -119,8 +118,7 @@ def load_json_file(file_path: str) -> Optional[Dict]:
     Load JSON data from a file, returning a dict or None if invalid.
     """
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = chat_json.load_file(file_path)
         if isinstance(data, dict):
             return data
         print(f"Error: {file_path} did not contain a JSON object.")
@@ -129,16 +127,34 @@ def load_json_file(file_path: str) -> Optional[Dict]:
     return None
 
 
-def confirm_and_rename(old_path: str, new_path: str, auto_yes: bool) -> None:
+def confirm_and_rename(
+    old_path: str, new_path: str, auto_yes: bool, allocator: Optional[FilenameAllocator] = None
+) -> None:
+    """
+    Rename a file after confirmation, never overwriting an existing file.
+
+    Args:
+        old_path: Current path
+        new_path: New path, reserved in the allocator
+        auto_yes: Whether to skip the confirmation prompt
+        allocator: Allocator new_path was reserved in; unused names are released
+    """
     print(f"Would rename:\n  {old_path}\n-> {new_path}")
     if auto_yes or input("Proceed with rename? (y/n): ").lower().strip() == "y":
         try:
-            os.rename(old_path, new_path)
+            claim_path(new_path, old_path)
             print(f"Renamed to: {new_path}")
+            if allocator is not None:
+                allocator.release(old_path)
+            return
+        except FileExistsError:
+            print(f"Error renaming {old_path}: {new_path} already exists")
         except OSError as e:
             print(f"Error renaming {old_path}: {e}")
     else:
         print("Rename cancelled")
+    if allocator is not None:
+        allocator.release(new_path)
 
 
 def process_files(patterns: List[str], auto_yes: bool, destination_dir: Optional[str] = None) -> None:
@@ -170,13 +186,19 @@ def process_files(patterns: List[str], auto_yes: bool, destination_dir: Optional
         return
 
     print(f"Found {len(files_to_rename)} files.")
+    allocator = FilenameAllocator()
     for path in files_to_rename:
         if os.path.isfile(path) and path.lower().endswith(".json"):
             print(f"\nProcessing: {path}")
-            rename_one_json(path, auto_yes, destination_dir)
+            rename_one_json(path, auto_yes, destination_dir, allocator)
 
 
-def rename_one_json(file_path: str, auto_yes: bool, destination_dir: Optional[str] = None) -> None:
+def rename_one_json(
+    file_path: str,
+    auto_yes: bool,
+    destination_dir: Optional[str] = None,
+    allocator: Optional[FilenameAllocator] = None,
+) -> None:
     """
     Rename a single JSON file based on its metadata.
 
@@ -184,7 +206,9 @@ def rename_one_json(file_path: str, auto_yes: bool, destination_dir: Optional[st
         file_path: Path to the JSON file
         auto_yes: Whether to automatically confirm renames
         destination_dir: Optional directory to move renamed files to
+        allocator: Filename allocator shared by all renames of a run
     """
+    allocator = allocator if allocator is not None else FilenameAllocator()
     data = load_json_file(file_path)
     if not data:
         return
@@ -202,9 +226,10 @@ def rename_one_json(file_path: str, auto_yes: bool, destination_dir: Optional[st
 
     try:
         new_name = generate_unique_filename(
-            file_path, title, ctime, utime, extension="json", out_dir=destination_dir
+            file_path, title, ctime, utime, extension="json", out_dir=destination_dir,
+            allocator=allocator,
         )
-        confirm_and_rename(file_path, new_name, auto_yes)
+        confirm_and_rename(file_path, new_name, auto_yes, allocator)
     except ValueError as e:
         # Possibly creation time is invalid, fallback to file stat times
         print(f"Error generating name for {file_path}: {e}")
@@ -214,9 +239,10 @@ def rename_one_json(file_path: str, auto_yes: bool, destination_dir: Optional[st
             utime = st.st_mtime
             print("Using file system timestamps as fallback.")
             new_name = generate_unique_filename(
-                file_path, title, ctime, utime, extension="json", out_dir=destination_dir
+                file_path, title, ctime, utime, extension="json", out_dir=destination_dir,
+                allocator=allocator,
             )
-            confirm_and_rename(file_path, new_name, auto_yes)
+            confirm_and_rename(file_path, new_name, auto_yes, allocator)
         except (OSError, ValueError) as e2:
             print(f"Failed fallback for {file_path}: {e2}")
 
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+"""
+Synthetic directory tree generator and benchmark harness for filetree.
+
+The cost of filetree on large checkouts and network mounts is dominated by
+directory listings. This script generates reproducible synthetic trees and
+times the filetree walker on them with different numbers of listing threads
+(--jobs), both as-is and with an injected per-listing latency that stands in
+for the round trip of a network filesystem.
+
+Generator parameters:
+- Depth of the tree and subdirectories per directory
+- Files per directory and share of files matching the include pattern
+- Random seed, so every tree can be regenerated exactly
+
+Each run reports, per thread count and latency, the best walk time over the
+repeats and the speedup over a single thread. Only the walk is timed; the tree
+is not rendered.
+
+Usage:
+    python treebench.py generate /tmp/tree --depth 4 --fanout 6 --files 20
+    python treebench.py run /tmp/tree --jobs 1 4 16 --latency 0 2 --json results.json
+    python treebench.py run --depth 3 --fanout 8
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterator, List
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+import filetree
+
+EXTENSIONS = (".py", ".md", ".txt", ".json", ".log", ".c")
+EXCLUDES = ["*.log", "__pycache__", "node_modules"]
+INCLUDES = ["*.py", "*.md"]
+
+
+# -----------------------------------------------------------------------------
+# Tree Generation
+# -----------------------------------------------------------------------------
+def generate_tree(
+    root: str,
+    depth: int = 4,
+    fanout: int = 6,
+    files: int = 20,
+    seed: int = 0,
+) -> Dict[str, int]:
+    """
+    Create a deterministic synthetic directory tree.
+
+    Every directory above 'depth' has 'fanout' subdirectories, and every
+    directory holds 'files' empty files with a mix of extensions.
+
+    Args:
+        root: Directory to create the tree in (created if missing)
+        depth: Levels of subdirectories below root
+        fanout: Subdirectories per directory
+        files: Files per directory
+        seed: Random seed for the file name mix
+
+    Returns:
+        Dict with the number of 'directories' and 'files' created
+    """
+    rng = random.Random(seed)
+    counts = {"directories": 0, "files": 0}
+    pending = [(root, 0)]
+    while pending:
+        dir_path, level = pending.pop()
+        os.makedirs(dir_path, exist_ok=True)
+        counts["directories"] += 1
+        for index in range(files):
+            name = f"file{index:03d}{rng.choice(EXTENSIONS)}"
+            with open(os.path.join(dir_path, name), "w", encoding="utf-8"):
+                counts["files"] += 1
+        if level < depth:
+            pending.extend(
+                (os.path.join(dir_path, f"dir{index:02d}"), level + 1) for index in range(fanout)
+            )
+    return counts
+
+
+# -----------------------------------------------------------------------------
+# Benchmark
+# -----------------------------------------------------------------------------
+@contextlib.contextmanager
+def injected_latency(seconds: float) -> Iterator[None]:
+    """
+    Delay every directory listing of filetree by a fixed time.
+
+    The delay is a sleep, which like real network I/O releases the GIL, so it
+    models a filesystem whose listings are bound by round-trip latency.
+
+    Args:
+        seconds: Delay added to each listing (0 disables the injection)
+    """
+    if seconds <= 0:
+        yield
+        return
+    scan_directory = filetree.scan_directory
+
+    def slow_scan_directory(dir_path):
+        time.sleep(seconds)
+        return scan_directory(dir_path)
+
+    filetree.scan_directory = slow_scan_directory
+    try:
+        yield
+    finally:
+        filetree.scan_directory = scan_directory
+
+
+def walk(root: str, jobs: int) -> bool:
+    """Walk a tree with the benchmark patterns, without rendering it."""
+    exclude_patterns = filetree.normalize_patterns(EXCLUDES)
+    include_patterns = filetree.normalize_patterns(INCLUDES, treat_as_include=True)
+    tree = filetree.Tree(root)
+    return filetree.add_items(root, tree, exclude_patterns, include_patterns, jobs=jobs)
+
+
+def best_time(func: Callable[[], object], repeat: int) -> float:
+    """Return the fastest of 'repeat' timed calls to func."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(
+    root: str,
+    jobs_list: List[int],
+    latencies_ms: List[float],
+    repeat: int = 1,
+) -> List[Dict]:
+    """
+    Time the filetree walker for every combination of threads and latency.
+
+    Args:
+        root: Tree to walk
+        jobs_list: Thread counts to compare
+        latencies_ms: Injected latencies per listing, in milliseconds
+        repeat: Runs per combination (the best time is reported)
+
+    Returns:
+        List of dicts with 'latency_ms', 'jobs', 'seconds' and 'speedup' (over
+        the first thread count at the same latency)
+    """
+    results = []
+    for latency_ms in latencies_ms:
+        baseline = None
+        with injected_latency(latency_ms / 1000):
+            for jobs in jobs_list:
+                seconds = best_time(lambda jobs=jobs: walk(root, jobs), repeat)
+                baseline = baseline or seconds
+                results.append(
+                    {
+                        "latency_ms": latency_ms,
+                        "jobs": jobs,
+                        "seconds": seconds,
+                        "speedup": baseline / seconds if seconds else 0.0,
+                    }
+                )
+    return results
+
+
+def print_results(results: List[Dict]) -> None:
+    """Print benchmark results as an aligned table."""
+    print(f"{'latency ms':>10} {'jobs':>5} {'seconds':>10} {'speedup':>8}")
+    for result in results:
+        print(
+            f"{result['latency_ms']:>10g} {result['jobs']:>5} "
+            f"{result['seconds']:>10.3f} {result['speedup']:>7.2f}x"
+        )
+
+
+# -----------------------------------------------------------------------------
+# Command Line
+# -----------------------------------------------------------------------------
+def add_generator_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the tree generator options to a parser."""
+    parser.add_argument("--depth", type=int, default=3, help="Levels of subdirectories")
+    parser.add_argument("--fanout", type=int, default=6, help="Subdirectories per directory")
+    parser.add_argument("--files", type=int, default=20, help="Files per directory")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+
+def main():
+    """
+    Main entry point for the script.
+
+    Subcommands:
+    - generate: write a synthetic directory tree
+    - run: benchmark the filetree walker on a tree (generated on the fly if omitted)
+    """
+    parser = argparse.ArgumentParser(description="Synthetic directory tree generator and filetree benchmark.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = subparsers.add_parser("generate", help="Write a synthetic directory tree")
+    generate_parser.add_argument("output", help="Directory to create the tree in")
+    add_generator_arguments(generate_parser)
+
+    run_parser = subparsers.add_parser("run", help="Benchmark the filetree walker")
+    run_parser.add_argument("root", nargs="?", help="Tree to benchmark (default: generate one)")
+    add_generator_arguments(run_parser)
+    run_parser.add_argument(
+        "-j", "--jobs", type=int, nargs="+", default=[1, 4, 16], help="Listing thread counts to compare"
+    )
+    run_parser.add_argument(
+        "--latency", type=float, nargs="+", default=[0.0, 2.0],
+        help="Latencies to inject per directory listing, in milliseconds"
+    )
+    run_parser.add_argument("-r", "--repeat", type=int, default=1, help="Runs per combination (best is reported)")
+    run_parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        counts = generate_tree(args.output, args.depth, args.fanout, args.files, args.seed)
+        print(f"Wrote {counts['directories']} directories and {counts['files']} files to {args.output}")
+        return
+
+    with tempfile.TemporaryDirectory(prefix="treebench-") as tmp_dir:
+        root = args.root
+        if not root:
+            root = os.path.join(tmp_dir, "tree")
+            counts = generate_tree(root, args.depth, args.fanout, args.files, args.seed)
+            print(f"Generated {counts['directories']} directories and {counts['files']} files, seed {args.seed}")
+        results = run_benchmark(
+            root, [max(1, jobs) for jobs in args.jobs], args.latency, max(1, args.repeat)
+        )
+
+    print_results(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"root": args.root, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Unit tests for bin.chat_json JSON decoding backends."""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+import tempfile
+import types
+import unittest
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+CHAT_JSON_PATH = PROJECT_ROOT / "bin" / "chat_json.py"
+
+
+def _load_chat_json_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("chat_json_module", CHAT_JSON_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load chat_json module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+CHAT_JSON = _load_chat_json_module()
+
+DOCUMENT = {
+    "title": "café “quoted” 日本語 \U0001f600",
+    "create_time": 1700000000.123456,
+    "mapping": {"a": {"parent": None, "children": [], "message": None}},
+    "flags": [True, False, None, -1, 0.5, 2 ** 63 - 1],
+}
+
+
+class BackendTests(unittest.TestCase):
+    """Every installed backend must decode like json.loads()."""
+
+    def test_json_is_always_available(self) -> None:
+        self.assertIn("json", CHAT_JSON.available_backends())
+        self.assertIn(CHAT_JSON.BACKEND, CHAT_JSON.BACKENDS)
+
+    def test_backends_match_stdlib(self) -> None:
+        raw = json.dumps(DOCUMENT, ensure_ascii=False).encode("utf-8")
+        for name in CHAT_JSON.available_backends():
+            with self.subTest(backend=name):
+                self.assertEqual(CHAT_JSON.make_loads(name)(raw), DOCUMENT)
+
+    def test_stdlib_only_documents_fall_back(self) -> None:
+        for raw in (b'{"x": NaN}', b'[Infinity, -Infinity]', b'"\\ud800"'):
+            expected = json.loads(raw)
+            for name in CHAT_JSON.available_backends():
+                with self.subTest(backend=name, raw=raw):
+                    self.assertEqual(repr(CHAT_JSON.make_loads(name)(raw)), repr(expected))
+
+    def test_invalid_json_raises_value_error(self) -> None:
+        for name in CHAT_JSON.available_backends():
+            with self.subTest(backend=name):
+                with self.assertRaises(ValueError):
+                    CHAT_JSON.make_loads(name)(b'{"unterminated": ')
+
+    def test_unknown_backend_is_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            CHAT_JSON.make_loads("yaml")
+
+    def test_load_file_reads_bytes(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "chat.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(DOCUMENT, f, ensure_ascii=False)
+            self.assertEqual(CHAT_JSON.load_file(path), DOCUMENT)
+
+
+if __name__ == "__main__":
+    unittest.main()
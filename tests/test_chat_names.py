@@ -0,0 +1,105 @@
+"""Unit tests for bin.chat_names output filename allocation."""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import tempfile
+import threading
+import types
+import unittest
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+CHAT_NAMES_PATH = PROJECT_ROOT / "bin" / "chat_names.py"
+
+
+def _load_chat_names_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("chat_names_module", CHAT_NAMES_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load chat_names module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+CHAT_NAMES = _load_chat_names_module()
+
+
+class FilenameAllocatorTests(unittest.TestCase):
+    """Names are unique, unbounded and claimed without overwriting."""
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp_dir = self._tmp.name
+        self.allocator = CHAT_NAMES.FilenameAllocator()
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_existing_files_are_skipped(self) -> None:
+        open(os.path.join(self.tmp_dir, "chat.md"), "w").close()
+        self.assertEqual(
+            self.allocator.reserve(self.tmp_dir, "chat", "md"),
+            os.path.join(self.tmp_dir, "chat-01.md"),
+        )
+
+    def test_no_duplicate_limit(self) -> None:
+        names = [self.allocator.reserve(self.tmp_dir, "chat", "md") for _ in range(150)]
+        self.assertEqual(len(set(names)), 150)
+        self.assertEqual(os.path.basename(names[-1]), "chat-149.md")
+
+    def test_directory_is_created_and_listed_once(self) -> None:
+        out_dir = os.path.join(self.tmp_dir, "out")
+        self.allocator.reserve(out_dir, "chat", "md")
+        self.assertTrue(os.path.isdir(out_dir))
+        # A file appearing later is not seen by reserve(), only by create()
+        open(os.path.join(out_dir, "other.md"), "w").close()
+        self.assertEqual(
+            self.allocator.reserve(out_dir, "other", "md"), os.path.join(out_dir, "other.md")
+        )
+
+    def test_create_skips_names_taken_since_listing(self) -> None:
+        self.allocator.reserve(self.tmp_dir, "warmup", "md")
+        with open(os.path.join(self.tmp_dir, "chat.md"), "w", encoding="utf-8") as f:
+            f.write("someone else's")
+
+        path = self.allocator.create(self.tmp_dir, "chat", "md")
+
+        self.assertEqual(path, os.path.join(self.tmp_dir, "chat-01.md"))
+        with open(os.path.join(self.tmp_dir, "chat.md"), encoding="utf-8") as f:
+            self.assertEqual(f.read(), "someone else's")
+
+    def test_create_moves_source_file(self) -> None:
+        source = os.path.join(self.tmp_dir, ".tmp")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write("rendered")
+
+        path = self.allocator.create(self.tmp_dir, "chat", "md", source_path=source)
+
+        self.assertFalse(os.path.exists(source))
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "rendered")
+
+    def test_release_frees_name(self) -> None:
+        path = self.allocator.reserve(self.tmp_dir, "chat", "md")
+        self.allocator.release(path)
+        self.assertEqual(self.allocator.reserve(self.tmp_dir, "chat", "md"), path)
+
+    def test_concurrent_reservations_are_unique(self) -> None:
+        names = []
+
+        def reserve_many() -> None:
+            for _ in range(100):
+                names.append(self.allocator.reserve(self.tmp_dir, "chat", "md"))
+
+        threads = [threading.Thread(target=reserve_many) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(names)), 800)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""Unit tests for bin.chatbench corpus generation and benchmark harness."""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+import tempfile
+import types
+import unittest
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+CHATBENCH_PATH = PROJECT_ROOT / "bin" / "chatbench.py"
+
+
+def _load_chatbench_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("chatbench_module", CHATBENCH_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load chatbench module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+CHATBENCH = _load_chatbench_module()
+
+
+class CorpusGeneratorTests(unittest.TestCase):
+    """Generated conversations must have the export mapping shape."""
+
+    def test_mapping_links_are_consistent(self) -> None:
+        generator = CHATBENCH.CorpusGenerator(seed=3, depth=12, regenerate_rate=0.5, tool_rate=0.5)
+        for conversation in generator.conversations(5):
+            mapping = conversation["mapping"]
+            roots = [node_id for node_id, node in mapping.items() if not node["parent"]]
+            self.assertEqual(len(roots), 1)
+            for node_id, node in mapping.items():
+                for child_id in node["children"]:
+                    self.assertEqual(mapping[child_id]["parent"], node_id)
+            sequence = CHATBENCH.extract_chat.build_message_sequence(mapping)
+            self.assertEqual(sorted(sequence), sorted(mapping))
+            branch = CHATBENCH.extract_chat.build_message_sequence(
+                mapping, conversation["current_node"]
+            )
+            self.assertEqual(branch[0], roots[0])
+            self.assertGreaterEqual(len(branch), 13)
+
+    def test_same_seed_gives_same_corpus(self) -> None:
+        first = list(CHATBENCH.CorpusGenerator(seed=7).conversations(3))
+        second = list(CHATBENCH.CorpusGenerator(seed=7).conversations(3))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, list(CHATBENCH.CorpusGenerator(seed=8).conversations(3)))
+
+
+class BenchmarkHarnessTests(unittest.TestCase):
+    """The harness reports every phase for every format."""
+
+    def test_run_benchmark_reports_all_phases(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            corpus = os.path.join(tmp_dir, "conversations.json")
+            CHATBENCH.write_corpus(corpus, CHATBENCH.CorpusGenerator(depth=6), 4)
+            with open(corpus, encoding="utf-8") as f:
+                self.assertEqual(len(json.load(f)), 4)
+
+            results = CHATBENCH.run_benchmark(corpus, ["markdown", "html"])
+
+        phases = [(result["phase"], result["format"]) for result in results]
+        self.assertEqual(phases[0], ("load", "-"))
+        for phase in (("decode", "json"), ("traverse", "-"), ("clean", "-")):
+            self.assertIn(phase, phases)
+        for out_fmt in ("markdown", "html"):
+            for phase in ("render", "write", "end-to-end", "index"):
+                self.assertIn((phase, out_fmt), phases)
+        self.assertTrue(all(result["peak_rss_mb"] > 0 for result in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+"""Unit tests for bin.extract_chat packed archive output."""
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import types
+import unittest
+import zipfile
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+EXTRACT_CHAT_PATH = PROJECT_ROOT / "bin" / "extract_chat.py"
+
+
+def _load_extract_chat_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("extract_chat_module", EXTRACT_CHAT_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load extract_chat module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+EXTRACT_CHAT = _load_extract_chat_module()
+
+
+def _conversation(conversation_id: str, title: str, text: str) -> dict:
+    return {
+        "conversation_id": conversation_id,
+        "title": title,
+        "create_time": 1700000000,
+        "update_time": 1700000100,
+        "mapping": {
+            "root": {"id": "root", "parent": None, "children": ["m1"]},
+            "m1": {
+                "id": "m1",
+                "parent": "root",
+                "children": [],
+                "message": {
+                    "author": {"role": "user"},
+                    "create_time": 1700000000,
+                    "content": {"content_type": "text", "parts": [text]},
+                },
+            },
+        },
+    }
+
+
+class ArchiveOutputTests(unittest.TestCase):
+    """Validate --archive packing and its index member."""
+
+    def test_conversations_are_packed_with_index(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            export_path = os.path.join(tmp_dir, "conversations.json")
+            archive_path = os.path.join(tmp_dir, "out", "chats.zip")
+            with open(export_path, "w", encoding="utf-8") as f:
+                json.dump([
+                    _conversation("a", "Same", "first"),
+                    _conversation("b", "Same", "second"),
+                    {"title": "broken", "mapping": {"x": {"parent": None, "children": ["y"]}}},
+                ], f)
+
+            with redirect_stdout(io.StringIO()):
+                errors = EXTRACT_CHAT.process_file_patterns(
+                    [export_path], None, "markdown", archive_path=archive_path
+                )
+
+            self.assertEqual(len(errors), 1)
+            self.assertEqual(os.listdir(os.path.dirname(archive_path)), ["chats.zip"])
+            with zipfile.ZipFile(archive_path) as archive:
+                index = json.loads(archive.read(EXTRACT_CHAT.ARCHIVE_INDEX_NAME))
+                entries = {entry["conversation_id"]: entry for entry in index["conversations"]}
+                self.assertEqual(set(entries), {"a", "b"})
+                self.assertNotEqual(entries["a"]["member"], entries["b"]["member"])
+                self.assertTrue(entries["b"]["member"].endswith("-Same-01.md"))
+                self.assertIn("second", archive.read(entries["b"]["member"]).decode("utf-8"))
+                info = archive.getinfo(entries["a"]["member"])
+                self.assertEqual(entries["a"]["header_offset"], info.header_offset)
+                self.assertEqual(entries["a"]["size"], info.file_size)
+
+    def test_allocate_name_never_reuses_index_member(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            writer = EXTRACT_CHAT.ArchiveWriter(os.path.join(tmp_dir, "a.zip"))
+            self.assertEqual(writer.allocate_name("index", "json"), "index-01.json")
+            self.assertEqual(writer.allocate_name("x", "md"), "x.md")
+            self.assertEqual(writer.allocate_name("x", "md"), "x-01.md")
+            writer.close()
+            self.assertFalse(os.path.exists(writer.temp_path))
+
+    def test_interrupted_run_keeps_existing_archive(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            export_path = os.path.join(tmp_dir, "conversations.json")
+            archive_path = os.path.join(tmp_dir, "chats.zip")
+            with open(export_path, "w", encoding="utf-8") as f:
+                json.dump([_conversation("a", "Kept", "first")], f)
+            with redirect_stdout(io.StringIO()):
+                EXTRACT_CHAT.process_file_patterns(
+                    [export_path], None, "markdown", archive_path=archive_path
+                )
+            with open(archive_path, "rb") as f:
+                complete = f.read()
+
+            with redirect_stdout(io.StringIO()), mock.patch.object(
+                EXTRACT_CHAT, "render_conversation_job", side_effect=KeyboardInterrupt
+            ), self.assertRaises(KeyboardInterrupt):
+                EXTRACT_CHAT.process_file_patterns(
+                    [export_path], None, "markdown", archive_path=archive_path
+                )
+
+            with open(archive_path, "rb") as f:
+                self.assertEqual(f.read(), complete)
+            self.assertFalse(os.path.exists(f"{archive_path}.tmp"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""Unit tests for bin.extract_chat current-branch traversal."""
+
+from __future__ import annotations
+
+import importlib.util
+import types
+import unittest
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+EXTRACT_CHAT_PATH = PROJECT_ROOT / "bin" / "extract_chat.py"
+
+
+def _load_extract_chat_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("extract_chat_module", EXTRACT_CHAT_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load extract_chat module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+EXTRACT_CHAT = _load_extract_chat_module()
+
+
+def _node(node_id: str, parent: str | None, children: list, role: str = "", text: str = "") -> dict:
+    node = {"id": node_id, "parent": parent, "children": children}
+    if role:
+        node["message"] = {
+            "author": {"role": role},
+            "create_time": 1700000000,
+            "content": {"content_type": "text", "parts": [text]},
+        }
+    return node
+
+
+def _regenerated_conversation() -> dict:
+    """A question whose answer was regenerated once; 'a2' is the current answer."""
+    mapping = {
+        "root": _node("root", None, ["q"]),
+        "q": _node("q", "root", ["a1", "a2"], "user", "question"),
+        "a1": _node("a1", "q", [], "assistant", "abandoned answer"),
+        "a2": _node("a2", "q", ["f"], "assistant", "current answer"),
+        "f": _node("f", "a2", [], "user", "follow-up"),
+    }
+    return {
+        "title": "Branches",
+        "create_time": 1700000000,
+        "update_time": 1700000100,
+        "current_node": "f",
+        "mapping": mapping,
+    }
+
+
+class BranchTraversalTests(unittest.TestCase):
+    """Validate --branch current versus the full-tree traversal."""
+
+    def test_current_branch_follows_parents(self) -> None:
+        mapping = _regenerated_conversation()["mapping"]
+        self.assertEqual(
+            EXTRACT_CHAT.build_message_sequence(mapping, "f"),
+            ["root", "q", "a2", "f"],
+        )
+
+    def test_full_tree_is_default(self) -> None:
+        mapping = _regenerated_conversation()["mapping"]
+        self.assertEqual(
+            EXTRACT_CHAT.build_message_sequence(mapping),
+            ["root", "q", "a1", "a2", "f"],
+        )
+
+    def test_unknown_current_node_falls_back_to_full_tree(self) -> None:
+        mapping = _regenerated_conversation()["mapping"]
+        self.assertEqual(
+            EXTRACT_CHAT.build_message_sequence(mapping, "missing"),
+            EXTRACT_CHAT.build_message_sequence(mapping),
+        )
+
+    def test_parent_cycle_terminates(self) -> None:
+        mapping = {"a": {"parent": "b"}, "b": {"parent": "a"}}
+        self.assertEqual(EXTRACT_CHAT.build_branch_sequence(mapping, "a"), ["b", "a"])
+
+    def test_render_current_branch_omits_abandoned_messages(self) -> None:
+        data = _regenerated_conversation()
+        current = "".join(EXTRACT_CHAT.render_conversation(data, "markdown", branch="current"))
+        full = "".join(EXTRACT_CHAT.render_conversation(data, "markdown"))
+        self.assertIn("abandoned answer", full)
+        self.assertNotIn("abandoned answer", current)
+        self.assertIn("current answer", current)
+        self.assertIn("follow-up", current)
+
+    def test_output_variant_separates_branch_modes(self) -> None:
+        self.assertEqual(EXTRACT_CHAT.output_variant("markdown", "all"), "markdown")
+        self.assertEqual(
+            EXTRACT_CHAT.output_variant("markdown", "current"), "markdown:current"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
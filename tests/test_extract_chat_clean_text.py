@@ -0,0 +1,92 @@
+"""Differential tests for bin.extract_chat.clean_text."""
+
+from __future__ import annotations
+
+import importlib.util
+import random
+import types
+import unicodedata
+import unittest
+from pathlib import Path
+
+import ftfy
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+EXTRACT_CHAT_PATH = PROJECT_ROOT / "bin" / "extract_chat.py"
+
+
+def _load_extract_chat_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("extract_chat_module", EXTRACT_CHAT_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load extract_chat module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+EXTRACT_CHAT = _load_extract_chat_module()
+
+
+def _reference_clean_text(text: str) -> str:
+    """The original per-character implementation of clean_text."""
+    text = ftfy.fix_text(text)
+    text = unicodedata.normalize("NFC", text)
+    cleaned = []
+    for ch in text:
+        if unicodedata.category(ch).startswith("C") and ch not in ("\n", "\r", "\t"):
+            continue
+        cleaned.append(ch)
+    return "".join(cleaned)
+
+
+ALPHABET = (
+    [chr(cp) for cp in range(0x80)]
+    + list("éüñ中文ß€“”‘’…—ﬁＡ \u0085​‍ ‮﻿\U000f0000͸\U0001f600")
+    + ["é", "&amp;", "&lt;", "<b>", "\r\n", "\x1b[31m", "\x1b[0m", "Ã©", "â€™"]
+)
+
+
+class CleanTextDifferentialTests(unittest.TestCase):
+    """clean_text must match the original implementation exactly."""
+
+    def test_fixed_cases(self) -> None:
+        cases = [
+            "",
+            "plain ascii text\twith tab\nand newline",
+            "nul\x00 bell\x07 form\x0c feed del\x7f",
+            "fish &amp; chips",
+            "<p>fish &amp; chips</p>",
+            "windows\r\nline\rbreaks",
+            "\x1b[1;31mred\x1b[0m text",
+            "mojibake: Ã©tÃ© â€œquotedâ€\x9d",
+            "decomposed é and zero​width",
+            "private  and unassigned ͸",
+        ]
+        for text in cases:
+            with self.subTest(text=text):
+                self.assertEqual(EXTRACT_CHAT.clean_text(text), _reference_clean_text(text))
+
+    def test_random_strings(self) -> None:
+        rng = random.Random(1234)
+        for _ in range(2000):
+            text = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 40)))
+            self.assertEqual(
+                EXTRACT_CHAT.clean_text(text),
+                _reference_clean_text(text),
+                msg=repr(text),
+            )
+
+    def test_random_ascii_strings(self) -> None:
+        rng = random.Random(5678)
+        ascii_alphabet = ALPHABET[:0x80]
+        for _ in range(2000):
+            text = "".join(rng.choice(ascii_alphabet) for _ in range(rng.randint(0, 40)))
+            self.assertEqual(
+                EXTRACT_CHAT.clean_text(text),
+                _reference_clean_text(text),
+                msg=repr(text),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+"""Unit tests for bin.extract_chat tool payload deduplication."""
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import types
+import unittest
+import zipfile
+from contextlib import redirect_stdout
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+EXTRACT_CHAT_PATH = PROJECT_ROOT / "bin" / "extract_chat.py"
+
+
+def _load_extract_chat_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("extract_chat_module", EXTRACT_CHAT_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load extract_chat module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+EXTRACT_CHAT = _load_extract_chat_module()
+
+LARGE_RESULT = "search result line\n\n\n" * 200
+
+
+def _conversation(title: str, tool_content: dict) -> dict:
+    return {
+        "title": title,
+        "create_time": 1700000000,
+        "update_time": 1700000100,
+        "mapping": {
+            "root": {"id": "root", "parent": None, "children": ["m1"]},
+            "m1": {
+                "id": "m1",
+                "parent": "root",
+                "children": ["m2"],
+                "message": {
+                    "author": {"role": "user"},
+                    "create_time": 1700000000,
+                    "content": {"content_type": "text", "parts": ["look it up"]},
+                },
+            },
+            "m2": {
+                "id": "m2",
+                "parent": "m1",
+                "children": [],
+                "message": {
+                    "author": {"role": "tool"},
+                    "create_time": 1700000001,
+                    "content": tool_content,
+                },
+            },
+        },
+    }
+
+
+def _browsing(result: str) -> dict:
+    return {"content_type": "tether_browsing_display", "result": result}
+
+
+class BlobStoreTests(unittest.TestCase):
+    """Validate blob identification and per-conversation bookkeeping."""
+
+    def test_small_payloads_are_not_shared(self) -> None:
+        store = EXTRACT_CHAT.BlobStore(min_size=10)
+        self.assertIsNone(store.reference("short"))
+        self.assertEqual(store.take_new(), {})
+
+    def test_repeated_payload_is_normalized_once(self) -> None:
+        store = EXTRACT_CHAT.BlobStore(min_size=10)
+        first = store.reference("a\n\n\nlong payload")
+        self.assertEqual(store.take_new(), {first: "a\nlong payload"})
+        self.assertEqual(store.reference("a\n\n\nlong payload"), first)
+        self.assertEqual(store.take_new(), {})
+
+    def test_discarded_blobs_are_sent_again(self) -> None:
+        store = EXTRACT_CHAT.BlobStore(min_size=10)
+        blob_id = store.reference("long payload one")
+        store.discard_new()
+        store.reference("long payload one")
+        self.assertIn(blob_id, store.take_new())
+
+    def test_blobs_are_tracked_per_output_directory(self) -> None:
+        store = EXTRACT_CHAT.BlobStore(min_size=10)
+        store.begin("a")
+        blob_id = store.reference("long payload one")
+        store.take_new()
+        store.begin("b")
+        store.reference("long payload one")
+        self.assertIn(blob_id, store.take_new())
+
+
+class DedupExtractionTests(unittest.TestCase):
+    """Repeated tool payloads are written once and linked."""
+
+    def _write_export(self, tmp_dir: str) -> str:
+        export_path = os.path.join(tmp_dir, "conversations.json")
+        with open(export_path, "w", encoding="utf-8") as f:
+            json.dump([
+                _conversation("One", _browsing(LARGE_RESULT)),
+                _conversation("Two", _browsing(LARGE_RESULT)),
+                _conversation("Three", _browsing("small result")),
+            ], f)
+        return export_path
+
+    def test_files_link_to_single_blob(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            out_dir = os.path.join(tmp_dir, "out")
+            with redirect_stdout(io.StringIO()):
+                errors = EXTRACT_CHAT.process_file_patterns(
+                    [self._write_export(tmp_dir)], out_dir, "markdown", dedup=True
+                )
+            self.assertEqual(errors, [])
+
+            (blob_name,) = os.listdir(os.path.join(out_dir, EXTRACT_CHAT.BLOB_DIR))
+            with open(os.path.join(out_dir, EXTRACT_CHAT.BLOB_DIR, blob_name), encoding="utf-8") as f:
+                self.assertEqual(f.read(), EXTRACT_CHAT.normalize_newlines(LARGE_RESULT))
+
+            outputs = {}
+            for name in os.listdir(out_dir):
+                if name.endswith(".md"):
+                    with open(os.path.join(out_dir, name), encoding="utf-8") as f:
+                        outputs[name.rsplit("-", 1)[1]] = f.read()
+            link = f"({EXTRACT_CHAT.BLOB_DIR}/{blob_name})"
+            self.assertIn(link, outputs["One.md"])
+            self.assertIn(link, outputs["Two.md"])
+            self.assertNotIn("search result line", outputs["Two.md"])
+            self.assertIn("small result", outputs["Three.md"])
+
+    def test_archive_stores_blob_member_once(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            archive_path = os.path.join(tmp_dir, "chats.zip")
+            with redirect_stdout(io.StringIO()):
+                EXTRACT_CHAT.process_file_patterns(
+                    [self._write_export(tmp_dir)], None, "html",
+                    archive_path=archive_path, dedup=True,
+                )
+            with zipfile.ZipFile(archive_path) as archive:
+                blobs = [
+                    name for name in archive.namelist()
+                    if name.startswith(EXTRACT_CHAT.BLOB_DIR + "/")
+                ]
+                self.assertEqual(len(blobs), 1)
+                self.assertIn(f'href="{blobs[0]}"', archive.read(
+                    [n for n in archive.namelist() if n.endswith("-Two.html")][0]
+                ).decode("utf-8"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+"""Unit tests for bin.extract_chat conversation and role filters."""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import types
+import unittest
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+EXTRACT_CHAT_PATH = PROJECT_ROOT / "bin" / "extract_chat.py"
+
+
+def _load_extract_chat_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("extract_chat_module", EXTRACT_CHAT_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load extract_chat module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+EXTRACT_CHAT = _load_extract_chat_module()
+
+MAY_1 = datetime(2024, 5, 1, 12).timestamp()
+JUNE_1 = datetime(2024, 6, 1, 12).timestamp()
+
+
+def _conversation(title: str, create_time: float, update_time: float) -> dict:
+    mapping = {"root": {"id": "root", "parent": None, "children": ["m1"]}}
+    turns = [("system", "be brief"), ("user", "question"), ("assistant", "answer")]
+    for index, (role, text) in enumerate(turns, start=1):
+        mapping[f"m{index}"] = {
+            "id": f"m{index}",
+            "parent": "root" if index == 1 else f"m{index - 1}",
+            "children": [f"m{index + 1}"] if index < len(turns) else [],
+            "message": {
+                "author": {"role": role},
+                "create_time": create_time,
+                "content": {"content_type": "text", "parts": [text]},
+            },
+        }
+    return {
+        "title": title,
+        "create_time": create_time,
+        "update_time": update_time,
+        "mapping": mapping,
+    }
+
+
+class ScanTopLevelTests(unittest.TestCase):
+    """Top-level members are decoded without decoding nested values."""
+
+    def test_skips_nested_values_containing_brackets(self) -> None:
+        raw = b'{"mapping": {"a": ["}", {"b": "]\\""}]}, "title": "T", "create_time": 5}'
+        self.assertEqual(
+            EXTRACT_CHAT.scan_top_level(raw, ["title", "create_time"]),
+            ({"title": "T", "create_time": 5}, True),
+        )
+
+    def test_missing_key_is_conclusive_at_end_of_object(self) -> None:
+        self.assertEqual(EXTRACT_CHAT.scan_top_level(b'{"title": "T"}', ["update_time"]), ({}, True))
+
+    def test_truncated_prefix_is_inconclusive(self) -> None:
+        self.assertEqual(
+            EXTRACT_CHAT.scan_top_level(b'{"title": "T", "mapping": {"a": [1, 2', ["update_time"]),
+            ({}, False),
+        )
+        self.assertEqual(
+            EXTRACT_CHAT.scan_top_level(b'{"create_time": 17000', ["create_time"]), ({}, False)
+        )
+
+    def test_stops_after_last_requested_key(self) -> None:
+        raw = b'{"title": "T", "mapping": {not json at all'
+        self.assertEqual(EXTRACT_CHAT.scan_top_level(raw, ["title"]), ({"title": "T"}, True))
+
+
+class ConversationFilterTests(unittest.TestCase):
+    """Date windows overlap the conversation lifetime; titles use re.search."""
+
+    def test_date_window_overlap(self) -> None:
+        selector = EXTRACT_CHAT.ConversationFilter(since=MAY_1 + 10, until=JUNE_1)
+        self.assertTrue(selector.matches({"create_time": MAY_1, "update_time": JUNE_1}))
+        self.assertFalse(selector.matches({"create_time": MAY_1, "update_time": MAY_1}))
+        self.assertFalse(selector.matches({"create_time": JUNE_1 + 10}))
+        self.assertFalse(selector.matches({}))
+
+    def test_millisecond_timestamps_are_fixed(self) -> None:
+        selector = EXTRACT_CHAT.ConversationFilter(since=MAY_1 - 10)
+        self.assertTrue(selector.matches({"create_time": MAY_1 * 1000}))
+
+    def test_title_regex(self) -> None:
+        selector = EXTRACT_CHAT.ConversationFilter(title_regex="(?i)deploy")
+        self.assertTrue(selector.matches({"title": "Fix the Deploy script"}))
+        self.assertFalse(selector.matches({"title": "Lunch"}))
+        self.assertFalse(selector.matches({"title": None}))
+
+    def test_until_date_includes_whole_day(self) -> None:
+        until = EXTRACT_CHAT.parse_date_option("2024-05-01", end_of_day=True)
+        self.assertGreater(until, datetime(2024, 5, 1, 23, 59).timestamp())
+        self.assertLess(until, datetime(2024, 5, 2).timestamp())
+
+    def test_unknown_role_is_rejected(self) -> None:
+        self.assertEqual(EXTRACT_CHAT.parse_roles_option("user, assistant"), ("user", "assistant"))
+        with self.assertRaises(argparse.ArgumentTypeError):
+            EXTRACT_CHAT.parse_roles_option("robot")
+
+
+class FilteredExtractionTests(unittest.TestCase):
+    """Filters are applied before decoding, and roles while rendering."""
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp_dir = self._tmp.name
+        self.out_dir = os.path.join(self.tmp_dir, "out")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _outputs(self) -> list:
+        if not os.path.isdir(self.out_dir):
+            return []
+        return sorted(name for name in os.listdir(self.out_dir) if name.endswith(".md"))
+
+    def test_export_elements_are_filtered(self) -> None:
+        path = os.path.join(self.tmp_dir, "conversations.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([
+                _conversation("Deploy notes", MAY_1, MAY_1),
+                _conversation("Deploy again", JUNE_1, JUNE_1),
+                _conversation("Lunch", JUNE_1, JUNE_1),
+            ], f)
+        selector = EXTRACT_CHAT.ConversationFilter(since=JUNE_1 - 10, title_regex="Deploy")
+
+        with redirect_stdout(io.StringIO()) as output:
+            errors = EXTRACT_CHAT.process_file_patterns(
+                [path], self.out_dir, "markdown", selector=selector
+            )
+
+        self.assertEqual(errors, [])
+        (name,) = self._outputs()
+        self.assertTrue(name.endswith("-Deploy_again.md"))
+        self.assertIn("Skipped 2 conversation(s) not matching the filters.", output.getvalue())
+
+    def test_rejected_file_is_not_read_past_its_prefix(self) -> None:
+        path = os.path.join(self.tmp_dir, "big.json")
+        with open(path, "wb") as f:
+            f.write(b'{"title": "Lunch", "create_time": 1, "mapping": {')
+            f.write(b"x" * (EXTRACT_CHAT.METADATA_PREFIX_SIZE * 2))  # Not valid JSON
+        selector = EXTRACT_CHAT.ConversationFilter(title_regex="Deploy")
+
+        errors: list = []
+        with redirect_stdout(io.StringIO()):
+            items = list(EXTRACT_CHAT.iter_raw_conversations(path, errors, selector))
+
+        self.assertEqual((items, errors, selector.rejected), ([], [], 1))
+
+    def test_roles_limit_rendered_messages(self) -> None:
+        data = _conversation("Roles", MAY_1, MAY_1)
+        rendered = "".join(EXTRACT_CHAT.iter_conversation(data, "markdown", roles=("user",)))
+        self.assertIn("question", rendered)
+        self.assertNotIn("answer", rendered)
+        self.assertNotIn("be brief", rendered)
+
+    def test_roles_are_part_of_the_state_variant(self) -> None:
+        self.assertEqual(
+            EXTRACT_CHAT.output_variant("markdown", "all", ("user", "assistant")),
+            "markdown:roles=assistant,user",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
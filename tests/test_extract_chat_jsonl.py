@@ -0,0 +1,131 @@
+"""Unit tests for bin.extract_chat JSON Lines and gzip output."""
+
+from __future__ import annotations
+
+import gzip
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import types
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+EXTRACT_CHAT_PATH = PROJECT_ROOT / "bin" / "extract_chat.py"
+
+
+def _load_extract_chat_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("extract_chat_module", EXTRACT_CHAT_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load extract_chat module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+EXTRACT_CHAT = _load_extract_chat_module()
+
+
+def _conversation() -> dict:
+    mapping = {"root": {"id": "root", "parent": None, "children": ["m1"]}}
+    turns = [
+        ("user", {"content_type": "text", "parts": ["Café &amp; tea"]}),
+        ("assistant", {"content_type": "text", "parts": [""]}),
+        ("tool", {"content_type": "code", "text": "print(1)"}),
+        ("assistant", {"content_type": "text", "parts": ["Done"]}),
+    ]
+    for index, (role, content) in enumerate(turns, start=1):
+        mapping[f"m{index}"] = {
+            "id": f"m{index}",
+            "parent": "root" if index == 1 else f"m{index - 1}",
+            "children": [f"m{index + 1}"] if index < len(turns) else [],
+            "message": {
+                "author": {"role": role},
+                "create_time": 1700000000123 + index,
+                "content": content,
+            },
+        }
+    return {
+        "conversation_id": "c1",
+        "title": "Records",
+        "create_time": 1700000000,
+        "update_time": 1700000100,
+        "mapping": mapping,
+    }
+
+
+class JsonlRecordTests(unittest.TestCase):
+    """One normalized record per message with text, in conversation order."""
+
+    def test_records(self) -> None:
+        records = [json.loads(line) for line in EXTRACT_CHAT.iter_conversation(_conversation(), "jsonl")]
+        self.assertEqual([r["message_id"] for r in records], ["m1", "m3", "m4"])
+        self.assertEqual([r["role"] for r in records], ["user", "tool", "assistant"])
+        self.assertEqual(records[0]["text"], "Café & tea")
+        self.assertEqual(records[1]["content_type"], "code")
+        self.assertEqual(records[1]["text"], "print(1)")
+        self.assertAlmostEqual(records[0]["timestamp"], 1700000000.124)
+        self.assertEqual({r["conversation_id"] for r in records}, {"c1"})
+        self.assertEqual({r["title"] for r in records}, {"Records"})
+
+    def test_user_context_matches_markdown(self) -> None:
+        data = _conversation()
+        message = data["mapping"]["m1"]["message"]
+        message["metadata"] = {
+            "is_user_system_message": True,
+            "user_context_message_data": {
+                "about_user_message": "I write Python",
+                "about_model_message": "Be brief",
+            },
+        }
+        records = [json.loads(line) for line in EXTRACT_CHAT.iter_conversation(data, "jsonl")]
+        markdown = "".join(EXTRACT_CHAT.iter_conversation(data, "markdown"))
+
+        self.assertEqual(records[0]["role"], "system")
+        self.assertEqual(
+            records[0]["text"], "### About User:\nI write Python\n\n### About Assistant:\nBe brief"
+        )
+        self.assertIn(records[0]["text"], markdown)
+        self.assertNotIn("Café", markdown)
+
+    def test_roles_filter_records(self) -> None:
+        lines = list(EXTRACT_CHAT.iter_conversation(_conversation(), "jsonl", roles=("tool",)))
+        self.assertEqual([json.loads(line)["role"] for line in lines], ["tool"])
+
+    def test_extensions(self) -> None:
+        self.assertEqual(EXTRACT_CHAT.output_extension("jsonl"), "jsonl")
+        self.assertEqual(EXTRACT_CHAT.output_extension("markdown", compress=True), "md.gz")
+        self.assertEqual(EXTRACT_CHAT.output_variant("jsonl", "all", compress=True), "jsonl.gz")
+
+
+class CompressedOutputTests(unittest.TestCase):
+    """--gzip writes the same content, compressed, under a .gz name."""
+
+    def test_gzip_output_matches_plain_output(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "chat.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(_conversation(), f)
+
+            outputs = {}
+            for compress in (False, True):
+                out_dir = os.path.join(tmp_dir, f"out-{compress}")
+                with redirect_stdout(io.StringIO()):
+                    errors = EXTRACT_CHAT.process_file_patterns(
+                        [path], out_dir, "jsonl", compress=compress
+                    )
+                self.assertEqual(errors, [])
+                (name,) = os.listdir(out_dir)
+                outputs[compress] = os.path.join(out_dir, name)
+
+            self.assertTrue(outputs[False].endswith("-Records.jsonl"))
+            self.assertTrue(outputs[True].endswith("-Records.jsonl.gz"))
+            with open(outputs[False], "rb") as plain, gzip.open(outputs[True], "rb") as packed:
+                self.assertEqual(plain.read(), packed.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""Unit tests for bin.extract_chat streamed, atomic output writing."""
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import types
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+EXTRACT_CHAT_PATH = PROJECT_ROOT / "bin" / "extract_chat.py"
+
+
+def _load_extract_chat_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("extract_chat_module", EXTRACT_CHAT_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load extract_chat module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+EXTRACT_CHAT = _load_extract_chat_module()
+
+
+def _conversation() -> dict:
+    mapping = {"root": {"id": "root", "parent": None, "children": ["m1"]}}
+    turns = [
+        ("user", {"content_type": "text", "parts": ["Run it"]}),
+        ("tool", {"content_type": "text", "parts": ["**Result**\nok"]}),
+        ("assistant", {"content_type": "text", "parts": ["Done:\n````sh\nls\n````"]}),
+    ]
+    for index, (role, content) in enumerate(turns, start=1):
+        mapping[f"m{index}"] = {
+            "id": f"m{index}",
+            "parent": "root" if index == 1 else f"m{index - 1}",
+            "children": [f"m{index + 1}"] if index < len(turns) else [],
+            "message": {
+                "author": {"role": role},
+                "create_time": 1700000000 + index,
+                "content": content,
+            },
+        }
+    return {
+        "title": "Streamed",
+        "create_time": 1700000000,
+        "update_time": 1700000100,
+        "mapping": mapping,
+    }
+
+
+class StreamedRenderingTests(unittest.TestCase):
+    """The fragment stream must match the list-based rendering."""
+
+    def test_iter_conversation_matches_render_conversation(self) -> None:
+        data = _conversation()
+        for out_fmt in ("markdown", "html"):
+            with self.subTest(out_fmt=out_fmt):
+                self.assertEqual(
+                    "".join(EXTRACT_CHAT.iter_conversation(data, out_fmt)),
+                    "".join(EXTRACT_CHAT.render_conversation(data, out_fmt)),
+                )
+
+    def test_render_conversation_without_mapping(self) -> None:
+        self.assertIsNone(EXTRACT_CHAT.render_conversation({"title": "x"}, "markdown"))
+
+
+class AtomicOutputTests(unittest.TestCase):
+    """Outputs are moved into place only once completely written."""
+
+    def test_extract_leaves_no_temporary_files(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "chat.json")
+            out_dir = os.path.join(tmp_dir, "out")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(_conversation(), f)
+
+            with redirect_stdout(io.StringIO()):
+                EXTRACT_CHAT.extract_one_file(path, out_dir, "markdown")
+
+            (name,) = os.listdir(out_dir)
+            self.assertTrue(name.endswith("-Streamed.md"))
+            with open(os.path.join(out_dir, name), encoding="utf-8") as f:
+                self.assertEqual(
+                    f.read(),
+                    "".join(EXTRACT_CHAT.iter_conversation(_conversation(), "markdown")),
+                )
+
+    def test_more_than_99_duplicate_titles(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "conversations.json")
+            out_dir = os.path.join(tmp_dir, "out")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump([_conversation()] * 120, f)
+
+            with redirect_stdout(io.StringIO()):
+                EXTRACT_CHAT.extract_one_file(path, out_dir, "markdown")
+
+            names = os.listdir(out_dir)
+            self.assertEqual(len(names), 120)
+            self.assertTrue(any(name.endswith("-Streamed-119.md") for name in names))
+
+    def test_failed_render_removes_temporary_file(self) -> None:
+        def fragments():
+            yield "partial"
+            raise RuntimeError("boom")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.assertRaises(RuntimeError):
+                EXTRACT_CHAT.write_temp_output(tmp_dir, fragments())
+            self.assertEqual(os.listdir(tmp_dir), [])
+
+    def test_temporary_output_is_hidden_and_unique(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            first = EXTRACT_CHAT.write_temp_output(tmp_dir, ["a"])
+            second = EXTRACT_CHAT.write_temp_output(tmp_dir, ["b"])
+            self.assertNotEqual(first, second)
+            self.assertTrue(os.path.basename(first).startswith("."))
+            with open(second, encoding="utf-8") as f:
+                self.assertEqual(f.read(), "b")
+
+
+if __name__ == "__main__":
+    unittest.main()
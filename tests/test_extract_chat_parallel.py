@@ -0,0 +1,101 @@
+"""Unit tests for bin.extract_chat process-pool extraction."""
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import json
+import os
+import sys
+import tempfile
+import types
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+EXTRACT_CHAT_PATH = PROJECT_ROOT / "bin" / "extract_chat.py"
+
+
+def _load_extract_chat_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("extract_chat_module", EXTRACT_CHAT_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load extract_chat module specification")
+    module = importlib.util.module_from_spec(spec)
+    # Worker processes look functions up by module name when unpickling
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+EXTRACT_CHAT = _load_extract_chat_module()
+
+
+def _conversation(title: str, create_time: float, text: str) -> dict:
+    return {
+        "title": title,
+        "create_time": create_time,
+        "update_time": create_time,
+        "mapping": {
+            "root": {"id": "root", "parent": None, "children": ["m1"]},
+            "m1": {
+                "id": "m1",
+                "parent": "root",
+                "children": [],
+                "message": {
+                    "author": {"role": "assistant"},
+                    "create_time": create_time,
+                    "content": {"content_type": "text", "parts": [text]},
+                },
+            },
+        },
+    }
+
+
+class ParallelExtractionTests(unittest.TestCase):
+    """Parallel runs must name and render outputs exactly like sequential runs."""
+
+    def _run(self, export_path: str, out_dir: str, jobs: int) -> list:
+        with redirect_stdout(io.StringIO()):
+            errors = EXTRACT_CHAT.process_file_patterns(
+                [export_path], out_dir, "markdown", jobs=jobs
+            )
+        return errors
+
+    def test_parallel_output_matches_sequential(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            export_path = os.path.join(tmp_dir, "conversations.json")
+            conversations = [
+                # Identical titles and times force -NN collision suffixes
+                _conversation("Same", 1700000000, f"message {index}")
+                for index in range(6)
+            ]
+            conversations.insert(3, ["not", "a", "conversation"])
+            with open(export_path, "w", encoding="utf-8") as f:
+                json.dump(conversations, f)
+
+            sequential_dir = os.path.join(tmp_dir, "sequential")
+            parallel_dir = os.path.join(tmp_dir, "parallel")
+            sequential_errors = self._run(export_path, sequential_dir, jobs=1)
+            parallel_errors = self._run(export_path, parallel_dir, jobs=3)
+
+            self.assertEqual(len(sequential_errors), 1)
+            self.assertEqual(sequential_errors, parallel_errors)
+
+            names = sorted(os.listdir(sequential_dir))
+            self.assertEqual(names, sorted(os.listdir(parallel_dir)))
+            self.assertEqual(len(names), 6)
+            for name in names:
+                with open(os.path.join(sequential_dir, name), encoding="utf-8") as f:
+                    expected = f.read()
+                with open(os.path.join(parallel_dir, name), encoding="utf-8") as f:
+                    self.assertEqual(f.read(), expected)
+
+            # Allocation follows input order: the unsuffixed name is message 0
+            first_name = next(name for name in names if name.endswith("-Same.md"))
+            with open(os.path.join(parallel_dir, first_name), encoding="utf-8") as f:
+                self.assertIn("message 0", f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+"""Unit tests for bin.extract_chat pipelined read/render/write stages."""
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import threading
+import types
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+EXTRACT_CHAT_PATH = PROJECT_ROOT / "bin" / "extract_chat.py"
+
+
+def _load_extract_chat_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("extract_chat_module", EXTRACT_CHAT_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load extract_chat module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+EXTRACT_CHAT = _load_extract_chat_module()
+
+
+def _conversation(conversation_id: str, text: str) -> dict:
+    return {
+        "conversation_id": conversation_id,
+        "title": f"Chat {conversation_id}",
+        "create_time": 1700000000,
+        "update_time": 1700000100,
+        "mapping": {
+            "root": {"id": "root", "parent": None, "children": ["m1"]},
+            "m1": {
+                "id": "m1",
+                "parent": "root",
+                "children": [],
+                "message": {
+                    "author": {"role": "user"},
+                    "create_time": 1700000000,
+                    "content": {"content_type": "text", "parts": [text]},
+                },
+            },
+        },
+    }
+
+
+class ThreadedStageTests(unittest.TestCase):
+    """The queue-connected stages preserve order and propagate failures."""
+
+    def test_iter_in_thread_preserves_order(self) -> None:
+        self.assertEqual(list(EXTRACT_CHAT.iter_in_thread(range(100), maxsize=2)), list(range(100)))
+
+    def test_iter_in_thread_reraises_producer_errors(self) -> None:
+        def items():
+            yield 1
+            raise ValueError("bad input")
+
+        iterator = EXTRACT_CHAT.iter_in_thread(items())
+        self.assertEqual(next(iterator), 1)
+        with self.assertRaises(ValueError):
+            next(iterator)
+
+    def test_closing_iter_in_thread_stops_producer(self) -> None:
+        produced = []
+
+        def items():
+            for i in range(1000):
+                produced.append(i)
+                yield i
+
+        iterator = EXTRACT_CHAT.iter_in_thread(items(), maxsize=2)
+        self.assertEqual(next(iterator), 0)
+        iterator.close()
+        self.assertLess(len(produced), 10)
+        self.assertEqual(
+            [t.name for t in threading.enumerate() if t.name == "extract_chat-read"], []
+        )
+
+    def test_consume_in_thread_preserves_order(self) -> None:
+        seen = []
+        EXTRACT_CHAT.consume_in_thread(seen.append, range(100), maxsize=2)
+        self.assertEqual(seen, list(range(100)))
+
+    def test_consume_in_thread_reraises_consumer_errors(self) -> None:
+        seen = []
+
+        def consume(item):
+            if item == 3:
+                raise OSError("disk full")
+            seen.append(item)
+
+        with self.assertRaises(OSError):
+            EXTRACT_CHAT.consume_in_thread(consume, range(100), maxsize=2)
+        self.assertEqual(seen, [0, 1, 2])
+
+
+class PipelineExtractionTests(unittest.TestCase):
+    """End-to-end extraction through the pipeline."""
+
+    def test_outputs_and_index_written_in_input_order(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            export_path = os.path.join(tmp_dir, "conversations.json")
+            out_dir = os.path.join(tmp_dir, "out")
+            index_path = os.path.join(tmp_dir, "chats.sqlite")
+            with open(export_path, "w", encoding="utf-8") as f:
+                json.dump([_conversation(str(i), f"message {i}") for i in range(40)], f)
+
+            with redirect_stdout(io.StringIO()) as output:
+                errors = EXTRACT_CHAT.process_file_patterns(
+                    [export_path], out_dir, "markdown", index_path=index_path
+                )
+
+            self.assertEqual(errors, [])
+            written = [
+                line.rsplit("-", 1)[-1]
+                for line in output.getvalue().splitlines()
+                if line.startswith("Writing to:")
+            ]
+            self.assertEqual(written, [f"Chat_{i}.md" for i in range(40)])
+            self.assertEqual(len(os.listdir(out_dir)), 40)
+            self.assertTrue(EXTRACT_CHAT.search_index(index_path, "message"))
+
+
+if __name__ == "__main__":
+    unittest.main()
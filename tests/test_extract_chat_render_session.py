@@ -0,0 +1,61 @@
+"""Unit tests for bin.extract_chat rendering sessions."""
+
+from __future__ import annotations
+
+import importlib.util
+import types
+import unittest
+from pathlib import Path
+
+import mistune
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+EXTRACT_CHAT_PATH = PROJECT_ROOT / "bin" / "extract_chat.py"
+
+
+def _load_extract_chat_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("extract_chat_module", EXTRACT_CHAT_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load extract_chat module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+EXTRACT_CHAT = _load_extract_chat_module()
+
+SAMPLES = [
+    "Hello **world**",
+    "A note[^1] and another[^2].\n\n[^1]: First.\n[^2]: Second.",
+    "| a | b |\n|---|---|\n| 1 | ~~2~~ |",
+    "<script>alert(1)</script> & friends",
+    "````python\nprint('fence')\n````",
+    "",
+]
+
+
+class RenderSessionTests(unittest.TestCase):
+    """A reused session must render exactly like a freshly built parser."""
+
+    def test_reused_renderer_matches_fresh_parser(self) -> None:
+        session = EXTRACT_CHAT.RenderSession()
+        # Render everything twice so state left by one document would show up
+        for text in SAMPLES + SAMPLES:
+            fresh = mistune.create_markdown(plugins=["strikethrough", "footnotes", "table"])
+            with self.subTest(text=text):
+                self.assertEqual(session.render_html(text), fresh(text))
+
+    def test_shared_session_is_created_once(self) -> None:
+        self.assertIs(EXTRACT_CHAT.get_render_session(), EXTRACT_CHAT.get_render_session())
+
+    def test_handle_regular_message_uses_given_session(self) -> None:
+        session = EXTRACT_CHAT.RenderSession()
+        content = {"content_type": "text", "parts": ["````sh\nls\n````"]}
+        self.assertEqual(
+            EXTRACT_CHAT.handle_regular_message(content, "html", session),
+            [session.render_html("```sh\nls\n```") + "\n"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+"""Unit tests for bin.extract_chat SQLite FTS5 search index."""
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import types
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+EXTRACT_CHAT_PATH = PROJECT_ROOT / "bin" / "extract_chat.py"
+
+
+def _load_extract_chat_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("extract_chat_module", EXTRACT_CHAT_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load extract_chat module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+EXTRACT_CHAT = _load_extract_chat_module()
+
+
+def _has_fts5() -> bool:
+    connection = sqlite3.connect(":memory:")
+    try:
+        connection.execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        connection.close()
+
+
+def _conversation(conversation_id: str, title: str, texts: list) -> dict:
+    mapping = {"root": {"id": "root", "parent": None, "children": ["m0"]}}
+    for index, (role, text) in enumerate(texts):
+        mapping[f"m{index}"] = {
+            "id": f"m{index}",
+            "parent": "root" if index == 0 else f"m{index - 1}",
+            "children": [f"m{index + 1}"] if index + 1 < len(texts) else [],
+            "message": {
+                "author": {"role": role},
+                "create_time": 1700000000 + index,
+                "content": {"content_type": "text", "parts": [text]},
+            },
+        }
+    return {
+        "conversation_id": conversation_id,
+        "title": title,
+        "create_time": 1700000000,
+        "update_time": 1700000100,
+        "mapping": mapping,
+    }
+
+
+@unittest.skipUnless(_has_fts5(), "SQLite was built without FTS5")
+class SearchIndexTests(unittest.TestCase):
+    """Validate indexing during extraction and ranked search."""
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp_dir = self._tmp.name
+        self.export_path = os.path.join(self.tmp_dir, "conversations.json")
+        self.out_dir = os.path.join(self.tmp_dir, "out")
+        self.index_path = os.path.join(self.tmp_dir, "chats.sqlite")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _extract(self, conversations: list) -> None:
+        with open(self.export_path, "w", encoding="utf-8") as f:
+            json.dump(conversations, f)
+        with redirect_stdout(io.StringIO()):
+            errors = EXTRACT_CHAT.process_file_patterns(
+                [self.export_path], self.out_dir, "markdown", index_path=self.index_path
+            )
+        self.assertEqual(errors, [])
+
+    def test_search_returns_ranked_hits_with_paths(self) -> None:
+        self._extract([
+            _conversation("a", "Kubernetes", [("user", "why is my pod crashing"),
+                                               ("assistant", "check the pod logs")]),
+            _conversation("b", "Cooking", [("user", "how long to boil an egg")]),
+        ])
+        hits = EXTRACT_CHAT.search_index(self.index_path, "pod")
+        self.assertEqual(len(hits), 2)
+        path, title, role, _, snippet = hits[0]
+        self.assertEqual(title, "Kubernetes")
+        self.assertTrue(path.endswith("-Kubernetes.md"))
+        self.assertTrue(os.path.exists(path))
+        self.assertIn("[pod]", snippet)
+        self.assertEqual(EXTRACT_CHAT.search_index(self.index_path, "egg")[0][2], "user")
+        self.assertEqual(EXTRACT_CHAT.search_index(self.index_path, "missing"), [])
+
+    def test_reindexing_replaces_previous_messages(self) -> None:
+        self._extract([_conversation("a", "Draft", [("user", "first wording")])])
+        self._extract([_conversation("a", "Draft", [("user", "second wording")])])
+        self.assertEqual(EXTRACT_CHAT.search_index(self.index_path, "first"), [])
+        self.assertEqual(len(EXTRACT_CHAT.search_index(self.index_path, "second")), 1)
+
+    def test_search_subcommand_prints_hits(self) -> None:
+        self._extract([_conversation("a", "Kubernetes", [("user", "pod crash")])])
+        with redirect_stdout(io.StringIO()) as output:
+            EXTRACT_CHAT.search_main([self.index_path, "crash"])
+        self.assertIn("Kubernetes", output.getvalue())
+        self.assertIn("[crash]", output.getvalue())
+
+
+class IndexMessageTests(unittest.TestCase):
+    """Validate the text collected for the index."""
+
+    def test_plain_text_skips_non_string_parts(self) -> None:
+        content = {"content_type": "multimodal_text", "parts": [{"asset": "x"}, "caption\x00"]}
+        self.assertEqual(EXTRACT_CHAT.message_plain_text(content), "caption")
+
+    def test_code_content_uses_text_field(self) -> None:
+        content = {"content_type": "code", "text": "print(1)"}
+        self.assertEqual(EXTRACT_CHAT.message_plain_text(content), "print(1)")
+
+    def test_messages_are_collected_while_rendering(self) -> None:
+        data = _conversation("c1", "Title", [("user", "caf\u00e9 &amp; tea"), ("assistant", "sure")])
+        data["mapping"]["m1"]["message"]["content"] = {"content_type": "code", "text": "print(1)"}
+        for out_fmt in ("markdown", "html", "jsonl"):
+            with self.subTest(out_fmt=out_fmt), mock.patch.object(
+                EXTRACT_CHAT, "clean_text", wraps=EXTRACT_CHAT.clean_text
+            ) as clean_text:
+                index = []
+                list(EXTRACT_CHAT.iter_conversation(data, out_fmt, index=index))
+                self.assertEqual(
+                    index,
+                    [("user", 1700000000, "caf\u00e9 & tea"), ("assistant", 1700000001, "print(1)")],
+                )
+                # Each message's text is cleaned once, for the output and the index alike
+                self.assertEqual(clean_text.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+"""Unit tests for bin.extract_chat incremental state index."""
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import types
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+EXTRACT_CHAT_PATH = PROJECT_ROOT / "bin" / "extract_chat.py"
+
+
+def _load_extract_chat_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("extract_chat_module", EXTRACT_CHAT_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load extract_chat module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+EXTRACT_CHAT = _load_extract_chat_module()
+
+
+def _conversation(conversation_id: str, title: str, update_time: float, text: str) -> dict:
+    return {
+        "conversation_id": conversation_id,
+        "title": title,
+        "create_time": 1700000000,
+        "update_time": update_time,
+        "mapping": {
+            "root": {"id": "root", "parent": None, "children": ["m1"]},
+            "m1": {
+                "id": "m1",
+                "parent": "root",
+                "children": [],
+                "message": {
+                    "author": {"role": "user"},
+                    "create_time": 1700000000,
+                    "content": {"content_type": "text", "parts": [text]},
+                },
+            },
+        },
+    }
+
+
+class StateIndexTests(unittest.TestCase):
+    """Validate that --state runs only re-render changed conversations."""
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp_dir = self._tmp.name
+        self.export_path = os.path.join(self.tmp_dir, "conversations.json")
+        self.out_dir = os.path.join(self.tmp_dir, "out")
+        self.state_path = os.path.join(self.out_dir, ".extract_chat_state.json")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _write_export(self, conversations: list) -> None:
+        with open(self.export_path, "w", encoding="utf-8") as f:
+            json.dump(conversations, f)
+
+    def _run(self) -> str:
+        with redirect_stdout(io.StringIO()) as output:
+            errors = EXTRACT_CHAT.process_file_patterns(
+                [self.export_path], self.out_dir, "markdown", state_path=self.state_path
+            )
+        self.assertEqual(errors, [])
+        return output.getvalue()
+
+    def _outputs(self) -> list:
+        return sorted(name for name in os.listdir(self.out_dir) if name.endswith(".md"))
+
+    def test_unchanged_file_is_skipped_without_rendering(self) -> None:
+        self._write_export([
+            _conversation("a", "Alpha", 1700000100, "one"),
+            _conversation("b", "Beta", 1700000200, "two"),
+        ])
+        first = self._run()
+        self.assertEqual(first.count("Writing to:"), 2)
+
+        second = self._run()
+        self.assertNotIn("Writing to:", second)
+        self.assertIn("Skipped 2 unchanged conversation(s).", second)
+
+    def test_changed_conversation_replaces_previous_output(self) -> None:
+        self._write_export([
+            _conversation("a", "Alpha", 1700000100, "one"),
+            _conversation("b", "Beta", 1700000200, "two"),
+        ])
+        self._run()
+        before = self._outputs()
+
+        self._write_export([
+            _conversation("a", "Alpha", 1700000100, "one"),
+            _conversation("b", "Beta", 1700009999, "two, edited"),
+        ])
+        output = self._run()
+
+        self.assertEqual(output.count("Writing to:"), 1)
+        self.assertIn("Skipped 1 unchanged conversation(s).", output)
+        after = self._outputs()
+        self.assertEqual(len(after), 2)
+        self.assertIn(before[0], after)
+        self.assertNotIn(before[1], after)
+        beta_path = os.path.join(self.out_dir, [n for n in after if n.endswith("-Beta.md")][0])
+        with open(beta_path, encoding="utf-8") as f:
+            self.assertIn("two, edited", f.read())
+
+    def test_missing_output_is_regenerated(self) -> None:
+        self._write_export([_conversation("a", "Alpha", 1700000100, "one")])
+        self._run()
+        (name,) = self._outputs()
+        os.remove(os.path.join(self.out_dir, name))
+
+        output = self._run()
+        self.assertEqual(output.count("Writing to:"), 1)
+        self.assertEqual(self._outputs(), [name])
+
+    def test_changed_output_directory_is_extracted_again(self) -> None:
+        self._write_export([_conversation("a", "Alpha", 1700000100, "one")])
+        self.state_path = os.path.join(self.tmp_dir, "state.json")
+        self._run()
+        (name,) = self._outputs()
+
+        first_dir, self.out_dir = self.out_dir, os.path.join(self.tmp_dir, "out2")
+        output = self._run()
+        self.assertEqual(output.count("Writing to:"), 1)
+        self.assertEqual(self._outputs(), [name])
+        # The first directory keeps its output, and both are now current
+        self.assertTrue(os.path.exists(os.path.join(first_dir, name)))
+        self.assertNotIn("Writing to:", self._run())
+        self.out_dir = first_dir
+        self.assertNotIn("Writing to:", self._run())
+
+    def test_corrupt_state_is_ignored(self) -> None:
+        self._write_export([_conversation("a", "Alpha", 1700000100, "one")])
+        os.makedirs(self.out_dir)
+        with open(self.state_path, "w", encoding="utf-8") as f:
+            f.write("{not json")
+
+        output = self._run()
+        self.assertIn("Warning: ignoring state index", output)
+        self.assertEqual(len(self._outputs()), 1)
+        with open(self.state_path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["version"], EXTRACT_CHAT.STATE_INDEX_VERSION)
+
+
+if __name__ == "__main__":
+    unittest.main()
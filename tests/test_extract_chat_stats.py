@@ -0,0 +1,156 @@
+"""Unit tests for bin.extract_chat per-conversation statistics (--stats)."""
+
+from __future__ import annotations
+
+import csv
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import types
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+EXTRACT_CHAT_PATH = PROJECT_ROOT / "bin" / "extract_chat.py"
+
+
+def _load_extract_chat_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("extract_chat_module", EXTRACT_CHAT_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load extract_chat module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+EXTRACT_CHAT = _load_extract_chat_module()
+
+
+def _conversation(conversation_id: str = "c1") -> dict:
+    turns = [
+        ("system", 1700000000, {"content_type": "text", "parts": [""]}),
+        ("user", 1700000010, {"content_type": "text", "parts": ["hello"]}),
+        ("assistant", 1700000070, {"content_type": "text", "parts": ["```py\nx = 1\n```\nand\n```\ny\n```"]}),
+        ("tool", 1700000080, {"content_type": "code", "text": "print(1)"}),
+        ("assistant", 1700000100123, {"content_type": "text", "parts": ["bye"]}),
+    ]
+    mapping = {"root": {"id": "root", "parent": None, "children": ["m1"]}}
+    for index, (role, create_time, content) in enumerate(turns, start=1):
+        mapping[f"m{index}"] = {
+            "id": f"m{index}",
+            "parent": "root" if index == 1 else f"m{index - 1}",
+            "children": [f"m{index + 1}"] if index < len(turns) else [],
+            "message": {"author": {"role": role}, "create_time": create_time, "content": content},
+        }
+    return {
+        "conversation_id": conversation_id,
+        "title": f"Stats {conversation_id}",
+        "create_time": 1700000000,
+        "update_time": 1700000200,
+        "mapping": mapping,
+    }
+
+
+def _collect(out_fmt: str) -> dict:
+    stats = EXTRACT_CHAT.ConversationStats()
+    for _ in EXTRACT_CHAT.iter_conversation(_conversation(), out_fmt, stats=stats):
+        pass
+    return stats.summary()
+
+
+class ConversationStatsTests(unittest.TestCase):
+    """Statistics are accumulated during the rendering walk."""
+
+    def test_counts(self) -> None:
+        summary = _collect("markdown")
+        self.assertEqual(summary["messages"], {"user": 1, "assistant": 2, "tool": 1})
+        self.assertEqual(summary["chars"]["user"], 5)
+        self.assertEqual(summary["chars"]["tool"], len("print(1)"))
+        self.assertEqual(summary["code_blocks"], 3)
+        self.assertEqual(summary["first_time"], 1700000010)
+        self.assertAlmostEqual(summary["last_time"], 1700000100.123)
+
+    def test_same_counts_for_every_format(self) -> None:
+        self.assertEqual(_collect("html"), _collect("markdown"))
+        self.assertEqual(_collect("jsonl"), _collect("markdown"))
+
+    def test_roles_filter_limits_counts(self) -> None:
+        stats = EXTRACT_CHAT.ConversationStats()
+        for _ in EXTRACT_CHAT.iter_conversation(_conversation(), "markdown", roles=("user",), stats=stats):
+            pass
+        self.assertEqual(stats.messages, {"user": 1})
+
+
+def _read_rows(stats_path: str) -> list:
+    with open(stats_path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+class StatsTableTests(unittest.TestCase):
+    """--stats keeps one CSV row per conversation across runs."""
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp_dir = self._tmp.name
+        self.export_path = os.path.join(self.tmp_dir, "conversations.json")
+        self.stats_path = os.path.join(self.tmp_dir, "stats.csv")
+        self.out_dir = os.path.join(self.tmp_dir, "out")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _extract(self, conversations: list, **options) -> None:
+        with open(self.export_path, "w", encoding="utf-8") as f:
+            json.dump(conversations, f)
+        with redirect_stdout(io.StringIO()):
+            errors = EXTRACT_CHAT.process_file_patterns(
+                [self.export_path], self.out_dir, "markdown", stats_path=self.stats_path, **options
+            )
+        self.assertEqual(errors, [])
+
+    def test_table_rows(self) -> None:
+        for _ in range(2):
+            self._extract([_conversation("a"), _conversation("b")])
+
+        rows = _read_rows(self.stats_path)
+        self.assertEqual([row["conversation_id"] for row in rows], ["a", "b"])
+        row = rows[0]
+        self.assertEqual(list(row), list(EXTRACT_CHAT.STATS_COLUMNS))
+        self.assertEqual(row["messages"], "4")
+        self.assertEqual(row["assistant_messages"], "2")
+        self.assertEqual(row["system_messages"], "0")
+        self.assertEqual(row["code_blocks"], "3")
+        self.assertEqual(float(row["duration"]), 90.123)
+        self.assertTrue(os.path.isfile(row["output"]))
+
+    def test_changed_conversation_replaces_its_row(self) -> None:
+        state_path = os.path.join(self.tmp_dir, "state.json")
+        self._extract([_conversation("a"), _conversation("b")], state_path=state_path)
+
+        changed = _conversation("a")
+        changed["update_time"] = 1700000300
+        changed["mapping"]["m5"]["children"] = ["m6"]
+        changed["mapping"]["m6"] = {
+            "id": "m6",
+            "parent": "m5",
+            "children": [],
+            "message": {
+                "author": {"role": "user"},
+                "create_time": 1700000250,
+                "content": {"content_type": "text", "parts": ["thanks"]},
+            },
+        }
+        self._extract([changed, _conversation("b")], state_path=state_path)
+
+        rows = _read_rows(self.stats_path)
+        # "b" was skipped as unchanged and keeps its row from the first run
+        self.assertEqual([row["conversation_id"] for row in rows], ["a", "b"])
+        self.assertEqual((rows[0]["messages"], rows[0]["user_messages"]), ("5", "2"))
+        self.assertEqual(rows[1]["messages"], "4")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""Unit tests for bin.extract_chat streaming export parsing."""
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import types
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+EXTRACT_CHAT_PATH = PROJECT_ROOT / "bin" / "extract_chat.py"
+
+
+def _load_extract_chat_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("extract_chat_module", EXTRACT_CHAT_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load extract_chat module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+EXTRACT_CHAT = _load_extract_chat_module()
+
+
+def _conversation(title: str, create_time: float, text: str) -> dict:
+    return {
+        "title": title,
+        "create_time": create_time,
+        "update_time": create_time + 60,
+        "mapping": {
+            "root": {"id": "root", "parent": None, "children": ["m1"]},
+            "m1": {
+                "id": "m1",
+                "parent": "root",
+                "children": [],
+                "message": {
+                    "author": {"role": "user"},
+                    "create_time": create_time,
+                    "content": {"content_type": "text", "parts": [text]},
+                },
+            },
+        },
+    }
+
+
+class JsonArrayStreamingTests(unittest.TestCase):
+    """Validate element boundary detection in iter_json_array."""
+
+    def _elements(self, payload: object, chunk_size: int) -> list:
+        raw = json.dumps(payload).encode("utf-8")
+        stream = io.BytesIO(raw)
+        return [
+            json.loads(element)
+            for element in EXTRACT_CHAT.iter_json_array(stream, chunk_size=chunk_size)
+        ]
+
+    def test_elements_survive_tiny_chunks(self) -> None:
+        payload = [
+            {"title": "brackets ] } in a string", "nested": [[1, 2], {"a": "{"}]},
+            {"title": 'escaped \\" quote and trailing backslash \\\\'},
+            "plain string, with comma",
+            42,
+            None,
+            {"title": "unicode é中\U0001f600"},
+        ]
+        for chunk_size in (1, 2, 3, 7, 1024):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self._elements(payload, chunk_size), payload)
+
+    def test_empty_array(self) -> None:
+        self.assertEqual(self._elements([], 1), [])
+
+    def test_truncated_array_raises(self) -> None:
+        stream = io.BytesIO(b'[{"title": "ok"}, {"title": "cut')
+        with self.assertRaises(ValueError):
+            list(EXTRACT_CHAT.iter_json_array(stream, chunk_size=4))
+
+    def test_non_array_raises(self) -> None:
+        with self.assertRaises(ValueError):
+            list(EXTRACT_CHAT.iter_json_array(io.BytesIO(b'{"title": "x"}')))
+
+
+class ConversationExtractionTests(unittest.TestCase):
+    """Validate extraction from single-object and array exports."""
+
+    def test_export_array_writes_one_file_per_conversation(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            export_path = os.path.join(tmp_dir, "conversations.json")
+            out_dir = os.path.join(tmp_dir, "out")
+            conversations = [
+                _conversation("First", 1700000000, "hello"),
+                _conversation("Second", 1700001000, "world"),
+            ]
+            with open(export_path, "w", encoding="utf-8") as f:
+                json.dump(conversations, f)
+
+            with redirect_stdout(io.StringIO()):
+                EXTRACT_CHAT.extract_one_file(export_path, out_dir, "markdown")
+
+            outputs = sorted(os.listdir(out_dir))
+            self.assertEqual(len(outputs), 2)
+            self.assertTrue(outputs[0].endswith("-First.md"))
+            self.assertTrue(outputs[1].endswith("-Second.md"))
+            with open(os.path.join(out_dir, outputs[1]), encoding="utf-8") as f:
+                self.assertIn("world", f.read())
+
+    def test_single_object_file_is_one_conversation(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "single.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(_conversation("Only", 1700000000, "hi"), f)
+
+            labels = [label for label, _ in EXTRACT_CHAT.iter_conversations(path)]
+            self.assertEqual(labels, [path])
+
+    def test_bad_array_element_is_skipped(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "conversations.json")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write('[{"title": "a"}, [1, 2], {"title": "b"}]')
+
+            with redirect_stdout(io.StringIO()) as output:
+                titles = [data["title"] for _, data in EXTRACT_CHAT.iter_conversations(path)]
+            self.assertEqual(titles, ["a", "b"])
+            self.assertIn("did not contain a JSON object", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,218 @@
+"""Unit tests for bin.extract_chat --watch mode."""
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+EXTRACT_CHAT_PATH = PROJECT_ROOT / "bin" / "extract_chat.py"
+
+
+def _load_extract_chat_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("extract_chat_module", EXTRACT_CHAT_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load extract_chat module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+EXTRACT_CHAT = _load_extract_chat_module()
+
+
+def _conversation(title: str) -> dict:
+    return {
+        "conversation_id": title,
+        "title": title,
+        "create_time": 1700000000,
+        "update_time": 1700000100,
+        "mapping": {
+            "root": {"id": "root", "parent": None, "children": ["m1"]},
+            "m1": {
+                "id": "m1",
+                "parent": "root",
+                "children": [],
+                "message": {
+                    "author": {"role": "user"},
+                    "create_time": 1700000000,
+                    "content": {"content_type": "text", "parts": ["hello"]},
+                },
+            },
+        },
+    }
+
+
+def _write_json(path: str, data) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def _inotify_available() -> bool:
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        EXTRACT_CHAT.InotifyWatcher(tempfile.gettempdir()).close()
+    except OSError:
+        return False
+    return True
+
+
+class WatcherTests(unittest.TestCase):
+    """Both watchers report new and modified files."""
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp_dir = self._tmp.name
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _assert_reports_changes(self, watcher) -> None:
+        path = os.path.join(self.tmp_dir, "new.json")
+        try:
+            _write_json(path, {})
+            self.assertIn(path, watcher.changes(1.0))
+            time.sleep(0.01)
+            _write_json(path, {"changed": True})
+            self.assertIn(path, watcher.changes(1.0))
+        finally:
+            watcher.close()
+
+    def test_polling_watcher(self) -> None:
+        self._assert_reports_changes(EXTRACT_CHAT.PollingWatcher(self.tmp_dir, interval=0.05))
+
+    @unittest.skipUnless(_inotify_available(), "inotify not available")
+    def test_inotify_watcher(self) -> None:
+        self._assert_reports_changes(EXTRACT_CHAT.InotifyWatcher(self.tmp_dir))
+
+    def test_watched_inputs(self) -> None:
+        state = os.path.abspath(os.path.join(self.tmp_dir, "state.json"))
+        self.assertTrue(EXTRACT_CHAT.is_watched_input("drop/export.JSON"))
+        self.assertFalse(EXTRACT_CHAT.is_watched_input("drop/.partial.json"))
+        self.assertFalse(EXTRACT_CHAT.is_watched_input("drop/notes.md"))
+        self.assertFalse(EXTRACT_CHAT.is_watched_input(state, {state}))
+
+
+class WatchDirectoryTests(unittest.TestCase):
+    """watch_directory extracts existing and newly dropped exports."""
+
+    def _wait_for_outputs(self, out_dir: str, count: int) -> list:
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            names = sorted(n for n in os.listdir(out_dir) if n.endswith(".md"))
+            if len(names) >= count:
+                return names
+            time.sleep(0.05)
+        self.fail(f"expected {count} outputs in {out_dir}")
+
+    def _run(self, poll: bool) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            drop_dir = os.path.join(tmp_dir, "drop")
+            out_dir = os.path.join(tmp_dir, "out")
+            os.makedirs(drop_dir)
+            os.makedirs(out_dir)
+            _write_json(os.path.join(drop_dir, "first.json"), _conversation("First"))
+
+            stop = threading.Event()
+            with redirect_stdout(io.StringIO()):
+                thread = threading.Thread(
+                    target=EXTRACT_CHAT.watch_directory,
+                    args=(drop_dir, out_dir, "markdown"),
+                    kwargs={"poll": poll, "debounce": 0.1, "stop": stop},
+                )
+                thread.start()
+                try:
+                    self._wait_for_outputs(out_dir, 1)
+                    _write_json(
+                        os.path.join(drop_dir, "export.json"),
+                        [_conversation("First"), _conversation("Second")],
+                    )
+                    names = self._wait_for_outputs(out_dir, 2)
+                finally:
+                    stop.set()
+                    thread.join()
+
+            self.assertEqual(len(names), 2)
+            self.assertTrue(any(name.endswith("-Second.md") for name in names))
+            self.assertTrue(os.path.exists(os.path.join(out_dir, EXTRACT_CHAT.WATCH_STATE_NAME)))
+
+    def test_names_with_glob_characters(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            drop_dir = os.path.join(tmp_dir, "drop[1]")
+            out_dir = os.path.join(tmp_dir, "out")
+            os.makedirs(drop_dir)
+            os.makedirs(out_dir)
+            _write_json(os.path.join(drop_dir, "export [a]?.json"), _conversation("First"))
+
+            # A stop event that is already set ends the loop after the initial pass
+            stop = threading.Event()
+            stop.set()
+            output = io.StringIO()
+            with redirect_stdout(output):
+                EXTRACT_CHAT.watch_directory(drop_dir, out_dir, "markdown", poll=True, stop=stop)
+
+            self.assertNotIn("No files match", output.getvalue())
+            self.assertEqual(len([n for n in os.listdir(out_dir) if n.endswith(".md")]), 1)
+
+    def test_failed_extraction_is_retried(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            drop_dir = os.path.join(tmp_dir, "drop")
+            out_dir = os.path.join(tmp_dir, "out")
+            os.makedirs(drop_dir)
+            os.makedirs(out_dir)
+            _write_json(os.path.join(drop_dir, "first.json"), _conversation("First"))
+
+            process_file_patterns = EXTRACT_CHAT.process_file_patterns
+            calls = []
+
+            def locked_once(*args, **kwargs):
+                calls.append(args[0])
+                if len(calls) == 1:
+                    raise sqlite3.OperationalError("database is locked")
+                return process_file_patterns(*args, **kwargs)
+
+            stop = threading.Event()
+            output = io.StringIO()
+            with redirect_stdout(output), mock.patch.object(
+                EXTRACT_CHAT, "process_file_patterns", locked_once
+            ):
+                thread = threading.Thread(
+                    target=EXTRACT_CHAT.watch_directory,
+                    args=(drop_dir, out_dir, "markdown"),
+                    kwargs={"poll": True, "debounce": 0.1, "retry_delay": 0.2, "stop": stop},
+                )
+                thread.start()
+                try:
+                    names = self._wait_for_outputs(out_dir, 1)
+                finally:
+                    stop.set()
+                    thread.join()
+
+            self.assertEqual(len(names), 1)
+            self.assertEqual(len(calls), 2)
+            self.assertEqual(calls[0], calls[1])
+            self.assertIn("database is locked", output.getvalue())
+
+    def test_watch_with_polling(self) -> None:
+        self._run(poll=True)
+
+    @unittest.skipUnless(_inotify_available(), "inotify not available")
+    def test_watch_with_inotify(self) -> None:
+        self._run(poll=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
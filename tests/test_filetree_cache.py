@@ -0,0 +1,135 @@
+"""Unit tests for bin.filetree listing cache."""
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+FILETREE_PATH = PROJECT_ROOT / "bin" / "filetree.py"
+
+
+def _load_filetree_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("filetree_module", FILETREE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load filetree module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+FILETREE = _load_filetree_module()
+
+# Old enough to be outside the racy window
+PAST = 1_600_000_000
+
+
+def _make_tree(root: str) -> None:
+    for relative_path in ("a/one.py", "a/b/two.py", "c/three.txt", "top.py"):
+        path = Path(root, relative_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("", encoding="utf-8")
+    _age(root)
+
+
+def _age(root: str) -> None:
+    """Move every directory's mtime out of the racy window."""
+    for dir_path, _, _ in os.walk(root):
+        os.utime(dir_path, (PAST, PAST))
+
+
+def _run(root: str, cache_path: str, scanned: list | None = None) -> str:
+    scan_directory = FILETREE.scan_directory
+
+    def recording_scan(path):
+        if scanned is not None:
+            scanned.append(os.path.relpath(path, root))
+        return scan_directory(path)
+
+    buffer = io.StringIO()
+    with mock.patch.object(FILETREE, "scan_directory", recording_scan):
+        FILETREE.generate_tree([], [], root_dir=root, output_format="plain", file=buffer, cache_path=cache_path)
+    return buffer.getvalue()
+
+
+class ListingCacheTests(unittest.TestCase):
+    """Unchanged directories are served from the cache."""
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = os.path.join(self.tmp_dir.name, "tree")
+        self.cache_path = os.path.join(self.tmp_dir.name, "cache", "listings.json")
+        _make_tree(self.root)
+
+    def test_unchanged_tree_is_not_listed_again(self) -> None:
+        first_scanned = []
+        first = _run(self.root, self.cache_path, first_scanned)
+        self.assertEqual(len(first_scanned), 4)
+        self.assertTrue(os.path.exists(self.cache_path))
+
+        os.utime(self.cache_path, (PAST, PAST))
+        scanned = []
+        self.assertEqual(_run(self.root, self.cache_path, scanned), first)
+        self.assertEqual(scanned, [])
+        # Nothing changed, so the second run does not rewrite the cache
+        self.assertEqual(os.stat(self.cache_path).st_mtime, PAST)
+        cache = FILETREE.ListingCache.load(self.cache_path)
+        self.assertEqual(len(cache.listings), 4)
+
+    def test_changed_directory_is_listed_again(self) -> None:
+        _run(self.root, self.cache_path)
+        Path(self.root, "a", "b", "new.py").write_text("", encoding="utf-8")
+
+        scanned = []
+        output = _run(self.root, self.cache_path, scanned)
+        self.assertEqual(scanned, [os.path.join("a", "b")])
+        self.assertIn("new.py", output)
+
+    def test_recently_modified_directories_are_not_cached(self) -> None:
+        Path(self.root, "c", "fresh.txt").write_text("", encoding="utf-8")
+        _run(self.root, self.cache_path)
+
+        scanned = []
+        _run(self.root, self.cache_path, scanned)
+        self.assertEqual(scanned, ["c"])
+
+    def test_removed_directories_are_dropped(self) -> None:
+        _run(self.root, self.cache_path)
+        os.remove(os.path.join(self.root, "a", "b", "two.py"))
+        os.rmdir(os.path.join(self.root, "a", "b"))
+        _age(self.root)
+
+        _run(self.root, self.cache_path)
+        with open(self.cache_path, encoding="utf-8") as f:
+            directories = json.load(f)["directories"]
+        self.assertNotIn(os.path.abspath(os.path.join(self.root, "a", "b")), directories)
+        self.assertEqual(len(directories), 3)
+
+    def test_unreadable_cache_is_ignored(self) -> None:
+        os.makedirs(os.path.dirname(self.cache_path))
+        Path(self.cache_path).write_text("{not json", encoding="utf-8")
+        with self.assertLogs(level="WARNING"):
+            output = _run(self.root, self.cache_path)
+        self.assertIn("two.py", output)
+        self.assertEqual(len(FILETREE.ListingCache.load(self.cache_path).listings), 4)
+
+    def test_no_cache_option(self) -> None:
+        cache_home = os.path.join(self.tmp_dir.name, "xdg")
+        for argv, expected in ((["--no-cache"], False), ([], True)):
+            with self.subTest(argv=argv), mock.patch.dict(os.environ, {"XDG_CACHE_HOME": cache_home}), mock.patch.object(
+                FILETREE.sys, "argv", ["filetree", *argv, "-f", "plain", self.root]
+            ), mock.patch.object(FILETREE.sys, "stdout", io.StringIO()):
+                FILETREE.main()
+                self.assertEqual(os.path.exists(FILETREE.default_cache_path(self.root)), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
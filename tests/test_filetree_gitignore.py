@@ -0,0 +1,199 @@
+"""Unit tests for bin.filetree .gitignore handling."""
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+FILETREE_PATH = PROJECT_ROOT / "bin" / "filetree.py"
+
+
+def _load_filetree_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("filetree_module", FILETREE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load filetree module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+FILETREE = _load_filetree_module()
+
+
+def _write(root: str, layout: dict) -> None:
+    for relative_path, text in layout.items():
+        path = Path(root, relative_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+
+def _files(root: str, jobs: int = 1) -> list:
+    """Paths of the files filetree shows with --gitignore."""
+    buffer = io.StringIO()
+    FILETREE.generate_tree([], [], root_dir=root, jobs=jobs, output_format="ndjson", file=buffer, gitignore=True)
+    records = [json.loads(line) for line in buffer.getvalue().splitlines()]
+    return [record["path"].replace(os.sep, "/") for record in records if record["type"] == "file"]
+
+
+class PatternTests(unittest.TestCase):
+    """Patterns follow gitignore(5)."""
+
+    def _ignored(self, lines: str, path: str, is_dir: bool = False) -> bool:
+        ignore_file = FILETREE.GitIgnoreFile(FILETREE.parse_gitignore(lines.splitlines()))
+        return FILETREE.is_gitignored([ignore_file], path.replace("/", os.sep), is_dir)
+
+    def test_patterns(self) -> None:
+        cases = [
+            ("*.log", "a.log", False, True),
+            ("*.log", "dir/sub/a.log", False, True),
+            ("/build", "build", True, True),
+            ("/build", "src/build", True, False),
+            ("build/", "src/build", True, True),
+            ("build/", "src/build", False, False),
+            ("doc/frotz", "doc/frotz", True, True),
+            ("doc/frotz", "a/doc/frotz", True, False),
+            ("**/foo", "a/b/foo", False, True),
+            ("**/foo/bar", "foo/bar", False, True),
+            ("abc/**", "abc/x/y", False, True),
+            ("abc/**", "abc", True, False),
+            ("a/**/b", "a/b", False, True),
+            ("a/**/b", "a/x/y/b", False, True),
+            ("a/*/b", "a/x/y/b", False, False),
+            ("a?c", "a/c", False, False),
+            ("out.[oa]", "out.o", False, True),
+            ("out.[!oa]", "out.c", False, True),
+            ("out.[!oa]", "out.o", False, False),
+            ("\\#hash", "#hash", False, True),
+            ("# comment", "# comment", False, False),
+            ("\\!bang", "!bang", False, True),
+            ("trailing   ", "trailing", False, True),
+            ("space\\ ", "space ", False, True),
+            ("*.log\n!keep.log", "keep.log", False, False),
+            ("*.log\n!keep.log", "drop.log", False, True),
+            ("!keep.log\n*.log", "keep.log", False, True),
+        ]
+        for lines, path, is_dir, expected in cases:
+            with self.subTest(pattern=lines, path=path):
+                self.assertEqual(self._ignored(lines, path, is_dir), expected)
+
+
+class GitIgnoreWalkTests(unittest.TestCase):
+    """The walker applies nested ignore files and prunes ignored directories."""
+
+    def test_nested_files_and_negations(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            _write(
+                tmp_dir,
+                {
+                    ".gitignore": "*.log\n/dist/\n",
+                    "app.py": "",
+                    "app.log": "",
+                    "dist/bundle.js": "",
+                    "src/.gitignore": "!keep.log\n*.tmp\n",
+                    "src/keep.log": "",
+                    "src/drop.log": "",
+                    "src/dist/kept.js": "",
+                    "src/cache.tmp": "",
+                    "src/lib/other.tmp": "",
+                    "src/lib/mod.py": "",
+                    "other/cache.tmp": "",
+                },
+            )
+            for jobs in (1, 4):
+                with self.subTest(jobs=jobs):
+                    self.assertEqual(
+                        [path for path in _files(tmp_dir, jobs) if not path.endswith(".gitignore")],
+                        ["app.py", "other/cache.tmp", "src/dist/kept.js", "src/keep.log", "src/lib/mod.py"],
+                    )
+
+    def test_ignored_directories_are_not_scanned(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            _write(
+                tmp_dir,
+                {
+                    ".gitignore": "node_modules/\n.venv\n",
+                    "src/main.py": "",
+                    "node_modules/pkg/index.js": "",
+                    "src/.venv/lib/site.py": "",
+                },
+            )
+            scanned = []
+            scan_directory = FILETREE.scan_directory
+
+            def recording_scan(path):
+                scanned.append(os.path.relpath(path, tmp_dir))
+                return scan_directory(path)
+
+            with mock.patch.object(FILETREE, "scan_directory", recording_scan):
+                files = _files(tmp_dir)
+            self.assertEqual(files, [".gitignore", "src/main.py"])
+            self.assertEqual(scanned, [".", "src"])
+
+    def test_ignore_files_above_the_root_apply(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            _write(
+                tmp_dir,
+                {
+                    ".gitignore": "*.log\n/pkg/out/\n",
+                    ".git/info/exclude": "*.bak\n",
+                    "pkg/a.py": "",
+                    "pkg/a.log": "",
+                    "pkg/a.bak": "",
+                    "pkg/out/gen.py": "",
+                },
+            )
+            self.assertEqual(_files(os.path.join(tmp_dir, "pkg")), ["a.py"])
+
+    def test_show_all_disables_gitignore(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            _write(tmp_dir, {".gitignore": "*.log\n", "a.log": ""})
+            walker = FILETREE.TreeWalker([], [], show_all=True, gitignore=True)
+            names = [entry[1] for entry in walker.iter_entries(tmp_dir)]
+            self.assertEqual(names, [".gitignore", "a.log"])
+
+    @unittest.skipUnless(shutil.which("git"), "git is not installed")
+    def test_matches_git(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            _write(
+                tmp_dir,
+                {
+                    ".gitignore": "*.o\n!keep.o\nbuild/\n/top.txt\n**/deep/**/x.txt\ntmp/**\ne[0-9]\n",
+                    "a.o": "",
+                    "keep.o": "",
+                    "top.txt": "",
+                    "sub/top.txt": "",
+                    "sub/.gitignore": "!*.o\n/local\n",
+                    "sub/b.o": "",
+                    "sub/local/f.txt": "",
+                    "sub/build/f.txt": "",
+                    "deep/a/b/x.txt": "",
+                    "deep/x.txt": "",
+                    "tmp/t.txt": "",
+                    "e1": "",
+                    "e10": "",
+                },
+            )
+            subprocess.run(["git", "init", "-q", tmp_dir], check=True)
+            expected = subprocess.run(
+                ["git", "ls-files", "--others", "--exclude-standard"],
+                cwd=tmp_dir,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.split()
+            shown = [path for path in _files(tmp_dir) if not path.startswith(".git/")]
+            self.assertEqual(sorted(shown), sorted(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
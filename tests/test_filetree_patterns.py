@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import fnmatch
 import importlib.util
 import io
 import os
@@ -156,5 +157,45 @@ class PatternNormalizationTests(unittest.TestCase):
             self.assertIn("module.py", rendered)
 
 
+class PatternMatcherTests(unittest.TestCase):
+    """The compiled matcher agrees with per-pattern fnmatch checks."""
+
+    PATHS = [
+        "setup.py",
+        "src/module.py",
+        "src/nested/config.json",
+        "node_modules/pkg/index.js",
+        "docs/build.log",
+        "a.tmp/readme",
+        "logs/app.txt",
+    ]
+
+    @staticmethod
+    def _reference(path, patterns, substring):
+        parts = path.split(os.sep)
+        return any(
+            (substring and any(pattern in part for part in parts))
+            or any(fnmatch.fnmatch(part, pattern) for part in parts)
+            or fnmatch.fnmatch(path, pattern)
+            for pattern in patterns
+        )
+
+    def test_matches_agree_with_fnmatch(self) -> None:
+        for raw in (["node_modules|*.log|*.tmp"], [".*.py|.*.json"], ["log"]):
+            patterns = FILETREE.normalize_patterns(FILETREE.collect_pattern_tokens(raw))
+            for substring in (False, True):
+                matcher = FILETREE.PatternMatcher(patterns, substring=substring)
+                for path in self.PATHS:
+                    with self.subTest(patterns=patterns, substring=substring, path=path):
+                        self.assertEqual(
+                            matcher.matches(path), self._reference(path, patterns, substring)
+                        )
+
+    def test_empty_matcher_matches_nothing(self) -> None:
+        matcher = FILETREE.PatternMatcher([])
+        self.assertFalse(matcher)
+        self.assertFalse(matcher.matches("anything"))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,167 @@
+"""Unit tests for bin.filetree size aggregation."""
+
+from __future__ import annotations
+
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+FILETREE_PATH = PROJECT_ROOT / "bin" / "filetree.py"
+
+
+def _load_filetree_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("filetree_module", FILETREE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load filetree module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+FILETREE = _load_filetree_module()
+
+
+def _make_tree(root: str) -> None:
+    layout = {
+        "big/huge.bin": 300_000,
+        "big/small.txt": 10,
+        "docs/a.md": 2048,
+        "docs/b.md": 2048,
+        "empty/skip.log": 99,
+        "main.py": 500,
+    }
+    for relative_path, size in layout.items():
+        path = Path(root, relative_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * size)
+
+
+def _generate(root: str, output_format: str, jobs: int = 1, **options) -> str:
+    buffer = io.StringIO()
+    FILETREE.generate_tree(
+        FILETREE.normalize_patterns(["*.log"]),
+        [],
+        root_dir=root,
+        jobs=jobs,
+        output_format=output_format,
+        file=buffer,
+        **options,
+    )
+    return buffer.getvalue()
+
+
+class SizeFormatTests(unittest.TestCase):
+    """Sizes are printed and parsed in du -h units."""
+
+    def test_format_size(self) -> None:
+        for size, expected in ((0, "0B"), (1023, "1023B"), (1024, "1.0K"), (1536, "1.5K"), (5 * 1024**3, "5.0G")):
+            with self.subTest(size=size):
+                self.assertEqual(FILETREE.format_size(size), expected)
+
+    def test_parse_size(self) -> None:
+        for text, expected in (("500", 500), ("64K", 65536), ("1.5m", 1572864), ("2GiB", 2 * 1024**3), ("10MB", 10 * 1024**2)):
+            with self.subTest(text=text):
+                self.assertEqual(FILETREE.parse_size(text), expected)
+        with self.assertRaises(ValueError):
+            FILETREE.parse_size("ten")
+
+
+class SizeAggregationTests(unittest.TestCase):
+    """Totals, sorting and pruning come from a single walk."""
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = self.tmp_dir.name
+        _make_tree(self.root)
+
+    def test_totals_and_counts(self) -> None:
+        document = json.loads(_generate(self.root, "json", sizes=True, largest=2))
+        self.assertEqual(document["size"], 304_606)
+        self.assertEqual(document["files"], 5)
+        records = {record["path"].replace(os.sep, "/"): record for record in document["entries"]}
+        self.assertEqual((records["big"]["size"], records["big"]["files"]), (300_010, 2))
+        self.assertEqual((records["docs"]["size"], records["docs"]["files"]), (4096, 2))
+        self.assertEqual(records["main.py"]["size"], 500)
+        self.assertNotIn("files", records["main.py"])
+        # Excluded files count toward nothing, and empty directories stay hidden
+        self.assertNotIn("empty", records)
+        self.assertEqual(
+            [entry["path"].replace(os.sep, "/") for entry in document["largest"]],
+            ["big/huge.bin", "docs/a.md"],
+        )
+
+    def test_plain_annotations_and_size_sort(self) -> None:
+        output = _generate(self.root, "plain", sort="size", largest=1)
+        self.assertEqual(
+            output.splitlines()[1:],
+            [
+                "├── big/ (293.0K, 2 files)",
+                "│   ├── huge.bin (293.0K)",
+                "│   └── small.txt (10B)",
+                "├── docs/ (4.0K, 2 files)",
+                "│   ├── a.md (2.0K)",
+                "│   └── b.md (2.0K)",
+                "└── main.py (500B)",
+                "Largest files:",
+                f"  293.0K  {os.path.join('big', 'huge.bin')}",
+            ],
+        )
+
+    def test_min_size_prunes_without_changing_totals(self) -> None:
+        output = _generate(self.root, "plain", min_size=1024, largest=0)
+        self.assertEqual(
+            output.splitlines()[1:],
+            [
+                "├── big/ (293.0K, 2 files)",
+                "│   └── huge.bin (293.0K)",
+                "└── docs/ (4.0K, 2 files)",
+                "    ├── a.md (2.0K)",
+                "    └── b.md (2.0K)",
+            ],
+        )
+
+    def test_rich_matches_plain(self) -> None:
+        plain = _generate(self.root, "plain", sort="size", largest=3)
+        buffer = io.StringIO()
+        console = FILETREE.Console(file=buffer, width=200, force_terminal=False)
+        with mock.patch("rich.console.Console", return_value=console):
+            _generate(self.root, "rich", sort="size", largest=3)
+        self.assertEqual(buffer.getvalue(), plain)
+
+    def test_parallel_measure_matches_sequential(self) -> None:
+        for output_format in ("plain", "ndjson"):
+            with self.subTest(output_format=output_format):
+                self.assertEqual(
+                    _generate(self.root, output_format, jobs=4, sizes=True),
+                    _generate(self.root, output_format, sizes=True),
+                )
+
+    def test_items_keep_include_state_next_to_sizes(self) -> None:
+        walker = FILETREE.TreeWalker([], FILETREE.normalize_patterns(["docs"]), sizes=True)
+        docs = os.path.join(self.root, "docs")
+        items = walker.list_items(docs, "docs", True)
+        self.assertEqual(
+            [(name, path, included, size) for name, _, path, included, size in items],
+            [("a.md", None, True, 2048), ("b.md", None, True, 2048)],
+        )
+        (big,) = [item for item in walker.list_items(self.root, "", False) if item[0] == "big"]
+        self.assertEqual((big[3], big[4]), (False, None))
+
+    def test_invalid_min_size_is_rejected(self) -> None:
+        with mock.patch.object(FILETREE.sys, "argv", ["filetree", "--min-size", "big", self.root]), contextlib.redirect_stderr(
+            io.StringIO()
+        ), self.assertRaises(SystemExit):
+            FILETREE.main()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+"""Unit tests for bin.filetree streaming output formats."""
+
+from __future__ import annotations
+
+import collections
+import importlib.util
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+FILETREE_PATH = PROJECT_ROOT / "bin" / "filetree.py"
+
+
+def _load_filetree_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("filetree_module", FILETREE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load filetree module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+FILETREE = _load_filetree_module()
+
+
+def _make_tree(root: str) -> None:
+    """A tree where most directories end up empty after filtering."""
+    layout = {
+        "a/keep.py": "",
+        "a/skip.txt": "",
+        "a/empty/deeper/skip.txt": "",
+        "b/only.txt": "",
+        "c/d/e/keep.py": "",
+        "c/z/skip.txt": "",
+        "main.py": "",
+        "zz/skip.txt": "",
+    }
+    for relative_path, text in layout.items():
+        path = Path(root, relative_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+
+def _stream(root: str, output_format: str, jobs: int = 1, include=("*.py",)) -> str:
+    buffer = io.StringIO()
+    FILETREE.generate_tree(
+        [],
+        FILETREE.normalize_patterns(list(include), treat_as_include=True),
+        root_dir=root,
+        jobs=jobs,
+        output_format=output_format,
+        file=buffer,
+    )
+    return buffer.getvalue()
+
+
+def _rich(root: str, include=("*.py",)) -> str:
+    tree = FILETREE.Tree(root)
+    FILETREE.add_items(root, tree, [], FILETREE.normalize_patterns(list(include), treat_as_include=True))
+    buffer = io.StringIO()
+    console = FILETREE.Console(record=True, force_terminal=False, file=buffer, width=400)
+    console.print(tree)
+    return console.export_text()
+
+
+class StreamingFormatTests(unittest.TestCase):
+    """Streaming formats show the same tree as the rich output."""
+
+    def test_plain_matches_rich(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            _make_tree(tmp_dir)
+            for include in (("*.py",), ("*.txt",), ("*.md",), ()):
+                for jobs in (1, 4):
+                    with self.subTest(include=include, jobs=jobs):
+                        self.assertEqual(_stream(tmp_dir, "plain", jobs, include), _rich(tmp_dir, include))
+
+    def test_ndjson_records(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            _make_tree(tmp_dir)
+            records = [json.loads(line) for line in _stream(tmp_dir, "ndjson").splitlines()]
+        self.assertEqual(
+            [(r["path"], r["type"], r["depth"]) for r in records],
+            [
+                ("a", "directory", 0),
+                (os.path.join("a", "keep.py"), "file", 1),
+                ("c", "directory", 0),
+                (os.path.join("c", "d"), "directory", 1),
+                (os.path.join("c", "d", "e"), "directory", 2),
+                (os.path.join("c", "d", "e", "keep.py"), "file", 3),
+                ("main.py", "file", 0),
+            ],
+        )
+
+    def test_json_document(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            _make_tree(tmp_dir)
+            document = json.loads(_stream(tmp_dir, "json"))
+            empty = json.loads(_stream(tmp_dir, "json", include=("*.md",)))
+        self.assertEqual(len(document["entries"]), 7)
+        self.assertEqual(empty["entries"], [])
+
+    def test_each_directory_listed_once(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            _make_tree(tmp_dir)
+            calls = collections.Counter()
+            scan_directory = FILETREE.scan_directory
+
+            def counting_scan(path):
+                calls[path] += 1
+                return scan_directory(path)
+
+            with mock.patch.object(FILETREE, "scan_directory", counting_scan):
+                _stream(tmp_dir, "plain")
+        self.assertEqual(max(calls.values()), 1)
+
+    def test_streaming_formats_do_not_import_rich(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            _make_tree(tmp_dir)
+            code = (
+                "import runpy, sys\n"
+                f"sys.argv = ['filetree', '--no-cache', '-f', 'plain', {tmp_dir!r}]\n"
+                f"runpy.run_path({str(FILETREE_PATH)!r}, run_name='__main__')\n"
+                "print('rich' in sys.modules)\n"
+            )
+            result = subprocess.run(
+                [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=tmp_dir
+            )
+        self.assertEqual(result.stdout.splitlines()[-1], "False")
+        self.assertIn("keep.py", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+"""Unit tests for bin.filetree directory traversal."""
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import os
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+FILETREE_PATH = PROJECT_ROOT / "bin" / "filetree.py"
+
+
+def _load_filetree_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("filetree_module", FILETREE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load filetree module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+FILETREE = _load_filetree_module()
+
+
+def _render(tree) -> str:
+    buffer = io.StringIO()
+    console = FILETREE.Console(record=True, force_terminal=False, file=buffer, width=200)
+    console.print(tree)
+    return console.export_text()
+
+
+class TraversalTests(unittest.TestCase):
+    """The scandir walker keeps the tree layout of the recursive version."""
+
+    def test_sorted_layout_and_empty_directories_pruned(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            (root / "b").mkdir()
+            (root / "b" / "z.py").write_text("", encoding="utf-8")
+            (root / "b" / "a.txt").write_text("", encoding="utf-8")
+            (root / "a").mkdir()
+            (root / "a" / "notes.txt").write_text("", encoding="utf-8")
+            (root / "empty").mkdir()
+            (root / "c.py").write_text("", encoding="utf-8")
+
+            tree = FILETREE.Tree("root")
+            self.assertTrue(FILETREE.add_items(tmp_dir, tree, [], ["*.py", "**/*.py"]))
+            self.assertEqual(
+                _render(tree).splitlines(),
+                ["root", "├── b/", "│   └── z.py", "└── c.py"],
+            )
+
+    def test_no_per_entry_stat_calls(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name in ("one", "two"):
+                os.mkdir(os.path.join(tmp_dir, name))
+                Path(tmp_dir, name, "file.txt").write_text("", encoding="utf-8")
+            with mock.patch.object(FILETREE.os.path, "isfile") as isfile, mock.patch.object(
+                FILETREE.os.path, "isdir"
+            ) as isdir:
+                FILETREE.add_items(tmp_dir, FILETREE.Tree("root"), [], [])
+            isfile.assert_not_called()
+            isdir.assert_not_called()
+
+    def test_deeper_than_recursion_limit(self) -> None:
+        depth = 150
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = tmp_dir
+            for _ in range(depth):
+                path = os.path.join(path, "d")
+                os.mkdir(path)
+            Path(path, "leaf.txt").write_text("", encoding="utf-8")
+
+            tree = FILETREE.Tree("root")
+            limit = sys.getrecursionlimit()
+            sys.setrecursionlimit(100)
+            try:
+                self.assertTrue(FILETREE.add_items(tmp_dir, tree, [], []))
+            finally:
+                sys.setrecursionlimit(limit)
+
+            levels = 0
+            node = tree
+            while node.children:
+                (child,) = node.children
+                # Directory branches are added as the label of their node
+                node = child.label if isinstance(child.label, FILETREE.Tree) else child
+                levels += 1
+            self.assertEqual(levels, depth + 1)
+            self.assertEqual(node.label, "leaf.txt")
+
+    def test_excluded_directories_are_not_scanned(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name in ("src", "node_modules", "build"):
+                os.makedirs(os.path.join(tmp_dir, name, "deep"))
+                Path(tmp_dir, name, "deep", "file.py").write_text("", encoding="utf-8")
+            exclude = FILETREE.normalize_patterns(["node_modules", "build"])
+
+            scanned = []
+            scan_directory = FILETREE.scan_directory
+
+            def recording_scan(path):
+                scanned.append(os.path.relpath(path, tmp_dir))
+                return scan_directory(path)
+
+            tree = FILETREE.Tree("root")
+            with mock.patch.object(FILETREE, "scan_directory", recording_scan):
+                FILETREE.add_items(tmp_dir, tree, exclude, [])
+            self.assertEqual(scanned, [".", "src", os.path.join("src", "deep")])
+            self.assertNotIn("build", _render(tree))
+
+    def test_included_directory_includes_its_files(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.makedirs(os.path.join(tmp_dir, "conf.d", "sub"))
+            Path(tmp_dir, "conf.d", "sub", "a.txt").write_text("", encoding="utf-8")
+            Path(tmp_dir, "b.txt").write_text("", encoding="utf-8")
+
+            tree = FILETREE.Tree("root")
+            FILETREE.add_items(tmp_dir, tree, [], ["*.d"])
+            rendered = _render(tree)
+            self.assertIn("a.txt", rendered)
+            self.assertNotIn("b.txt", rendered)
+
+    def test_parallel_walk_matches_sequential_walk(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for a in range(4):
+                for b in range(3):
+                    path = os.path.join(tmp_dir, f"pkg{a}", f"sub{b}", "deep")
+                    os.makedirs(path)
+                    for name in ("mod.py", "notes.txt", "build.log"):
+                        Path(path, name).write_text("", encoding="utf-8")
+            os.makedirs(os.path.join(tmp_dir, "pkg9", "empty"))
+            exclude = FILETREE.normalize_patterns(["*.log", "sub1"])
+            include = FILETREE.normalize_patterns(["*.py"], treat_as_include=True)
+
+            rendered = []
+            for jobs in (1, 8):
+                tree = FILETREE.Tree("root")
+                FILETREE.add_items(tmp_dir, tree, exclude, include, jobs=jobs)
+                rendered.append(_render(tree))
+            self.assertEqual(rendered[0], rendered[1])
+            self.assertIn("mod.py", rendered[0])
+            self.assertNotIn("sub1", rendered[0])
+            self.assertNotIn("pkg9", rendered[0])
+
+    def test_symlinked_directories_skipped_without_follow_links(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            real_dir = Path(tmp_dir, "real")
+            real_dir.mkdir()
+            (real_dir / "module.py").write_text("", encoding="utf-8")
+            os.symlink(real_dir, Path(tmp_dir, "linked"))
+
+            tree = FILETREE.Tree("root")
+            FILETREE.add_items(tmp_dir, tree, [], [])
+            self.assertNotIn("linked/", _render(tree))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""Unit tests for bin.treebench tree generation and benchmark harness."""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import tempfile
+import types
+import unittest
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+TREEBENCH_PATH = PROJECT_ROOT / "bin" / "treebench.py"
+
+
+def _load_treebench_module() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location("treebench_module", TREEBENCH_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load treebench module specification")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+TREEBENCH = _load_treebench_module()
+
+
+class TreeGeneratorTests(unittest.TestCase):
+    """Generated trees have the requested shape and are reproducible."""
+
+    def test_counts_and_reproducibility(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            listings = []
+            for name in ("a", "b"):
+                root = os.path.join(tmp_dir, name)
+                counts = TREEBENCH.generate_tree(root, depth=2, fanout=3, files=4, seed=5)
+                self.assertEqual(counts, {"directories": 1 + 3 + 9, "files": 13 * 4})
+                listings.append(
+                    sorted(os.path.relpath(os.path.join(d, f), root) for d, _, fs in os.walk(root) for f in fs)
+                )
+            self.assertEqual(listings[0], listings[1])
+
+
+class BenchmarkTests(unittest.TestCase):
+    """The benchmark reports every combination and restores the real listing."""
+
+    def test_run_benchmark(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            TREEBENCH.generate_tree(tmp_dir, depth=1, fanout=2, files=2)
+            scan_directory = TREEBENCH.filetree.scan_directory
+            results = TREEBENCH.run_benchmark(tmp_dir, [1, 2], [0, 1])
+            self.assertIs(TREEBENCH.filetree.scan_directory, scan_directory)
+        self.assertEqual([(r["latency_ms"], r["jobs"]) for r in results], [(0, 1), (0, 2), (1, 1), (1, 2)])
+        self.assertEqual(results[0]["speedup"], 1.0)
+        self.assertTrue(all(r["seconds"] > 0 for r in results))
+
+
+if __name__ == "__main__":
+    unittest.main()